@@ -0,0 +1,81 @@
+import asyncio
+import json
+from pathlib import Path
+
+from tools.service import ScoringService, ScoringState
+from tools.tools import load_evaluation_table
+
+TABLE = Path(__file__).parents[1] / 'data' / 'Evaluation_Table.csv'
+VALID = {'parameters_with_weights': {'f': {'photovoltaic': 1}}}
+
+
+async def _post(port, request):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = request.encode() if isinstance(request, str) else \
+        json.dumps(request).encode()
+    writer.write('POST /score HTTP/1.1\r\nContent-Length: {}\r\n'
+                 'Connection: close\r\n\r\n'.format(len(body)).encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()) not in (b'\r\n', b''):
+        pass
+    response = await reader.read()
+    writer.close()
+
+    def reject(constant):
+        raise ValueError('Invalid JSON constant {}.'.format(constant))
+    return status, json.loads(response, parse_constant=reject)
+
+
+def _run(check):
+    async def run():
+        service = ScoringService(ScoringState(load_evaluation_table(TABLE)))
+        server = await service.start(port=0)
+        try:
+            await asyncio.wait_for(
+                check(service, server.sockets[0].getsockname()[1]), 30)
+        finally:
+            await service.stop()
+            server.close()
+    asyncio.run(run())
+
+
+def test_failed_request_keeps_service_running():
+    async def check(service, port):
+        status, response = await _post(port, '{"parameters_with_weights": '
+                                             '{"f": {"photovoltaic": 1e400}}}')
+        assert status == 400
+        status, response = await _post(port, {
+            'parameters_with_weights': {'f': {'photovoltaic': 10 ** 400}}})
+        assert status == 400
+        status, response = await _post(port, VALID)
+        assert status == 200
+        assert len(response['ranking']) == len(service.state.answers)
+        assert not service._batcher.done()
+    _run(check)
+
+
+def test_failed_batch_keeps_batcher_running():
+    async def check(service, port):
+        score_batch = service._score_batch
+
+        def fail(requests):
+            service._score_batch = score_batch
+            raise OverflowError('failed batch')
+        service._score_batch = fail
+        status, _ = await _post(port, VALID)
+        assert status == 500
+        status, _ = await _post(port, VALID)
+        assert status == 200
+        assert not service._batcher.done()
+    _run(check)
+
+
+def test_undefined_ratings_are_null():
+    async def check(service, port):
+        status, response = await _post(port, {
+            'parameters_with_weights': {'f': {'empty': 1}},
+            'evaluation_parameters': {'empty': []}})
+        assert status == 200
+        assert all(rating is None for rating in response['rating'].values())
+    _run(check)
@@ -0,0 +1,166 @@
+"""
+Aggregation of many rankings into one, e.g. of the section ratings or of the
+ratings of many weighting scenarios (see parallel.sweep_weights).
+
+All methods are based on the pairwise win matrix, which counts for every pair
+of models in how many rankings the first model is rated higher than the
+second. It is accumulated chunk by chunk from the ratings, the rankings are
+never stored as separate DataFrames.
+"""
+import numpy as np
+import pandas as pd
+
+# number of pairwise comparisons per chunk
+MAX_COMPARISONS = 2 ** 24
+
+
+def _get_chunks(ratings, models):
+    if isinstance(ratings, (pd.DataFrame, np.ndarray)):
+        ratings = [ratings]
+    for chunk in ratings:
+        if isinstance(chunk, pd.DataFrame):
+            if models is None:
+                models = list(chunk.columns)
+            chunk = chunk[models].to_numpy(dtype=float)
+        yield models, np.asarray(chunk, dtype=float)
+
+
+def get_pairwise_wins(ratings, models=None, chunk_size=None):
+    """
+    Counts for every pair of models in how many rankings the first model is
+    rated higher than the second, ties (and missing ratings) count as half a
+    win for both.
+
+    :param ratings: pandas.DataFrame or numpy.ndarray, one row per ranking
+        (e.g. ratings of sweep_weights or section ratings transposed), one
+        column per model, or iterable of them (chunks)
+    :param models: list of str (optional), models of the columns, defaults to
+        the columns of the first DataFrame
+    :param chunk_size: int (optional), number of rankings compared at once
+        (at most 255), defaults to MAX_COMPARISONS comparisons
+    :return: tuple (pandas.DataFrame, int)
+        Win matrix with the models as index and columns and the number of
+        rankings
+    """
+    wins = None
+    number_of_rankings = 0
+    for models, chunk in _get_chunks(ratings, models):
+        number_of_models = chunk.shape[1]
+        if wins is None:
+            wins = np.zeros((number_of_models, number_of_models),
+                            dtype=np.int64)
+        # the comparisons of at most 255 rankings are summed up as uint8
+        size = min(255, chunk_size or max(1, MAX_COMPARISONS // max(
+            1, number_of_models ** 2)))
+        for start in range(0, len(chunk), size):
+            part = chunk[start:start + size]
+            wins += np.add.reduce(
+                (part[:, :, np.newaxis] > part[:, np.newaxis, :]).view(
+                    np.uint8), axis=0, dtype=np.uint8)
+            number_of_rankings += len(part)
+    if wins is None:
+        raise ValueError('No rankings to aggregate.')
+    if models is None:
+        models = range(len(wins))
+    ties = number_of_rankings - wins - wins.T
+    np.fill_diagonal(ties, 0)
+    return pd.DataFrame(wins + 0.5 * ties, index=models, columns=models), \
+        number_of_rankings
+
+
+def get_borda_scores(wins):
+    """
+    Returns Borda score of every model, i.e. the number of models ranked
+    lower summed over all rankings.
+
+    :param wins: pandas.DataFrame, see get_pairwise_wins
+    :return: pandas.Series
+    """
+    return wins.sum(axis=1).rename('Borda')
+
+
+def get_copeland_scores(wins):
+    """
+    Returns Copeland score of every model, i.e. the number of models it beats
+    in the majority of the rankings, ties count as half.
+
+    :param wins: pandas.DataFrame, see get_pairwise_wins
+    :return: pandas.Series
+    """
+    values = wins.to_numpy()
+    scores = (values > values.T).sum(axis=1) + 0.5 * (
+        (values == values.T).sum(axis=1) - 1)
+    return pd.Series(scores, index=wins.index, name='Copeland')
+
+
+def get_kemeny_disagreement(wins, order):
+    """
+    Returns the Kemeny distance of an order to all rankings, i.e. the number
+    of pairwise preferences of the rankings contradicted by the order.
+
+    :param wins: pandas.DataFrame, see get_pairwise_wins
+    :param order: list-like, models from best to worst
+    :return: float
+    """
+    positions = wins.index.get_indexer(order)
+    values = wins.to_numpy()[np.ix_(positions, positions)]
+    return float(np.tril(values, -1).sum())
+
+
+def get_kemeny_order(wins, start=None, max_iterations=100000):
+    """
+    Approximates the Kemeny order (the order with the fewest contradicted
+    pairwise preferences) by local search: starting from the Borda order, the
+    model whose move to another position removes most disagreements is moved
+    until no move improves the order. Every step evaluates all moves at once
+    with cumulative sums over the win matrix.
+
+    :param wins: pandas.DataFrame, see get_pairwise_wins
+    :param start: list-like (optional), start order, defaults to the Borda
+        order
+    :param max_iterations: int, maximum number of moves
+    :return: list, models from best to worst
+    """
+    if start is None:
+        start = get_borda_scores(wins).sort_values(
+            ascending=False, kind='stable').index
+    order = list(wins.index.get_indexer(start))
+    values = wins.to_numpy()
+    for _ in range(max_iterations):
+        ordered = values[np.ix_(order, order)]
+        # change of agreement if the pair (a, c) is swapped
+        swaps = ordered.T - ordered
+        # move of position a behind position b > a or in front of b < a
+        forward = np.cumsum(np.triu(swaps, 1), axis=1)
+        backward = np.cumsum(np.tril(-swaps, -1)[:, ::-1], axis=1)[:, ::-1]
+        gains = forward + backward
+        first, second = np.unravel_index(np.argmax(gains), gains.shape)
+        if gains[first, second] <= 1e-9:
+            break
+        order.insert(second, order.pop(first))
+    return list(wins.index[order])
+
+
+def aggregate_rankings(ratings, models=None, chunk_size=None):
+    """
+    Aggregates many rankings with Borda, Copeland and the approximated
+    Kemeny order from one win matrix, see get_pairwise_wins.
+
+    :param ratings: see get_pairwise_wins
+    :param models: list of str (optional), see get_pairwise_wins
+    :param chunk_size: int (optional), see get_pairwise_wins
+    :return: pandas.DataFrame
+        Index are the models, columns the scores of Borda and Copeland and
+        the ranks of all methods (one is the best rank, equal scores share
+        the best rank)
+    """
+    wins, _ = get_pairwise_wins(ratings, models, chunk_size)
+    aggregated = pd.concat([get_borda_scores(wins),
+                            get_copeland_scores(wins)], axis=1)
+    for method in ['Borda', 'Copeland']:
+        aggregated['{} rank'.format(method)] = aggregated[method].rank(
+            ascending=False, method='min').astype(int)
+    kemeny_order = get_kemeny_order(wins)
+    aggregated['Kemeny rank'] = pd.Series(
+        np.arange(1, len(kemeny_order) + 1), index=kemeny_order)
+    return aggregated
@@ -0,0 +1,170 @@
+"""
+Weights from pairwise comparisons with the analytic hierarchy process (AHP).
+
+Stakeholders state how much more important one item is than another, e.g.
+"Storage is 3 times as important as Network". The comparisons of one
+stakeholder form a positive reciprocal matrix, the weights are its principal
+eigenvector (or the normalized geometric means of its rows) and the
+consistency ratio measures how far the judgements contradict each other.
+Many stakeholders are evaluated at once on a stack of matrices.
+"""
+import numpy as np
+
+# random consistency index of Saaty by number of compared items
+RANDOM_INDEX = [0., 0., 0., 0.58, 0.90, 1.12, 1.24, 1.32, 1.41, 1.45, 1.49,
+                1.51, 1.48, 1.56, 1.57, 1.59]
+
+# consistency ratio up to which the judgements are usually accepted
+MAX_CONSISTENCY_RATIO = 0.1
+
+
+def get_comparison_matrices(comparisons, items):
+    """
+    Returns pairwise comparison matrices of one or many stakeholders.
+
+    :param comparisons: dict or list of dict, keys are pairs of items
+        (a, b), values how many times a is as important as b, e.g.
+        {('Storage', 'Network'): 3}, every pair has to be given once
+    :param items: list of str, compared items, e.g. the sections
+    :return: numpy.ndarray of shape (number of stakeholders, number of items,
+        number of items)
+    """
+    if isinstance(comparisons, dict):
+        comparisons = [comparisons]
+    positions = {item: pos for pos, item in enumerate(items)}
+    matrices = np.full((len(comparisons), len(items), len(items)), np.nan)
+    matrices[:, np.arange(len(items)), np.arange(len(items))] = 1.
+    for stakeholder, comparison in enumerate(comparisons):
+        for (first, second), value in comparison.items():
+            if value <= 0:
+                raise ValueError('Comparison of {} and {} has to be '
+                                 'positive.'.format(first, second))
+            matrices[stakeholder, positions[first], positions[second]] = value
+            matrices[stakeholder, positions[second], positions[first]] = \
+                1 / value
+    missing = np.isnan(matrices)
+    if missing.any():
+        stakeholder, first, second = np.argwhere(missing)[0]
+        raise ValueError('Comparison of {} and {} of stakeholder {} is '
+                         'missing.'.format(items[first], items[second],
+                                           stakeholder))
+    return matrices
+
+
+def get_consistency_ratios(matrices, weights):
+    """
+    Returns consistency ratio of every comparison matrix, i.e. the consistency
+    index (lambda_max - n) / (n - 1) divided by the random index. The
+    principal eigenvalue lambda_max is estimated with the weights. Matrices
+    of up to two items are always consistent.
+
+    :param matrices: numpy.ndarray, see get_comparison_matrices
+    :param weights: numpy.ndarray of shape (number of stakeholders, number of
+        items)
+    :return: numpy.ndarray with one ratio per stakeholder
+    """
+    number_of_items = matrices.shape[-1]
+    if number_of_items <= 2:
+        return np.zeros(len(matrices))
+    lambda_max = (np.einsum('kij,kj->ki', matrices, weights) /
+                  weights).mean(axis=1)
+    consistency_index = (lambda_max - number_of_items) / \
+        (number_of_items - 1)
+    random_index = RANDOM_INDEX[min(number_of_items, len(RANDOM_INDEX) - 1)]
+    return np.maximum(consistency_index, 0.) / random_index
+
+
+def get_ahp_weights(matrices, method='eigenvector', tol=1e-12,
+                    max_iterations=1000):
+    """
+    Returns weights and consistency ratios of a stack of comparison matrices.
+
+    'geometric_mean' normalizes the geometric means of the rows,
+    'eigenvector' computes the principal eigenvector by power iteration of
+    all matrices at once, starting from the geometric means.
+
+    :param matrices: numpy.ndarray, see get_comparison_matrices, a single
+        matrix of shape (number of items, number of items) is also accepted
+    :param method: str, 'eigenvector' (default) or 'geometric_mean'
+    :param tol: float, maximum change of a weight in the last iteration
+    :param max_iterations: int, maximum number of power iterations
+    :return: tuple of numpy.ndarray
+        Weights of shape (number of stakeholders, number of items), which sum
+        up to one, and the consistency ratio of every stakeholder
+    """
+    matrices = np.asarray(matrices, dtype=float)
+    if matrices.ndim == 2:
+        matrices = matrices[np.newaxis]
+    weights = np.exp(np.log(matrices).mean(axis=2))
+    weights /= weights.sum(axis=1, keepdims=True)
+    if method == 'eigenvector':
+        for _ in range(max_iterations):
+            updated = np.einsum('kij,kj->ki', matrices, weights)
+            updated /= updated.sum(axis=1, keepdims=True)
+            change = np.abs(updated - weights).max() if updated.size else 0.
+            weights = updated
+            if change <= tol:
+                break
+    elif method != 'geometric_mean':
+        raise ValueError('Unknown method {}, choose eigenvector or '
+                         'geometric_mean.'.format(method))
+    return weights, get_consistency_ratios(matrices, weights)
+
+
+def set_node_weights(tree, weights, path=()):
+    """
+    Returns a copy of a weight tree (see hierarchy.get_weight_tree) in which
+    the children of one node get new weights, e.g. the sections of the
+    holistic rating or the parameters of a field.
+
+    :param tree: dict, weight tree
+    :param weights: dict, keys are the children of the node, values their
+        weights
+    :param path: tuple, path of the node, defaults to the root
+    :return: dict
+    """
+    if path:
+        tree = dict(tree)
+        weight, subtree = tree[path[0]] if isinstance(tree[path[0]], tuple) \
+            else (1, tree[path[0]])
+        subtree = set_node_weights(subtree, weights, path[1:])
+        tree[path[0]] = subtree if weight == 1 else (weight, subtree)
+        return tree
+    node = dict(tree)
+    for name, weight in weights.items():
+        child = tree[name]
+        if isinstance(child, tuple):
+            child = child[1]
+        node[name] = (float(weight), child) if isinstance(child, dict) else \
+            float(weight)
+    return node
+
+
+def get_ahp_profiles(tree, comparisons, path=(), items=None,
+                     method='eigenvector'):
+    """
+    Returns one weight tree per stakeholder with the weights of the children
+    of one node derived from pairwise comparisons, the profiles can be rated
+    with parallel.sweep_weights or hierarchy.evaluate_weight_tree.
+
+    :param tree: dict, weight tree, see hierarchy.get_weight_tree
+    :param comparisons: list of dict, see get_comparison_matrices
+    :param path: tuple, path of the node, defaults to the root (sections)
+    :param items: list of str (optional), compared children, defaults to all
+        children of the node that are not zero weighted subtrees
+    :param method: str, see get_ahp_weights
+    :return: tuple (list of dict, numpy.ndarray)
+        Weight trees and consistency ratios of the stakeholders
+    """
+    if items is None:
+        node = tree
+        for name in path:
+            node = node[name][1] if isinstance(node[name], tuple) else \
+                node[name]
+        items = [name for name, child in node.items()
+                 if not (isinstance(child, tuple) and child[0] == 0)]
+    weights, ratios = get_ahp_weights(
+        get_comparison_matrices(comparisons, items), method)
+    return [set_node_weights(tree, dict(zip(items, stakeholder_weights)),
+                             path)
+            for stakeholder_weights in weights], ratios
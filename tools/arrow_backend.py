@@ -0,0 +1,190 @@
+"""
+Evaluation of the survey table with Arrow instead of pandas.
+
+The survey table is read as pyarrow.Table or as a stream of record batches.
+The criteria are evaluated with Arrow compute kernels (is the answer equal to
+one) into the binary answer block, the rules and weights are applied on NumPy
+arrays and the results are emitted as pyarrow.Table. pandas is only used if
+the results are converted with to_pandas. The pandas path in tools.tools and
+tools.scoring stays unchanged.
+"""
+import csv
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+from tools import scoring
+from tools.tools import default_evaluation_parameters
+
+MODEL_COLUMN = 'Model / framework'
+
+
+def _check_pyarrow():
+    if pa is None:
+        raise ImportError('pyarrow is needed for the Arrow backend. Please '
+                          'install it, e.g. via pip install pyarrow.')
+
+
+DELIMITER = ';'
+
+
+def _get_csv_options(block_size=None):
+    read_options = pa_csv.ReadOptions() if block_size is None else \
+        pa_csv.ReadOptions(block_size=block_size)
+    return read_options, pa_csv.ParseOptions(delimiter=DELIMITER)
+
+
+def read_evaluation_table(path):
+    """
+    Reads survey table in the format of data/Evaluation_Table.csv, see
+    tools.load_evaluation_table. Missing answers stay null, they are not
+    ticked.
+
+    :param path: str or pathlib.Path, path to the csv file
+    :return: pyarrow.Table
+    """
+    _check_pyarrow()
+    read_options, parse_options = _get_csv_options()
+    return pa_csv.read_csv(str(path), read_options=read_options,
+                           parse_options=parse_options)
+
+
+def iter_evaluation_batches(path, block_size=1 << 20, column_types=None):
+    """
+    Streams survey table as record batches, e.g. for tables that do not fit
+    into memory.
+
+    :param path: str or pathlib.Path, path to the csv file
+    :param block_size: int, number of bytes read per batch
+    :param column_types: dict (optional), keys are columns, values their
+        pyarrow.DataType, defaults to strings for all columns, as types
+        inferred from the first batch might not fit later batches (e.g. a
+        column without answers in the first batch)
+    :return: iterator of pyarrow.RecordBatch
+    """
+    _check_pyarrow()
+    read_options, parse_options = _get_csv_options(block_size)
+    if column_types is None:
+        with open(path, newline='') as file:
+            names = next(csv.reader(file, delimiter=DELIMITER))
+        column_types = {name: pa.string() for name in names}
+    with pa_csv.open_csv(
+            str(path), read_options=read_options, parse_options=parse_options,
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types)) as reader:
+        yield from reader
+
+
+def get_ticked_column(column):
+    """
+    Returns which models ticked an answer, i.e. whose answer equals one.
+    Missing answers and text are not ticked like in the pandas path, in
+    string columns (see iter_evaluation_batches) '1' and '1.0' are ticked.
+
+    :param column: pyarrow.Array or pyarrow.ChunkedArray
+    :return: numpy.ndarray of dtype bool
+    """
+    if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+        ticked = pc.equal(column, 1)
+    elif pa.types.is_string(column.type):
+        ticked = pc.is_in(pc.utf8_trim_whitespace(column),
+                          value_set=pa.array(['1', '1.0']))
+    else:
+        return np.zeros(len(column), dtype=bool)
+    return pc.fill_null(ticked, False).to_numpy(zero_copy_only=False)
+
+
+def get_answer_block(data, columns=None, model_column=MODEL_COLUMN):
+    """
+    Creates answer block (see scoring.AnswerBlock) from Arrow data.
+
+    :param data: pyarrow.Table or pyarrow.RecordBatch
+    :param columns: list of str (optional), defaults to all columns except
+        model_column
+    :param model_column: str, column of the model names
+    :return: scoring.AnswerBlock
+    """
+    _check_pyarrow()
+    if columns is None:
+        columns = [name for name in data.schema.names if name != model_column]
+    values = np.empty((data.num_rows, len(columns)), dtype=np.uint8)
+    for pos, name in enumerate(columns):
+        values[:, pos] = get_ticked_column(data.column(name))
+    return scoring.AnswerBlock(
+        values, data.column(model_column).to_pylist(), columns)
+
+
+def get_weighted_models(data, parameters_with_weights,
+                        evaluation_parameters=None, model_column=MODEL_COLUMN):
+    """
+    Rates all models of the Arrow data, same results as
+    tools.get_weighted_models_from_evaluation_dicts.
+
+    :param data: pyarrow.Table or pyarrow.RecordBatch, see
+        read_evaluation_table
+    :param parameters_with_weights: dict, see
+        tools.get_weighted_models_from_evaluation_dicts
+    :param evaluation_parameters: dict (optional), defaults to
+        tools.default_evaluation_parameters
+    :param model_column: str, column of the model names
+    :return: pyarrow.Table with the column 'model' and one column per field
+    """
+    _check_pyarrow()
+    if evaluation_parameters is None:
+        evaluation_parameters = default_evaluation_parameters()
+    parameters = scoring.get_parameters(parameters_with_weights)
+    answers = get_answer_block(
+        data, scoring.get_criteria_columns(evaluation_parameters, parameters),
+        model_column)
+    parameter_scores = scoring.get_parameter_score_matrix(
+        answers, evaluation_parameters, parameters)
+    positions = {parameter: pos for pos, parameter in enumerate(parameters)}
+    fields = {'model': data.column(model_column)}
+    for field, parameter_with_weight in parameters_with_weights.items():
+        # summed up in the same order as the pandas path
+        sum_weighting = 0
+        sum_model = np.zeros(len(answers))
+        for parameter, weight in parameter_with_weight.items():
+            sum_weighting += weight
+            sum_model += parameter_scores[:, positions[parameter]] * weight
+        fields[field] = pa.array(sum_model / sum_weighting)
+    return pa.table(fields)
+
+
+def evaluate_batches(batches, parameters_with_weights,
+                     evaluation_parameters=None, model_column=MODEL_COLUMN):
+    """
+    Rates the models of a stream of record batches batch by batch, see
+    get_weighted_models.
+
+    :param batches: iterable of pyarrow.RecordBatch, see
+        iter_evaluation_batches
+    :param parameters_with_weights: dict, see get_weighted_models
+    :param evaluation_parameters: dict (optional), see get_weighted_models
+    :param model_column: str, column of the model names
+    :return: pyarrow.Table
+    """
+    _check_pyarrow()
+    results = [get_weighted_models(batch, parameters_with_weights,
+                                   evaluation_parameters, model_column)
+               for batch in batches]
+    if not results:
+        raise ValueError('No record batches to evaluate.')
+    return pa.concat_tables(results)
+
+
+def to_pandas(result):
+    """
+    Converts result of the Arrow backend into the format of the pandas path,
+    i.e. the models as index and the fields as columns.
+
+    :param result: pyarrow.Table, see get_weighted_models
+    :return: pandas.DataFrame
+    """
+    return result.to_pandas().set_index('model').rename_axis(None)
@@ -0,0 +1,84 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def get_fingerprint(*objects):
+    """
+    Returns content hash of the inserted objects. Used to check whether the
+    inputs of an evaluation or a plot have changed since the last run.
+
+    Supported are pandas.DataFrame, pandas.Series (including their attrs),
+    numpy.ndarray, dict, list, tuple and scalars. Note that the order of
+    dictionaries is taken into account, as it determines the rating of dict
+    criteria in the evaluation parameters. Other objects are hashed by their
+    representation.
+
+    :param objects: objects to be hashed
+    :return: str, hexadecimal sha256 hash
+    """
+    hasher = hashlib.sha256()
+    for obj in objects:
+        _update_hash(hasher, obj)
+    return hasher.hexdigest()
+
+
+def get_code_fingerprint(code):
+    """
+    Returns fingerprint of compiled code, e.g. of function.__code__. It
+    changes with the byte code, the constants (including nested functions)
+    and the used names, but not with the line numbers of the code.
+
+    :param code: code object
+    :return: list, see get_fingerprint to hash it
+    """
+    consts = [get_code_fingerprint(const) if hasattr(const, 'co_code')
+              else repr(const) for const in code.co_consts]
+    return [hashlib.sha256(code.co_code).hexdigest(), consts,
+            list(code.co_names)]
+
+
+def _update_attrs_hash(hasher, obj):
+    # attrs can change the result, e.g. the number of models of the counts of
+    # cube.AggregationCube, objects without attrs keep their former hash
+    if obj.attrs:
+        hasher.update(b'attrs')
+        _update_hash(hasher, obj.attrs)
+
+
+def _update_hash(hasher, obj):
+    if isinstance(obj, pd.DataFrame):
+        hasher.update(b'DataFrame')
+        _update_hash(hasher, [str(column) for column in obj.columns])
+        _update_hash(hasher, [str(dtype) for dtype in obj.dtypes])
+        hasher.update(pd.util.hash_pandas_object(
+            obj, index=True).to_numpy().tobytes())
+        _update_attrs_hash(hasher, obj)
+    elif isinstance(obj, pd.Series):
+        hasher.update(b'Series')
+        _update_hash(hasher, [str(obj.name), str(obj.dtype)])
+        hasher.update(pd.util.hash_pandas_object(
+            obj, index=True).to_numpy().tobytes())
+        _update_attrs_hash(hasher, obj)
+    elif isinstance(obj, pd.Index):
+        hasher.update(b'Index')
+        hasher.update(pd.util.hash_pandas_object(obj).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        hasher.update(b'ndarray')
+        _update_hash(hasher, [str(obj.dtype), list(obj.shape)])
+        hasher.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        hasher.update(b'dict')
+        for key, value in obj.items():
+            _update_hash(hasher, key)
+            _update_hash(hasher, value)
+        hasher.update(b'end')
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(type(obj).__name__.encode())
+        for value in obj:
+            _update_hash(hasher, value)
+        hasher.update(b'end')
+    else:
+        hasher.update(json.dumps(obj, default=repr).encode())
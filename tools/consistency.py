@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+# answer levels of the sector representation, exactly one level should be
+# ticked per sector
+SECTOR_LEVELS = {
+    'excluded': ['{} sector excluded'],
+    'exo aggregated': ['exo aggregated {} dem'],
+    'end disaggregated': ['end disaggregated {} dem',
+                          'end disaggregated {} tech'],
+}
+
+# questions where at least one answer should be given, the same checks are
+# printed by the rating functions in tools.tools
+ANSWER_REQUIRED = {
+    'decision making': ['perfect foresight',
+                        'rolling horizon / myopic foresight',
+                        'decision-/agentbased', 'no decision making',
+                        'other decision making'],
+    'grid representation': ['AC PF', 'DC PF', 'interconnectors',
+                            'transfer capacity', 'no grid'],
+    'max def load': ['time- and type-dependent', 'Type-dependent',
+                     'Time-dependent', 'max def load fixed value',
+                     'no max def load'],
+}
+
+
+def get_default_rules(columns):
+    """
+    Returns constraints of the survey table that should hold for every model:
+
+    * 'implies': a predefined technology ('<name>/def') and a used scope or
+      resolution ('<name>/used') should also be ticked as possible
+      ('<name>/pos')
+    * 'exactly_one': exactly one representation level of the heat and the
+      transport sector, see SECTOR_LEVELS
+    * 'at_least_one': at least one answer to the questions in
+      ANSWER_REQUIRED
+    * 'suspect': 'Type-dependent' ticked without 'time- and
+      type-dependent', see tools.get_rated_operation_repr_max_def_load
+
+    Rules are only created if all of their columns exist.
+
+    :param columns: list-like with names of the survey answers, e.g.
+        table.columns
+    :return: dict
+        Keys are the names of the rules, values are dicts with the entries
+        'kind' and 'columns'. For 'implies' and 'suspect' rules 'columns' is
+        a tuple (condition, required columns), for 'exactly_one' and
+        'at_least_one' rules a list of answer levels, where each level is a
+        list of columns of which at least one has to be ticked
+    """
+    columns = pd.Index(columns)
+    rules = {}
+    for column in columns:
+        name, _, answer = str(column).rpartition('/')
+        kind, dot, suffix = answer.partition('.')
+        if name and kind in ('def', 'used'):
+            pos_column = '{}/pos{}{}'.format(name, dot, suffix)
+            if pos_column in columns:
+                rules['{} -> {}'.format(column, pos_column)] = {
+                    'kind': 'implies', 'columns': (column, [pos_column])}
+    for sector in ['heat', 'transport']:
+        levels = [[column.format(sector) for column in level]
+                  for level in SECTOR_LEVELS.values()]
+        if all(column in columns for level in levels for column in level):
+            rules['{} representation'.format(sector)] = {
+                'kind': 'exactly_one', 'columns': levels}
+    for question, answers in ANSWER_REQUIRED.items():
+        if all(column in columns for column in answers):
+            rules['{} specified'.format(question)] = {
+                'kind': 'at_least_one',
+                'columns': [[column] for column in answers]}
+    if 'Type-dependent' in columns and 'time- and type-dependent' in columns:
+        rules['only type-dependent'] = {
+            'kind': 'suspect',
+            'columns': ('Type-dependent', ['time- and type-dependent'])}
+    return rules
+
+
+def get_ticked(table, columns):
+    """
+    Returns which answers of the survey table are ticked. Numeric answers are
+    ticked if they equal one, text answers (e.g. 'other heat representation')
+    if they are not empty or zero.
+
+    :param table: pandas.DataFrame with survey information
+    :param columns: list of str
+    :return: numpy.ndarray of dtype bool and shape (number of models,
+        number of columns)
+    """
+    ticked = np.empty((len(table), len(columns)), dtype=bool)
+    for pos, column in enumerate(columns):
+        values = table[column]
+        if pd.api.types.is_numeric_dtype(values):
+            ticked[:, pos] = (values == 1).to_numpy()
+        else:
+            ticked[:, pos] = (values.notna() &
+                              ~values.astype(str).str.strip().isin(
+                                  ['', '0', '0.0'])).to_numpy()
+    return ticked
+
+
+def check_consistency(table, rules=None):
+    """
+    Checks constraints of the survey table for all models at once.
+
+    All columns used by the rules are converted once into a boolean matrix,
+    rules of the same kind are then evaluated together with array operations.
+
+    :param table: pandas.DataFrame with survey information
+    :param rules: dict (optional), see get_default_rules, defaults to the
+        default rules of the columns of table
+    :return: pandas.DataFrame
+        Index are the models, columns are the names of the rules, entries
+        are True if a model violates a rule
+    """
+    if rules is None:
+        rules = get_default_rules(table.columns)
+    columns = []
+    for rule in rules.values():
+        if rule['kind'] in ('implies', 'suspect'):
+            condition, required = rule['columns']
+            columns += [condition] + list(required)
+        else:
+            columns += [column for level in rule['columns']
+                        for column in level]
+    columns = list(dict.fromkeys(columns))
+    positions = {column: pos for pos, column in enumerate(columns)}
+    ticked = get_ticked(table, columns)
+
+    violations = np.zeros((len(table), len(rules)), dtype=bool)
+    # rules with a single required column are evaluated in one operation
+    single = [(pos, positions[rule['columns'][0]],
+               positions[rule['columns'][1][0]])
+              for pos, rule in enumerate(rules.values())
+              if rule['kind'] in ('implies', 'suspect') and
+              len(rule['columns'][1]) == 1]
+    if single:
+        rule_pos, condition_pos, required_pos = map(list, zip(*single))
+        violations[:, rule_pos] = ticked[:, condition_pos] & \
+            ~ticked[:, required_pos]
+    single = {pos for pos, _, _ in single}
+    for pos, rule in enumerate(rules.values()):
+        if pos in single:
+            continue
+        if rule['kind'] in ('implies', 'suspect'):
+            condition, required = rule['columns']
+            violations[:, pos] = ticked[:, positions[condition]] & ~ticked[
+                :, [positions[column] for column in required]].any(axis=1)
+        elif rule['kind'] in ('exactly_one', 'at_least_one'):
+            levels = np.column_stack([
+                ticked[:, [positions[column] for column in level]].any(
+                    axis=1) for level in rule['columns']])
+            count = levels.sum(axis=1)
+            violations[:, pos] = count != 1 if \
+                rule['kind'] == 'exactly_one' else count == 0
+        else:
+            raise ValueError('Unknown kind {} of rule {}.'.format(
+                rule['kind'], list(rules)[pos]))
+    return pd.DataFrame(violations, index=table.index, columns=list(rules))
+
+
+def get_violations(table, rules=None):
+    """
+    Lists all violated constraints of the survey table, one row per model
+    and rule.
+
+    :param table: pandas.DataFrame with survey information
+    :param rules: dict (optional), see check_consistency
+    :return: pandas.DataFrame
+        Columns are 'model', 'rule' and 'kind'
+    """
+    if rules is None:
+        rules = get_default_rules(table.columns)
+    violations = check_consistency(table, rules)
+    models, positions = np.nonzero(violations.to_numpy())
+    kinds = np.array([rule['kind'] for rule in rules.values()], dtype=object)
+    return pd.DataFrame({
+        'model': violations.index[models],
+        'rule': violations.columns[positions],
+        'kind': kinds[positions]})
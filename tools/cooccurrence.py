@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from tools.scoring import AnswerBlock, get_tick_box_columns
+
+# chunks are multiplied in float32, which counts exactly up to 2 ** 24 rows
+MAX_CHUNK_SIZE = 2 ** 24
+# a chunk of 65536 rows and 200 columns takes about 50 MB in float32
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def _get_chunks(data, columns, chunk_size):
+    if isinstance(data, (pd.DataFrame, AnswerBlock)):
+        data = [data]
+    for block in data:
+        if isinstance(block, AnswerBlock):
+            positions = [block.get_position(column) for column in columns]
+        for start in range(0, len(block), chunk_size):
+            # only the rows of one chunk are converted at once
+            if isinstance(block, pd.DataFrame):
+                yield (block.iloc[start:start + chunk_size].reindex(
+                    columns=columns, fill_value=0) == 1).to_numpy(
+                    dtype=np.float32)
+            else:
+                yield block.values[start:start + chunk_size, positions
+                                   ].astype(np.float32)
+
+
+def get_cooccurrence(data, columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Counts how often every pair of tick-box answers is ticked by the same
+    model, e.g. how many models represent HP as well as Heat storage.
+
+    The counts are the matrix product of the transposed answer block with
+    itself, computed chunk by chunk with BLAS and accumulated exactly as
+    integers. The diagonal contains the number of models that ticked an
+    answer.
+
+    :param data: pandas.DataFrame with survey information, AnswerBlock or
+        iterable of them (chunks of a large table)
+    :param columns: list of str (optional), defaults to the tick-box columns
+        of the first chunk (see scoring.get_tick_box_columns) or all columns
+        of an AnswerBlock
+    :param chunk_size: int, number of rows multiplied at once, at most
+        MAX_CHUNK_SIZE
+    :return: tuple (pandas.DataFrame, int)
+        Co-occurrence counts with the columns as index and columns and the
+        number of models
+    """
+    if isinstance(data, (pd.DataFrame, AnswerBlock)):
+        data = [data]
+    data = iter(data)
+    first = next(data)
+    if columns is None:
+        columns = list(first.columns) if isinstance(first, AnswerBlock) else \
+            get_tick_box_columns(first)
+    chunk_size = min(chunk_size, MAX_CHUNK_SIZE)
+    counts = np.zeros((len(columns), len(columns)), dtype=np.int64)
+    number_of_models = 0
+    for chunk in _get_chunks(
+            (block for blocks in ([first], data) for block in blocks),
+            columns, chunk_size):
+        counts += np.rint(chunk.T @ chunk).astype(np.int64)
+        number_of_models += len(chunk)
+    return pd.DataFrame(counts, index=columns, columns=columns), \
+        number_of_models
+
+
+def get_lift(cooccurrence, number_of_models):
+    """
+    Returns lift of every pair of answers, i.e. the ratio of the observed
+    co-occurrence and the co-occurrence expected for independent answers.
+    Pairs with an answer that was never ticked are NaN.
+
+    :param cooccurrence: pandas.DataFrame, see get_cooccurrence
+    :param number_of_models: int, see get_cooccurrence
+    :return: pandas.DataFrame
+    """
+    counts = cooccurrence.to_numpy(dtype=float)
+    marginals = np.diag(counts)
+    expected = np.outer(marginals, marginals)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lift = np.where(expected > 0,
+                        number_of_models * counts / expected, np.nan)
+    return pd.DataFrame(lift, index=cooccurrence.index,
+                        columns=cooccurrence.columns)
+
+
+def get_phi(cooccurrence, number_of_models):
+    """
+    Returns phi coefficient (Pearson correlation of two binary answers) of
+    every pair of answers. Pairs with an answer that was ticked by no or by
+    all models are NaN.
+
+    :param cooccurrence: pandas.DataFrame, see get_cooccurrence
+    :param number_of_models: int, see get_cooccurrence
+    :return: pandas.DataFrame
+    """
+    counts = cooccurrence.to_numpy(dtype=float)
+    marginals = np.diag(counts)
+    variances = marginals * (number_of_models - marginals)
+    denominator = np.sqrt(np.outer(variances, variances))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        phi = np.where(
+            denominator > 0, (number_of_models * counts -
+                              np.outer(marginals, marginals)) / denominator,
+            np.nan)
+    return pd.DataFrame(phi, index=cooccurrence.index,
+                        columns=cooccurrence.columns)
+
+
+def get_cooccurrence_matrices(data, columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Computes co-occurrence, lift and phi coefficient of all pairs of
+    tick-box answers from one matrix product, see get_cooccurrence.
+
+    :param data: see get_cooccurrence
+    :param columns: list of str (optional), see get_cooccurrence
+    :param chunk_size: int, see get_cooccurrence
+    :return: dict with the pandas.DataFrame 'cooccurrence', 'lift' and 'phi'
+    """
+    cooccurrence, number_of_models = get_cooccurrence(data, columns,
+                                                      chunk_size)
+    return {'cooccurrence': cooccurrence,
+            'lift': get_lift(cooccurrence, number_of_models),
+            'phi': get_phi(cooccurrence, number_of_models)}
+
+
+def get_cluster_order(similarity):
+    """
+    Orders answers by average linkage clustering, so that answers that are
+    often ticked together are placed next to each other. The distance of two
+    answers is one minus their similarity, NaN is treated as no similarity.
+
+    :param similarity: pandas.DataFrame, e.g. phi coefficients, see get_phi
+    :return: list with the ordered index of similarity
+    """
+    distances = 1 - np.nan_to_num(similarity.to_numpy(dtype=float), nan=0.)
+    np.fill_diagonal(distances, np.inf)
+    original = distances.copy()
+    clusters = {pos: [pos] for pos in range(len(distances))}
+    active = np.ones(len(distances), dtype=bool)
+    while len(clusters) > 1:
+        masked = np.where(np.outer(active, active), distances, np.inf)
+        first, second = np.unravel_index(np.argmin(masked), masked.shape)
+        size_first = len(clusters[first])
+        size_second = len(clusters[second])
+        # average linkage, the merged cluster replaces the first cluster
+        distances[first] = (size_first * distances[first] +
+                            size_second * distances[second]) / \
+            (size_first + size_second)
+        distances[:, first] = distances[first]
+        distances[first, first] = np.inf
+        active[second] = False
+        # orientation of the merged clusters with the closest adjacent ends
+        first_order, second_order = clusters[first], clusters.pop(second)
+        clusters[first] = min(
+            [first_order + second_order, first_order + second_order[::-1],
+             first_order[::-1] + second_order,
+             first_order[::-1] + second_order[::-1]],
+            key=lambda order: original[order[len(first_order) - 1],
+                                       order[len(first_order)]])
+    order = next(iter(clusters.values())) if clusters else []
+    return list(similarity.index[order])
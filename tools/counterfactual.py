@@ -0,0 +1,241 @@
+import heapq
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from tools import scoring
+from tools.tools import default_evaluation_parameters
+
+TOLERANCE = 1e-12
+
+
+def get_parameter_coefficients(parameters_with_weights, field=None):
+    """
+    Returns the coefficients of the parameters in the rating of a model. The
+    rating is linear in the parameter ratings: a field is the weighted mean
+    of its parameters and the overall rating the mean of all fields.
+
+    :param parameters_with_weights: dict, see
+        tools.get_weighted_models_from_evaluation_dicts
+    :param field: str (optional), key of parameters_with_weights, defaults to
+        the overall rating (mean of all fields, e.g. rating_supply in
+        Evaluation.py)
+    :return: pandas.Series, index are the parameters
+    """
+    fields = list(parameters_with_weights) if field is None else [field]
+    coefficients = pd.Series(0., index=scoring.get_parameters(
+        {field: parameters_with_weights[field] for field in fields}))
+    for field in fields:
+        sum_weighting = sum(parameters_with_weights[field].values())
+        for parameter, weight in parameters_with_weights[field].items():
+            coefficients[parameter] += weight / sum_weighting / len(fields)
+    return coefficients
+
+
+def get_target_score(ratings, model, target_rank):
+    """
+    Returns the rating a model needs to reach the target rank. Ties are
+    ranked in favour of the model, i.e. the model needs the rating of the
+    other model currently at position target_rank.
+
+    :param ratings: pandas.Series with the rating of all models
+    :param model: str, name of the model
+    :param target_rank: int, one is the best rank
+    :return: float
+    """
+    others = np.sort(ratings.drop(model).to_numpy())[::-1]
+    if target_rank > len(others):
+        return -np.inf
+    return others[target_rank - 1]
+
+
+def _get_max_parameter_rating(evaluation):
+    if isinstance(evaluation, dict):
+        return max([0.] + list(evaluation.values()))
+    elif isinstance(evaluation, (list, str)):
+        return 1.
+    return 0.
+
+
+def find_counterfactual(table, model, parameters_with_weights,
+                        evaluation_parameters=None, target_score=None,
+                        target_rank=None, field=None, columns=None,
+                        allow_removal=False, max_changes=None,
+                        max_expansions=10000):
+    """
+    Searches the smallest set of changed tick-box answers with which a model
+    reaches a target rating or rank.
+
+    The search is a best-first (A*) search over sets of changed answers.
+    Only the parameters reading a changed answer are evaluated again for the
+    single row of the model, all other ratings stay as they are. The
+    heuristic assumes that every further change raises the ratings of the
+    parameters reading it to their maximum, so the first set found is
+    minimal. A greedy solution is determined first, afterwards only smaller
+    sets are searched. Ties are broken in favour of sets with higher rating.
+
+    :param table: pandas.DataFrame with survey information
+    :param model: str, name of the model
+    :param parameters_with_weights: dict, see
+        tools.get_weighted_models_from_evaluation_dicts
+    :param evaluation_parameters: dict (optional), defaults to
+        tools.default_evaluation_parameters
+    :param target_score: float (optional), rating that should be reached
+    :param target_rank: int (optional), rank that should be reached, one is
+        the best rank, either target_score or target_rank has to be given
+    :param field: str (optional), see get_parameter_coefficients
+    :param columns: list of str (optional), answers that may be changed,
+        defaults to all tick-box answers read by the evaluated parameters
+    :param allow_removal: bool, if False (default) only unticked answers are
+        ticked, if True ticked answers may also be unticked
+    :param max_changes: int (optional), maximum number of changed answers
+    :param max_expansions: int, maximum number of expanded sets of changes
+    :return: dict or None if no set of changes is found
+        'changes': dict with the changed answers and their new value (1 if
+        ticked, 0 if unticked), 'rating': new rating, 'rank': new rank,
+        'optimal': False if the search was stopped after max_expansions and
+        the returned set might not be minimal, 'expanded': number of expanded
+        sets
+    """
+    if evaluation_parameters is None:
+        evaluation_parameters = default_evaluation_parameters()
+    if (target_score is None) == (target_rank is None):
+        raise ValueError('Either target_score or target_rank has to be '
+                         'given.')
+    coefficients = get_parameter_coefficients(parameters_with_weights, field)
+    parameters = list(coefficients.index)
+    criteria_columns = [
+        column for column in scoring.get_criteria_columns(
+            evaluation_parameters, parameters) if column in table.columns]
+    answers = scoring.AnswerBlock.from_table(table, criteria_columns)
+    parameter_scores = scoring.get_parameter_score_matrix(
+        answers, evaluation_parameters, parameters)
+    ratings = pd.Series(parameter_scores @ coefficients.to_numpy(),
+                        index=answers.index)
+    if target_score is None:
+        target_score = get_target_score(ratings, model, target_rank)
+
+    # single row of the model, changed answers are flipped in place
+    row = answers.take([answers.index.get_loc(model)])
+    base_scores = parameter_scores[answers.index.get_loc(model)]
+    base_rating = ratings[model]
+
+    # parameters affected by every answer
+    dependents = {}
+    for pos, parameter in enumerate(parameters):
+        if coefficients[parameter] == 0:
+            continue
+        for column in scoring.get_criterion_columns(
+                evaluation_parameters[parameter]):
+            dependents.setdefault(column, []).append(pos)
+    if columns is None:
+        columns = [column for column in scoring.get_tick_box_columns(
+            table.loc[:, criteria_columns]) if column in dependents]
+    columns = [column for column in columns if column in dependents and (
+        allow_removal or not row[column][0])]
+    # dependency matrix of the answers and the parameters
+    weighted_dependents = np.zeros((len(columns), len(parameters)))
+    for pos, column in enumerate(columns):
+        weighted_dependents[pos, dependents[column]] = \
+            coefficients.iloc[dependents[column]]
+    max_ratings = np.array([_get_max_parameter_rating(
+        evaluation_parameters[parameter]) for parameter in parameters])
+
+    # ratings of the parameters only depend on the answers they read and are
+    # therefore cached per combination of these answers
+    parameter_positions = [
+        [row.get_position(column) for column in scoring.get_criterion_columns(
+            evaluation_parameters[parameter]) if column in row]
+        for parameter in parameters]
+    cache = [{} for _ in parameters]
+
+    def get_scores(changes):
+        # rates the parameters affected by the changes for the single row
+        scores = base_scores.copy()
+        positions = [row.get_position(columns[change]) for change in changes]
+        affected = {pos for change in changes
+                    for pos in dependents[columns[change]]}
+        row.values[0, positions] ^= 1
+        for pos in affected:
+            key = row.values[0, parameter_positions[pos]].tobytes()
+            if key not in cache[pos]:
+                cache[pos][key] = scoring.get_rated_parameter(
+                    row, evaluation_parameters[parameters[pos]])[0]
+            scores[pos] = cache[pos][key]
+        row.values[0, positions] ^= 1
+        return scores
+
+    def get_heuristic(rating, scores, last):
+        # lower bound of the number of further changes: every change can at
+        # most raise its parameters to their maximum rating
+        gap = target_score - rating
+        if gap <= TOLERANCE:
+            return 0
+        max_gains = weighted_dependents[last + 1:] @ (max_ratings - scores)
+        gains = np.cumsum(np.sort(max_gains)[::-1])
+        needed = int(np.searchsorted(gains, gap - TOLERANCE)) + 1
+        return needed if needed <= len(gains) else None
+
+    def get_result(changes, rating, expanded, optimal):
+        others = ratings.drop(model)
+        return {
+            'changes': {columns[change]: int(not row[columns[change]][0])
+                        for change in changes},
+            'rating': rating,
+            'rank': int((others > rating + TOLERANCE).sum()) + 1,
+            'optimal': optimal,
+            'expanded': expanded}
+
+    # greedy solution, only smaller sets are searched afterwards
+    best = None
+    changes = ()
+    rating = base_rating
+    while rating < target_score - TOLERANCE and (
+            max_changes is None or len(changes) < max_changes):
+        candidates = [change for change in range(len(columns))
+                      if change not in changes]
+        if not candidates:
+            break
+        ratings_candidates = [
+            base_rating + coefficients.to_numpy() @ (
+                get_scores(tuple(sorted(changes + (change,)))) - base_scores)
+            for change in candidates]
+        change = candidates[int(np.argmax(ratings_candidates))]
+        changes = tuple(sorted(changes + (change,)))
+        rating = max(ratings_candidates)
+    if rating >= target_score - TOLERANCE:
+        best = (changes, rating)
+    max_size = len(best[0]) - 1 if best is not None else max_changes
+
+    counter = itertools.count()
+    heuristic = get_heuristic(base_rating, base_scores, -1)
+    queue = [] if heuristic is None else \
+        [(heuristic, -base_rating, next(counter), (), base_scores)]
+    expanded = 0
+    while queue and expanded < max_expansions:
+        bound, negative_rating, _, changes, scores = heapq.heappop(queue)
+        if max_size is not None and bound > max_size:
+            break
+        rating = -negative_rating
+        if rating >= target_score - TOLERANCE:
+            return get_result(changes, rating, expanded, True)
+        expanded += 1
+        # sets are extended in order of the answers, so every set is
+        # created only once
+        for change in range(changes[-1] + 1 if changes else 0,
+                            len(columns)):
+            new_changes = changes + (change,)
+            new_scores = get_scores(new_changes)
+            new_rating = base_rating + coefficients.to_numpy() @ (
+                new_scores - base_scores)
+            heuristic = get_heuristic(new_rating, new_scores, change)
+            if heuristic is None or (max_size is not None and
+                                     len(new_changes) + heuristic > max_size):
+                continue
+            heapq.heappush(queue, (len(new_changes) + heuristic, -new_rating,
+                                   next(counter), new_changes, new_scores))
+    if best is None:
+        return None
+    # the greedy solution is minimal if no smaller set is left to search
+    return get_result(*best, expanded, not queue or queue[0][0] > max_size)
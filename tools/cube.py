@@ -0,0 +1,206 @@
+"""
+Materialized cube of answer counts for the share plots of Evaluation.py.
+
+The cube counts how many models ticked every answer of the survey for every
+combination of members of some dimensions, e.g. modeling language, year of
+the survey and spatial scope. Every dimension has the additional member
+'all', so the counts of the whole table and of every slice are read from the
+cube in O(cells) instead of summing up the table again. Models can belong to
+several members of a dimension (see grouping.get_group_codes) and new survey
+answers are added incrementally.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from tools.consistency import get_ticked
+from tools.grouping import get_group_codes
+
+ALL = 'all'
+
+
+def get_survey_year(table, column='Date'):
+    """
+    Returns year of the survey of every model, e.g. for the date '22.04.2020'
+    or '24 of April 2020', models without date are 'unknown'.
+
+    :param table: pandas.DataFrame with survey information
+    :param column: str, column of the date, defaults to 'Date'
+    :return: pandas.Series
+    """
+    def get_year(entry):
+        match = re.search(r'\d{4}', str(entry))
+        return match.group() if match else 'unknown'
+    return table[column].map(get_year)
+
+
+class AggregationCube:
+    """
+    Counts of ticked answers (see consistency.get_ticked) for all
+    combinations of the members of the dimensions.
+
+    :param dimensions: dict, keys are the names of the dimensions, values
+        define the members of a model: a text column listing the members
+        separated by separator (e.g. 'Modeling language'), a list of tick-box
+        columns (e.g. ['national/used', 'international/used']) or a function
+        returning the members of all models as pandas.Series (e.g.
+        get_survey_year)
+    :param columns: list of str (optional), counted answers, defaults to all
+        columns of the first added table
+    :param separator: str, separator of members in text columns
+    """
+    def __init__(self, dimensions, columns=None, separator=','):
+        self.dimensions = dict(dimensions)
+        self.columns = None if columns is None else pd.Index(columns)
+        self.separator = separator
+        self.members = {name: [ALL] for name in self.dimensions}
+        self.counts = None
+        self.number_of_models = None
+
+    @classmethod
+    def from_table(cls, table, dimensions, columns=None, separator=','):
+        """
+        Builds cube from survey table in one pass.
+
+        :param table: pandas.DataFrame with survey information
+        :param dimensions: dict, see AggregationCube
+        :param columns: list of str (optional), see AggregationCube
+        :param separator: str, see AggregationCube
+        :return: AggregationCube
+        """
+        return cls(dimensions, columns, separator).add(table)
+
+    def _get_memberships(self, table):
+        memberships = []
+        for name, definition in self.dimensions.items():
+            if callable(definition):
+                labels = pd.DataFrame({name: definition(table).astype(str)})
+                rows, codes, names = get_group_codes(labels, name,
+                                                     self.separator)
+            else:
+                rows, codes, names = get_group_codes(table, definition,
+                                                     self.separator)
+            members = self.members[name]
+            for member in names:
+                if member not in members:
+                    members.append(member)
+            positions = np.array([members.index(member) for member in names],
+                                 dtype=int)
+            membership = np.zeros((len(table), len(members)))
+            membership[:, 0] = 1.
+            membership[rows, positions[codes]] = 1.
+            memberships.append(membership)
+        return memberships
+
+    def _pad(self, array):
+        # new members are appended to the dimensions
+        shape = [len(members) for members in self.members.values()]
+        return np.pad(array, [(0, size - current) for size, current in
+                              zip(shape, array.shape)] +
+                      [(0, 0)] * (array.ndim - len(shape)))
+
+    def add(self, table):
+        """
+        Adds the answers of further models to the cube.
+
+        :param table: pandas.DataFrame with survey information of the new
+            models
+        :return: AggregationCube, the cube itself
+        """
+        if self.columns is None:
+            self.columns = pd.Index(table.columns)
+        memberships = self._get_memberships(table)
+        ticked = get_ticked(table, list(self.columns)).astype(float)
+        letters = 'abcdefghklmnopqrstuvwxyz'[:len(memberships)]
+        inputs = ','.join('i' + letter for letter in letters)
+        counts = np.rint(np.einsum('{},ij->{}j'.format(inputs, letters),
+                                   *memberships, ticked, optimize=True)
+                         ).astype(np.int64)
+        number_of_models = np.rint(np.einsum(
+            '{}->{}'.format(inputs, letters), *memberships, optimize=True)
+        ).astype(np.int64)
+        if self.counts is None:
+            self.counts = counts
+            self.number_of_models = number_of_models
+        else:
+            self.counts = self._pad(self.counts) + counts
+            self.number_of_models = self._pad(self.number_of_models) + \
+                number_of_models
+        return self
+
+    def _get_cell(self, selection):
+        selection = {} if selection is None else selection
+        unknown = set(selection) - set(self.dimensions)
+        if unknown:
+            raise KeyError('Unknown dimensions {}.'.format(sorted(unknown)))
+        return tuple(members.index(selection.get(name, ALL))
+                     for name, members in self.members.items())
+
+    def _get_columns(self, columns):
+        if columns is None:
+            return np.arange(len(self.columns))
+        if isinstance(columns, slice):
+            return np.arange(len(self.columns))[
+                self.columns.slice_indexer(columns.start, columns.stop)]
+        positions = self.columns.get_indexer(columns)
+        if (positions < 0).any():
+            raise KeyError('Columns {} are not counted in the cube.'.format(
+                [column for column, pos in zip(columns, positions)
+                 if pos < 0]))
+        return positions
+
+    def get_number_of_models(self, selection=None):
+        """
+        Returns number of models of a cell.
+
+        :param selection: dict (optional), keys are dimensions, values their
+            members, dimensions that are not selected are 'all'
+        :return: int
+        """
+        return int(self.number_of_models[self._get_cell(selection)])
+
+    def get_counts(self, columns=None, selection=None):
+        """
+        Returns number of models that ticked the answers in a cell, e.g.
+        get_counts(['prob yes', 'social yes']) for generalfactors of
+        Evaluation.py or get_counts(slice('spinning reserve', 'black start'),
+        {'language': 'Python'}).
+
+        :param columns: list of str or slice of column names (optional),
+            defaults to all columns
+        :param selection: dict (optional), see get_number_of_models
+        :return: pandas.Series, the number of models of the cell is stored in
+            attrs['number_of_models'] and used by plots.plot_bar_horizontal
+        """
+        positions = self._get_columns(columns)
+        counts = pd.Series(self.counts[self._get_cell(selection)][positions],
+                           index=self.columns[positions])
+        counts.attrs['number_of_models'] = self.get_number_of_models(
+            selection)
+        return counts
+
+    def get_slice(self, dimension, columns=None, selection=None):
+        """
+        Returns counts of all members of one dimension, e.g. the answers by
+        modeling language.
+
+        :param dimension: str, name of the dimension
+        :param columns: list of str or slice (optional), see get_counts
+        :param selection: dict (optional), members of the other dimensions,
+            see get_number_of_models
+        :return: pandas.DataFrame
+            Index are the members of the dimension (including 'all'), columns
+            the answers and the number of models ('number of models')
+        """
+        positions = self._get_columns(columns)
+        selection = dict({} if selection is None else selection)
+        rows = {}
+        for member in self.members[dimension]:
+            selection[dimension] = member
+            cell = self._get_cell(selection)
+            rows[member] = np.append(self.counts[cell][positions],
+                                     self.number_of_models[cell])
+        return pd.DataFrame.from_dict(
+            rows, orient='index',
+            columns=list(self.columns[positions]) + ['number of models'])
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+
+def get_model_contributions(contributions, model, field=None):
+    """
+    Returns the contributions of the parameters to the weighted rating of one
+    model.
+
+    :param contributions: pandas.DataFrame, contributions returned by
+        scoring.get_weighted_models with return_contributions=True, may be
+        sparse
+    :param model: str, name of the model
+    :param field: str (optional), field of parameters_with_weights, e.g.
+        'Technology\\nrepresentation'. Defaults to the overall rating, which
+        is the mean of all fields (e.g. rating_supply in Evaluation.py), the
+        contributions of a parameter used in several fields are then summed
+        up
+    :return: pandas.Series
+        Index are the parameters, the sum of the contributions is the
+        (weighted) rating of the model
+    """
+    row = pd.Series(np.asarray(contributions.loc[model], dtype=float),
+                    index=contributions.columns)
+    if field is not None:
+        return row.xs(field, level='field')
+    number_of_fields = contributions.columns.get_level_values(
+        'field').nunique()
+    return row.groupby(level='parameter', sort=False).sum() / \
+        number_of_fields
+
+
+def get_waterfall(contributions, start=0., drop_zero=True):
+    """
+    Returns waterfall-style breakdown of contributions, ordered by their
+    absolute value.
+
+    :param contributions: pandas.Series, e.g. see get_model_contributions or
+        column 'difference' of get_pairwise_difference
+    :param start: float, value the waterfall starts at, defaults to 0
+    :param drop_zero: bool, if True parameters without contribution are
+        dropped, defaults to True
+    :return: pandas.DataFrame
+        Index are the parameters, columns are 'contribution', 'start' and
+        'end', the end of the last parameter is the total
+    """
+    if drop_zero:
+        contributions = contributions[contributions != 0]
+    contributions = contributions.iloc[
+        np.argsort(-np.abs(contributions.to_numpy()), kind='stable')]
+    end = start + contributions.cumsum()
+    return pd.DataFrame({'contribution': contributions,
+                         'start': end - contributions, 'end': end})
+
+
+def get_pairwise_difference(contributions, model_a, model_b, field=None,
+                            drop_equal=True):
+    """
+    Explains the difference between the ratings of two models by the
+    differences of the contributions of every parameter.
+
+    :param contributions: pandas.DataFrame, see get_model_contributions
+    :param model_a: str, name of the first model
+    :param model_b: str, name of the second model
+    :param field: str (optional), see get_model_contributions
+    :param drop_equal: bool, if True parameters with equal contributions are
+        dropped, defaults to True
+    :return: pandas.DataFrame
+        Index are the parameters ordered by the difference, columns are
+        model_a, model_b and 'difference' (contribution of model_a minus
+        contribution of model_b). The sum of the differences is the
+        difference of the ratings
+    """
+    difference = pd.DataFrame({
+        model_a: get_model_contributions(contributions, model_a, field),
+        model_b: get_model_contributions(contributions, model_b, field)})
+    difference['difference'] = difference[model_a] - difference[model_b]
+    if drop_equal:
+        difference = difference[difference['difference'] != 0]
+    return difference.sort_values('difference', ascending=False,
+                                  kind='stable')
@@ -0,0 +1,218 @@
+"""
+Discriminative power of the survey questions.
+
+Questions that (almost) all models answer the same way do not separate the
+models, questions that are answered like other questions are redundant. For
+every tick-box column and every evaluation parameter, the entropy and the
+variance of the answers, the mutual information with the section ratings and
+the strongest correlation with another column or parameter are computed. All
+measures are accumulated in one pass over the answer block chunk by chunk, so
+large (e.g. synthetic) populations do not have to fit into memory at once.
+"""
+import numpy as np
+import pandas as pd
+
+from tools import hierarchy, scoring
+from tools.tools import default_evaluation_parameters
+
+COLUMN = 'column'
+PARAMETER = 'parameter'
+
+
+def _get_blocks(data, columns):
+    if isinstance(data, (pd.DataFrame, scoring.AnswerBlock)):
+        data = [data]
+    for block in data:
+        if isinstance(block, pd.DataFrame):
+            block = scoring.AnswerBlock.from_table(
+                block.reindex(columns=columns, fill_value=0))
+        yield block
+
+
+def _get_codes(values, bins):
+    # values between zero and one in equally wide bins
+    return np.minimum(np.floor(np.clip(values, 0., 1.) * bins),
+                      bins - 1).astype(np.int64)
+
+
+def _get_entropy(counts, axis=-1):
+    totals = counts.sum(axis=axis, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probabilities = counts / totals
+        entropy = -np.where(counts > 0, probabilities * np.log2(
+            np.where(counts > 0, probabilities, 1.)), 0.).sum(axis=axis)
+    # constant answers have an entropy of zero, not of minus zero
+    return np.maximum(entropy, 0.)
+
+
+def get_discrimination_statistics(data, tree=None, evaluation_parameters=None,
+                                  columns=None, bins=10, chunk_size=4096):
+    """
+    Accumulates the statistics of all columns and evaluation parameters in
+    one pass over the models: the joint histogram of every variable with
+    every section rating (values between zero and one in bins equally wide
+    bins, tick boxes fall into the first and the last bin), the sums and the
+    cross products of the variables.
+
+    :param data: pandas.DataFrame with survey information, AnswerBlock or
+        iterable of them (chunks of a large table)
+    :param tree: dict (optional), see hierarchy.get_weight_tree, the children
+        of the root are the sections, defaults to the hierarchy of
+        Evaluation.py
+    :param evaluation_parameters: dict (optional), all entries are analysed,
+        defaults to tools.default_evaluation_parameters
+    :param columns: list of str (optional), analysed columns, defaults to the
+        tick-box columns of the first chunk (see scoring.get_tick_box_columns)
+        or all columns of an AnswerBlock
+    :param bins: int, number of bins of the variables and ratings
+    :param chunk_size: int, number of models processed at once
+    :return: dict
+        'variables' (pandas.MultiIndex of kind and name), 'sections',
+        'number_of_models', 'joint' (numpy.ndarray of shape (sections,
+        variables, bins, bins)), 'sums', 'squares' and 'products'
+    """
+    if tree is None:
+        tree = hierarchy.get_weight_tree()
+    if evaluation_parameters is None:
+        evaluation_parameters = default_evaluation_parameters()
+    aggregation = hierarchy.compile_weight_tree(tree)
+    sections = [path for path in aggregation.index if len(path) == 1]
+    parameters = list(evaluation_parameters)
+    tree_positions = [parameters.index(parameter)
+                      for parameter in aggregation.columns]
+    section_weights = aggregation.loc[sections].to_numpy().T
+
+    if isinstance(data, (pd.DataFrame, scoring.AnswerBlock)):
+        data = [data]
+    data = iter(data)
+    first = next(data)
+    if columns is None:
+        columns = list(first.columns) \
+            if isinstance(first, scoring.AnswerBlock) \
+            else scoring.get_tick_box_columns(first)
+    columns = list(columns)
+    block_columns = list(dict.fromkeys(columns + scoring.get_criteria_columns(
+        evaluation_parameters)))
+    number_of_variables = len(columns) + len(parameters)
+
+    joint = np.zeros(len(sections) * number_of_variables * bins * bins,
+                     dtype=np.int64)
+    sums = np.zeros(number_of_variables)
+    squares = np.zeros(number_of_variables)
+    products = np.zeros((number_of_variables, number_of_variables))
+    number_of_models = 0
+    # offset of every (section, variable) pair in the flattened histogram
+    offsets = (np.arange(len(sections))[:, np.newaxis] * number_of_variables +
+               np.arange(number_of_variables))[:, :, np.newaxis] * bins * bins
+    for block in _get_blocks(
+            (block for blocks in ([first], data) for block in blocks),
+            block_columns):
+        for start in range(0, len(block), chunk_size):
+            answers = block.take(slice(start, start + chunk_size))
+            scores = scoring.get_parameter_score_matrix(
+                answers, evaluation_parameters, parameters)
+            values = np.hstack([answers.values[:, [answers.get_position(
+                column) for column in columns]].astype(float), scores])
+            ratings = scores[:, tree_positions] @ section_weights
+
+            variable_codes = _get_codes(values, bins)
+            rating_codes = _get_codes(ratings, bins)
+            indices = offsets + variable_codes.T[np.newaxis] * bins + \
+                rating_codes.T[:, np.newaxis]
+            joint += np.bincount(indices.ravel(), minlength=len(joint))
+            sums += values.sum(axis=0)
+            squares += (values ** 2).sum(axis=0)
+            products += values.T @ values
+            number_of_models += len(values)
+
+    variables = pd.MultiIndex.from_tuples(
+        [(COLUMN, column) for column in columns] +
+        [(PARAMETER, parameter) for parameter in parameters],
+        names=['kind', 'variable'])
+    return {'variables': variables,
+            'sections': [section[0] for section in sections],
+            'number_of_models': number_of_models,
+            'joint': joint.reshape(len(sections), number_of_variables, bins,
+                                   bins),
+            'sums': sums, 'squares': squares, 'products': products}
+
+
+def get_discrimination_report(statistics):
+    """
+    Derives the measures of discriminative power from the accumulated
+    statistics.
+
+    :param statistics: dict, see get_discrimination_statistics
+    :return: pandas.DataFrame
+        Index are kind ('column' or 'parameter') and name of the variables,
+        columns the entropy of the binned answers in bits, the variance, the
+        mutual information (bits) with every section rating and its maximum
+        ('mutual information'), the largest absolute correlation with another
+        variable of the same kind ('redundancy') and this variable
+        ('redundant with'), sorted by decreasing mutual information. Constant
+        variables have zero entropy, variance and mutual information and no
+        redundancy. With few models, the mutual information of variables with
+        many bins is overestimated.
+    """
+    joint = statistics['joint'].astype(float)
+    number_of_models = statistics['number_of_models']
+    variables = statistics['variables']
+    variable_counts = joint[0].sum(axis=2)
+    rating_counts = joint.sum(axis=2)
+    expected = variable_counts[np.newaxis, :, :, np.newaxis] * \
+        rating_counts[:, :, np.newaxis, :] / number_of_models
+    with np.errstate(divide='ignore', invalid='ignore'):
+        information = np.where(joint > 0, joint * np.log2(
+            np.where(joint > 0, joint / expected, 1.)), 0.).sum(
+            axis=(2, 3)) / number_of_models
+
+    means = statistics['sums'] / number_of_models
+    variances = np.maximum(statistics['squares'] / number_of_models -
+                           means ** 2, 0.)
+    covariances = statistics['products'] / number_of_models - \
+        np.outer(means, means)
+    deviations = np.sqrt(np.outer(variances, variances))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlations = np.abs(np.where(deviations > 0,
+                                       covariances / deviations, np.nan))
+    # redundancy only within columns or within parameters
+    kinds = variables.get_level_values('kind')
+    correlations[kinds.to_numpy()[:, np.newaxis] !=
+                 kinds.to_numpy()[np.newaxis]] = np.nan
+    np.fill_diagonal(correlations, np.nan)
+    defined = ~np.isnan(correlations).all(axis=1)
+    partners = np.argmax(np.nan_to_num(correlations, nan=-1.), axis=1)
+
+    report = pd.DataFrame({
+        'entropy': _get_entropy(variable_counts),
+        'variance': variances}, index=variables)
+    for section, values in zip(statistics['sections'], information):
+        report['mutual information {}'.format(section)] = values
+    report['mutual information'] = information.max(axis=0)
+    report['redundancy'] = np.where(
+        defined, correlations[np.arange(len(variables)), partners], np.nan)
+    report['redundant with'] = np.where(
+        defined, variables.get_level_values('variable')[partners], None)
+    return report.sort_values(['mutual information', 'entropy'],
+                              ascending=False, kind='stable')
+
+
+def get_discrimination(data, tree=None, evaluation_parameters=None,
+                       columns=None, bins=10, chunk_size=4096):
+    """
+    Returns sorted report of the discriminative power of all survey columns
+    and evaluation parameters, see get_discrimination_statistics and
+    get_discrimination_report. The report can be plotted with
+    plots.plot_discrimination.
+
+    :param data: see get_discrimination_statistics
+    :param tree: dict (optional), see get_discrimination_statistics
+    :param evaluation_parameters: dict (optional), see
+        get_discrimination_statistics
+    :param columns: list of str (optional), see get_discrimination_statistics
+    :param bins: int, see get_discrimination_statistics
+    :param chunk_size: int, see get_discrimination_statistics
+    :return: pandas.DataFrame, see get_discrimination_report
+    """
+    return get_discrimination_report(get_discrimination_statistics(
+        data, tree, evaluation_parameters, columns, bins, chunk_size))
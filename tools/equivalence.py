@@ -0,0 +1,443 @@
+"""
+Differential testing of the optimized evaluation paths against the reference
+loop tools.get_weighted_models_from_evaluation_dicts.
+
+Random survey tables over the schema of the real table, random evaluation
+parameters (dict criteria with first-match semantics, lists and the rules of
+scoring.RATING_RULES) and random weights are evaluated by the reference and
+by every optimized path. Paths that change the case, e.g. the answers of a
+model or the weights, are compared with the reference of the changed case.
+Deviations and the runtime of both are reported. Run it from the repository
+folder with
+
+    python -m tools.equivalence --iterations 100
+
+which exits with status 1 if any path deviates from the reference.
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tools import counterfactual, hierarchy, influence, parallel, scoring, \
+    session, snapshots
+from tools.tools import get_weighted_models_from_evaluation_dicts, \
+    load_evaluation_table
+
+
+def _get_reference(table, parameters_with_weights, evaluation_parameters):
+    return get_weighted_models_from_evaluation_dicts(
+        list(table.index), parameters_with_weights, evaluation_parameters,
+        table)
+
+
+def _get_scoring_path(table, parameters_with_weights, evaluation_parameters):
+    return scoring.get_weighted_models(
+        list(table.index), parameters_with_weights, evaluation_parameters,
+        table)
+
+
+def _get_contributions_path(table, parameters_with_weights,
+                            evaluation_parameters):
+    _, contributions = scoring.get_weighted_models(
+        list(table.index), parameters_with_weights, evaluation_parameters,
+        table, return_contributions=True)
+    return contributions.T.groupby(level='field', sort=False).sum().T
+
+
+def _get_hierarchy_path(table, parameters_with_weights,
+                        evaluation_parameters):
+    ratings = hierarchy.evaluate_weight_tree(
+        table, parameters_with_weights, evaluation_parameters)
+    return hierarchy.get_children_ratings(ratings)
+
+
+def _get_session_path(table, parameters_with_weights, evaluation_parameters):
+    # one section per field, the answers of every model are set one by one
+    # starting from the answers of the next model
+    evaluation = session.EvaluationSession(
+        table.set_axis(np.roll(table.index, 1)).loc[table.index],
+        evaluation_parameters,
+        {field: {'overall': {field: parameter_with_weight}}
+         for field, parameter_with_weight in
+         parameters_with_weights.items()})
+    columns = [column for column in scoring.get_criteria_columns(
+        evaluation_parameters, evaluation.parameters)
+        if column in table.columns]
+    for model in table.index:
+        evaluation.set_answers(model, table.loc[model, columns].to_dict())
+    return evaluation.ratings[list(parameters_with_weights)]
+
+
+def _get_counterfactual_path(table, parameters_with_weights,
+                             evaluation_parameters):
+    # the first model gets the answers of the last model and searches the
+    # answers that bring it to the top of every field
+    model = table.index[0]
+    changed = table.copy()
+    changed.loc[model] = table.iloc[-1].to_numpy()
+    columns = [column for column in get_numeric_columns(table)
+               if (changed.at[model, column] == 1) !=
+               (table.at[model, column] == 1)]
+    ratings = pd.DataFrame(np.nan, index=[model],
+                           columns=list(parameters_with_weights))
+    expected = ratings.copy()
+    for field in parameters_with_weights:
+        result = counterfactual.find_counterfactual(
+            changed, model, parameters_with_weights, evaluation_parameters,
+            target_rank=1, field=field, columns=columns, allow_removal=True,
+            max_expansions=100)
+        if result is None:
+            continue
+        ratings.at[model, field] = result['rating']
+        rescored = changed.copy()
+        for column, value in result['changes'].items():
+            rescored.at[model, column] = value
+        expected.at[model, field] = _get_reference(
+            rescored, parameters_with_weights, evaluation_parameters).at[
+            model, field]
+    return ratings, expected
+
+
+def _get_sweep_path(table, parameters_with_weights, evaluation_parameters,
+                    processes=None):
+    # one profile per field, the mean of a single field is the field
+    return parallel.sweep_weights(
+        table, {field: {field: parameter_with_weight}
+                for field, parameter_with_weight in
+                parameters_with_weights.items()},
+        evaluation_parameters, processes=processes).T
+
+
+def _get_shared_sweep_path(table, parameters_with_weights,
+                           evaluation_parameters):
+    return _get_sweep_path(table, parameters_with_weights,
+                           evaluation_parameters, processes=2)
+
+
+def _get_snapshots_path(table, parameters_with_weights,
+                        evaluation_parameters):
+    # two snapshots with differently ordered columns
+    collection = snapshots.SurveySnapshots()
+    half = len(table) // 2
+    collection.add('first', table.iloc[:half])
+    collection.add('second', table.iloc[half:, ::-1])
+    return collection.get_weighted_models(
+        parameters_with_weights, evaluation_parameters).droplevel('snapshot')
+
+
+def _get_influence_path(table, parameters_with_weights,
+                        evaluation_parameters):
+    # an extra field only consisting of one parameter of the first field is
+    # removed together with the parameter
+    first = next(iter(next(iter(parameters_with_weights.values()))))
+    parameters_with_weights = dict(parameters_with_weights)
+    parameters_with_weights['only {}'.format(first)] = {first: 1.}
+    _, changes = influence.get_rating_changes(
+        scoring.get_parameter_scores(table, evaluation_parameters),
+        parameters_with_weights)
+
+    base = _get_reference(table, parameters_with_weights,
+                          evaluation_parameters).mean(axis=1)
+    expected = pd.DataFrame(np.nan, index=table.index,
+                            columns=changes.columns)
+    for parameter in changes.columns:
+        left_out = {field: {other: weight for other, weight in
+                            parameter_with_weight.items()
+                            if other != parameter}
+                    for field, parameter_with_weight in
+                    parameters_with_weights.items()}
+        left_out = {field: parameter_with_weight for field,
+                    parameter_with_weight in left_out.items()
+                    if parameter_with_weight}
+        if left_out:
+            expected[parameter] = _get_reference(
+                table, left_out, evaluation_parameters).mean(axis=1) - base
+    return changes, expected
+
+
+def _write_table(table, directory):
+    path = Path(directory) / 'table.csv'
+    table.to_csv(path, sep=';')
+    return path
+
+
+def _get_arrow_path(table, parameters_with_weights, evaluation_parameters):
+    from tools import arrow_backend
+    with tempfile.TemporaryDirectory() as directory:
+        data = arrow_backend.read_evaluation_table(
+            _write_table(table, directory))
+    return arrow_backend.to_pandas(arrow_backend.get_weighted_models(
+        data, parameters_with_weights, evaluation_parameters,
+        table.index.name))
+
+
+def _get_arrow_batches_path(table, parameters_with_weights,
+                            evaluation_parameters):
+    from tools import arrow_backend
+    with tempfile.TemporaryDirectory() as directory:
+        # small blocks, so the table is streamed in several string batches
+        result = arrow_backend.evaluate_batches(
+            arrow_backend.iter_evaluation_batches(
+                _write_table(table, directory), block_size=1 << 14),
+            parameters_with_weights, evaluation_parameters, table.index.name)
+    return arrow_backend.to_pandas(result)
+
+
+# optimized paths with the tolerance of their deviation from the reference,
+# paths with tolerance zero have to be bit-identical. A path returns the
+# ratings of the fields or, if it changes the case, a tuple of its result and
+# the reference of the changed case
+OPTIMIZED_PATHS = {
+    'scoring': (_get_scoring_path, 0.),
+    'contributions': (_get_contributions_path, 1e-12),
+    'hierarchy': (_get_hierarchy_path, 1e-12),
+    'session': (_get_session_path, 1e-12),
+    'counterfactual': (_get_counterfactual_path, 1e-12),
+    'sweep': (_get_sweep_path, 1e-12),
+    'shared sweep': (_get_shared_sweep_path, 1e-12),
+    'snapshots': (_get_snapshots_path, 0.),
+    'influence': (_get_influence_path, 1e-12),
+    'arrow': (_get_arrow_path, 0.),
+    'arrow batches': (_get_arrow_batches_path, 0.),
+}
+ARROW_PATHS = ['arrow', 'arrow batches']
+
+
+def get_numeric_columns(table):
+    """
+    Returns columns of the survey table that only contain numbers, i.e. the
+    tick boxes.
+
+    :param table: pandas.DataFrame with survey information
+    :return: list of str
+    """
+    return [column for column in table.columns
+            if pd.api.types.is_numeric_dtype(table[column])]
+
+
+def get_random_table(schema, number_of_models, rng, other_values=0.05):
+    """
+    Returns random survey table with the columns of schema. Every tick box is
+    ticked with its own random probability, a few answers get other numbers
+    than zero and one (which do not count as ticked), text columns are
+    copied from randomly chosen models.
+
+    :param schema: pandas.DataFrame, survey table whose columns are used
+    :param number_of_models: int
+    :param rng: numpy.random.Generator
+    :param other_values: float, share of answers with other numbers
+    :return: pandas.DataFrame
+    """
+    numeric = get_numeric_columns(schema)
+    probabilities = rng.uniform(0.05, 0.95, len(numeric))
+    values = (rng.random((number_of_models, len(numeric))) <
+              probabilities).astype(float)
+    others = rng.random(values.shape) < other_values
+    values[others] = rng.choice([2., 0.5, -1.], others.sum())
+    table = pd.DataFrame(
+        values, columns=numeric,
+        index=pd.Index(['model {}'.format(pos) for pos in
+                        range(number_of_models)], name=schema.index.name))
+    text = [column for column in schema.columns if column not in numeric]
+    rows = rng.integers(len(schema), size=number_of_models)
+    for column in text:
+        table[column] = schema[column].to_numpy()[rows]
+    return table[list(schema.columns)]
+
+
+def get_random_evaluation_parameters(columns, number_of_parameters, rng):
+    """
+    Returns random evaluation parameters: dicts of 1 to 4 columns with
+    random ratings (first ticked column counts), lists of 1 to 8 columns
+    and the rules of scoring.RATING_RULES.
+
+    :param columns: list of str, tick-box columns
+    :param number_of_parameters: int
+    :param rng: numpy.random.Generator
+    :return: dict
+    """
+    rules = list(scoring.RATING_RULES)
+    evaluation_parameters = {}
+    for pos in range(number_of_parameters):
+        kind = rng.choice(['dict', 'dict', 'list', 'rule'])
+        if kind == 'dict':
+            keys = rng.choice(columns, rng.integers(1, 5), replace=False)
+            evaluation = {str(key): float(value) for key, value in
+                          zip(keys, rng.choice([1., 0.5, 2 / 3, 1 / 3, 0.],
+                                               len(keys)))}
+        elif kind == 'list':
+            evaluation = [str(key) for key in rng.choice(
+                columns, rng.integers(1, 9), replace=False)]
+        else:
+            evaluation = str(rng.choice(rules))
+        evaluation_parameters['parameter {}'.format(pos)] = evaluation
+    return evaluation_parameters
+
+
+def get_random_weights(parameters, rng, max_fields=4, max_parameters=6):
+    """
+    Returns random parameters_with_weights, see
+    tools.get_weighted_models_from_evaluation_dicts.
+
+    :param parameters: list of str, keys of the evaluation parameters
+    :param rng: numpy.random.Generator
+    :param max_fields: int
+    :param max_parameters: int, maximum number of parameters per field
+    :return: dict
+    """
+    parameters_with_weights = {}
+    for field in range(rng.integers(1, max_fields + 1)):
+        chosen = rng.choice(parameters, min(len(parameters), rng.integers(
+            1, max_parameters + 1)), replace=False)
+        parameters_with_weights['field {}'.format(field)] = {
+            str(parameter): float(rng.choice([1, 2, 3, 0.5, 1.5]))
+            for parameter in chosen}
+    return parameters_with_weights
+
+
+def get_random_case(schema, case_seed, number_of_models=30,
+                    number_of_parameters=12):
+    """
+    Returns random case of run_equivalence, e.g. to reproduce a failed case.
+
+    :param schema: pandas.DataFrame, survey table defining the columns
+    :param case_seed: int, seed of the case
+    :param number_of_models: int
+    :param number_of_parameters: int
+    :return: tuple (pandas.DataFrame, dict, dict)
+        Table, parameters_with_weights and evaluation_parameters
+    """
+    rng = np.random.default_rng(case_seed)
+    table = get_random_table(schema, number_of_models, rng)
+    evaluation_parameters = get_random_evaluation_parameters(
+        get_numeric_columns(schema), number_of_parameters, rng)
+    return table, get_random_weights(list(evaluation_parameters), rng), \
+        evaluation_parameters
+
+
+def compare_paths(table, parameters_with_weights, evaluation_parameters,
+                  paths=None):
+    """
+    Evaluates one case with the reference and the optimized paths.
+
+    :param table: pandas.DataFrame with survey information
+    :param parameters_with_weights: dict
+    :param evaluation_parameters: dict
+    :param paths: dict (optional), defaults to OPTIMIZED_PATHS
+    :return: dict, keys are the paths and 'reference', values dicts with
+        the runtime ('time') and for the paths the maximum absolute
+        deviation from the reference ('deviation'), the runtime of paths
+        changing the case includes the reference of the changed case
+    """
+    if paths is None:
+        paths = OPTIMIZED_PATHS
+    # the reference prints notes on unspecified answers
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        reference = _get_reference(table, parameters_with_weights,
+                                   evaluation_parameters)
+        results = {'reference': {'time': time.perf_counter() - start}}
+        for name, (path, _) in paths.items():
+            start = time.perf_counter()
+            result = path(table, parameters_with_weights,
+                          evaluation_parameters)
+            elapsed = time.perf_counter() - start
+            expected = reference
+            if isinstance(result, tuple):
+                result, expected = result
+            result = result.reindex(index=expected.index,
+                                    columns=expected.columns).to_numpy(
+                dtype=float)
+            expected = expected.to_numpy(dtype=float)
+            # missing in both (e.g. no rating left) is no deviation
+            deviation = np.where(np.isnan(result) & np.isnan(expected), 0.,
+                                 np.abs(result - expected))
+            results[name] = {'time': elapsed,
+                             'deviation': float(np.nan_to_num(
+                                 deviation, nan=np.inf).max(initial=0.))}
+    return results
+
+
+def run_equivalence(schema, iterations=50, number_of_models=30,
+                    number_of_parameters=12, seed=None, paths=None):
+    """
+    Compares the optimized paths with the reference on random cases.
+
+    :param schema: pandas.DataFrame, survey table defining the columns, e.g.
+        data/Evaluation_Table.csv
+    :param iterations: int, number of random cases
+    :param number_of_models: int, models per random table
+    :param number_of_parameters: int, random evaluation parameters per case
+    :param seed: int (optional), seed of the random cases
+    :param paths: dict (optional), defaults to OPTIMIZED_PATHS
+    :return: tuple (pandas.DataFrame, list)
+        Report with one row per path: number of failed cases, maximum
+        deviation, total runtime of reference and path and the speedup, and
+        the seeds of the failed cases, see get_random_case
+    """
+    if paths is None:
+        paths = OPTIMIZED_PATHS
+    seeds = np.random.SeedSequence(seed).generate_state(iterations)
+    report = {name: {'failed': 0, 'max deviation': 0., 'reference time': 0.,
+                     'time': 0.} for name in paths}
+    failed_seeds = []
+    for case_seed in seeds:
+        table, parameters_with_weights, evaluation_parameters = \
+            get_random_case(schema, int(case_seed), number_of_models,
+                            number_of_parameters)
+        results = compare_paths(table, parameters_with_weights,
+                                evaluation_parameters, paths)
+        case_failed = False
+        for name, (_, tolerance) in paths.items():
+            entry = report[name]
+            entry['reference time'] += results['reference']['time']
+            entry['time'] += results[name]['time']
+            entry['max deviation'] = max(entry['max deviation'],
+                                         results[name]['deviation'])
+            if results[name]['deviation'] > tolerance:
+                entry['failed'] += 1
+                case_failed = True
+        if case_failed:
+            failed_seeds.append(int(case_seed))
+    report = pd.DataFrame.from_dict(report, orient='index')
+    report['speedup'] = report['reference time'] / report['time']
+    return report, failed_seeds
+
+
+def main():
+    root = Path(__file__).parents[1]
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--table',
+                        default=str(root / 'data' / 'Evaluation_Table.csv'))
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--models', type=int, default=30)
+    parser.add_argument('--parameters', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    paths = dict(OPTIMIZED_PATHS)
+    try:
+        import pyarrow
+    except ImportError:
+        print('pyarrow is not installed, the Arrow backend is skipped.')
+        for name in ARROW_PATHS:
+            del paths[name]
+    report, failed_seeds = run_equivalence(
+        load_evaluation_table(args.table), args.iterations, args.models,
+        args.parameters, args.seed, paths)
+    with pd.option_context('display.width', 120):
+        print(report)
+    if failed_seeds:
+        print('Failed cases (seeds): {}'.format(failed_seeds))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from tools.cache import get_fingerprint
+
+MANIFEST_NAME = 'manifest.json'
+FILE_FORMATS = {'arrow': 'part-0.arrow', 'parquet': 'part-0.parquet'}
+
+
+def _check_pyarrow():
+    if pa is None:
+        raise ImportError('pyarrow is needed for the export of results. '
+                          'Please install it, e.g. via pip install pyarrow.')
+
+
+def get_tidy_results(result):
+    """
+    Converts result of the evaluation into long format with one row per model
+    and evaluated field.
+
+    :param result: pandas.DataFrame, index should be the model names and
+        columns the evaluated fields (e.g. weighted_models_supply_df or
+        models_pos_df), or pandas.Series with the model names as index (e.g.
+        rating_supply)
+    :return: pandas.DataFrame
+        Columns are 'model', 'field', 'value' and 'rank', where rank is the
+        position of the model within the field, highest value is ranked first
+    """
+    if isinstance(result, pd.Series):
+        result = result.to_frame(
+            'rating' if result.name is None else result.name)
+    ranks = result.rank(ascending=False, method='min')
+    tidy = pd.DataFrame({
+        'model': result.index.repeat(result.shape[1]).astype(str),
+        'field': [str(field) for field in result.columns] * len(result),
+        'value': result.to_numpy(dtype=float).ravel(),
+        'rank': ranks.to_numpy().ravel()})
+    tidy['rank'] = tidy['rank'].astype('Int32')
+    return tidy
+
+
+def read_manifest(directory):
+    """
+    Reads manifest of exported results.
+
+    :param directory: str or pathlib.Path, directory of the dataset
+    :return: dict, empty if no results were exported yet
+    """
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        return {'partitions': {}}
+    with open(path) as file:
+        return json.load(file)
+
+
+def export_results(results, directory, inputs=None, file_format='arrow'):
+    """
+    Writes results of an evaluation run into one partitioned columnar dataset
+    with one partition per result, e.g. directory/result=rating_supply/. A
+    manifest with the schema, the number of rows and the fingerprint of every
+    partition is written to directory/manifest.json.
+
+    Partitions are only rewritten if their fingerprint has changed. If the
+    inputs of a result are given, they are used for the fingerprint and
+    results can be inserted as callables, which are not called at all if the
+    partition is up to date.
+
+    Arrow IPC files are written uncompressed, they can therefore be memory
+    mapped without copying, see read_results.
+
+    :param results: dict, keys are the names of the results, values are
+        pandas.DataFrame or pandas.Series (see get_tidy_results) or callables
+        without arguments returning them
+    :param directory: str or pathlib.Path, directory of the dataset
+    :param inputs: dict (optional), keys are the names of the results, values
+        are the inputs and criteria of the result, e.g.
+        (table, parameters_with_weights, evaluation_parameters), defaults to
+        the results themselves
+    :param file_format: str, 'arrow' (default) or 'parquet'
+    :return: dict, manifest of the dataset
+    """
+    _check_pyarrow()
+    if file_format not in FILE_FORMATS:
+        raise ValueError('File format {} is not supported, choose one of '
+                         '{}.'.format(file_format, list(FILE_FORMATS)))
+    if inputs is None:
+        inputs = {}
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    partitions = manifest['partitions']
+    for name, result in results.items():
+        if '/' in name or '=' in name:
+            raise ValueError('Result names must not contain "/" or "=", '
+                             'got {}.'.format(name))
+        if name in inputs:
+            fingerprint = get_fingerprint(inputs[name], file_format)
+        elif callable(result):
+            raise ValueError('Inputs have to be given for result {}, as it '
+                             'is inserted as callable.'.format(name))
+        else:
+            fingerprint = get_fingerprint(result, file_format)
+        path = Path('result={}'.format(name)) / FILE_FORMATS[file_format]
+        if name in partitions and \
+                partitions[name]['fingerprint'] == fingerprint and \
+                (directory / path).exists():
+            continue
+        if callable(result):
+            result = result()
+        table = pa.Table.from_pandas(get_tidy_results(result),
+                                     preserve_index=False)
+        (directory / path).parent.mkdir(parents=True, exist_ok=True)
+        if file_format == 'arrow':
+            with pa.OSFile(str(directory / path), 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            pq.write_table(table, directory / path)
+        partitions[name] = {
+            'path': path.as_posix(), 'format': file_format,
+            'fingerprint': fingerprint, 'rows': table.num_rows,
+            'schema': {field.name: str(field.type)
+                       for field in table.schema}}
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / MANIFEST_NAME, 'w') as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def read_results(directory, names=None, memory_map=True):
+    """
+    Reads exported results into one pyarrow.Table with additional column
+    'result'. Arrow IPC partitions are memory mapped, i.e. the data is not
+    copied into memory.
+
+    :param directory: str or pathlib.Path, directory of the dataset
+    :param names: list of str (optional), names of the results to be read,
+        defaults to all results in the manifest
+    :param memory_map: bool, defaults to True
+    :return: pyarrow.Table
+    """
+    _check_pyarrow()
+    directory = Path(directory)
+    partitions = read_manifest(directory)['partitions']
+    if names is None:
+        names = list(partitions)
+    tables = []
+    for name in names:
+        partition = partitions[name]
+        path = str(directory / partition['path'])
+        if partition['format'] == 'arrow':
+            source = pa.memory_map(path) if memory_map else pa.OSFile(path)
+            table = pa.ipc.open_file(source).read_all()
+        else:
+            table = pq.read_table(path, memory_map=memory_map)
+        tables.append(table.append_column(
+            'result', pa.array([name] * table.num_rows, pa.string())))
+    return pa.concat_tables(tables)
@@ -0,0 +1,162 @@
+"""
+Ratings of groups of models, e.g. by modeling language, spatial scope or
+temporal resolution.
+
+Models can belong to several groups (a model written in GAMS and Python or
+covering several spatial scopes). The memberships are encoded once as pairs
+of row positions and group codes, all statistics of all groups and ratings
+are then computed in one segmented reduction over these pairs.
+"""
+import numpy as np
+import pandas as pd
+
+from tools import hierarchy, scoring
+from tools.session import HOLISTIC
+from tools.tools import default_evaluation_parameters
+
+
+def get_group_codes(table, groups, separator=','):
+    """
+    Returns the memberships of the models in groups.
+
+    :param table: pandas.DataFrame with survey information
+    :param groups: str or list of str
+        Name of a text column listing the groups of a model separated by
+        separator, e.g. 'Modeling language' with entries like 'GAMS, Python',
+        or tick-box columns, every ticked column is a group, e.g.
+        ['local (NUTS3)/used', 'regional (NUTS1-2)/used', 'national/used',
+        'international/used']
+    :param separator: str, separator of the groups in a text column
+    :return: tuple (numpy.ndarray, numpy.ndarray, list)
+        Row position and group code of every membership and the names of the
+        groups, models without group are left out
+    """
+    if isinstance(groups, str):
+        memberships = [
+            [name.strip() for name in str(entry).split(separator)
+             if name.strip()] if isinstance(entry, str) else []
+            for entry in table[groups]]
+        names = sorted({name for names in memberships for name in names})
+        codes = {name: code for code, name in enumerate(names)}
+        pairs = [(row, codes[name]) for row, names in enumerate(memberships)
+                 for name in dict.fromkeys(names)]
+        rows, group_codes = (np.array(values, dtype=int) for values in
+                             zip(*pairs)) if pairs else \
+            (np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+        return rows, group_codes, names
+    rows, group_codes = np.nonzero((table[list(groups)] == 1).to_numpy())
+    return rows, group_codes, list(groups)
+
+
+def _get_statistic_name(quantile):
+    return 'q{:g}'.format(quantile * 100)
+
+
+def get_grouped_statistics(values, rows, codes, names,
+                           quantiles=(0.25, 0.5, 0.75), share_threshold=0.):
+    """
+    Returns number of models, mean, quantiles and share of every variable in
+    every group.
+
+    Counts, means and shares are one product of the membership matrix with the
+    values. For the quantiles, the values of all memberships are sorted within
+    their groups for all variables at once and interpolated linearly like
+    numpy.quantile. Missing values (NaN) are left out of all statistics like
+    in pandas.DataFrame.groupby, i.e. 'count' is the number of models with a
+    value and the quantiles are those of numpy.nanquantile.
+
+    :param values: pandas.DataFrame, index are the models, columns the
+        variables, e.g. ratings and parameter scores
+    :param rows: numpy.ndarray, see get_group_codes
+    :param codes: numpy.ndarray, see get_group_codes
+    :param names: list, see get_group_codes
+    :param quantiles: list of float, defaults to the quartiles
+    :param share_threshold: float, the share counts the values above this
+        threshold, defaults to 0 (share of models with a positive rating)
+    :return: pandas.DataFrame
+        Long table with the columns group, variable, statistic and value, the
+        statistics are 'count', 'mean', 'share' and e.g. 'q25' for the
+        quantiles
+    """
+    data = values.to_numpy(dtype=float)
+    valid = ~np.isnan(data)
+    membership = np.zeros((len(names), len(values)))
+    np.add.at(membership, (codes, rows), 1.)
+    counts = membership @ valid
+    with np.errstate(divide='ignore', invalid='ignore'):
+        statistics = {
+            'count': counts,
+            'mean': membership @ np.where(valid, data, 0.) / counts,
+            'share': membership @ (valid & (data > share_threshold)) /
+            counts}
+
+    # sort the memberships by group and the values within the groups, the
+    # missing values are sorted behind the values of their group
+    expanded = data[rows]
+    ranks = np.argsort(np.argsort(expanded, axis=0, kind='stable'), axis=0)
+    order = np.argsort(codes[:, np.newaxis] * len(rows) + ranks, axis=0)
+    ordered = np.take_along_axis(expanded, order, axis=0)
+    sizes = counts.astype(int)
+    starts = np.concatenate([[0], np.cumsum(membership.sum(axis=1))[:-1]]
+                            ).astype(int)[:, np.newaxis]
+    # groups without values (e.g. unticked columns) have no quantiles
+    filled = sizes > 0
+    for quantile in quantiles:
+        positions = starts + quantile * np.maximum(sizes - 1, 0)
+        lower = np.floor(positions).astype(int)
+        upper = np.minimum(lower + 1, starts + np.maximum(sizes, 1) - 1)
+        fraction = positions - lower
+        if len(ordered):
+            lower_values = np.take_along_axis(
+                ordered, np.minimum(lower, len(ordered) - 1), axis=0)
+            upper_values = np.take_along_axis(
+                ordered, np.minimum(upper, len(ordered) - 1), axis=0)
+        else:
+            lower_values = upper_values = np.zeros_like(fraction)
+        statistics[_get_statistic_name(quantile)] = np.where(
+            filled, lower_values * (1 - fraction) + upper_values * fraction,
+            np.nan)
+
+    return pd.concat([
+        pd.DataFrame({'group': np.repeat(names, data.shape[1]),
+                      'variable': np.tile(values.columns, len(names)),
+                      'statistic': statistic,
+                      'value': statistic_values.ravel()})
+        for statistic, statistic_values in statistics.items()],
+        ignore_index=True)
+
+
+def evaluate_groups(table, groups, tree=None, evaluation_parameters=None,
+                    quantiles=(0.25, 0.5, 0.75), share_threshold=0.,
+                    separator=','):
+    """
+    Returns statistics of the section ratings, the holistic rating and the
+    parameter ratings for every group, see get_group_codes and
+    get_grouped_statistics.
+
+    :param table: pandas.DataFrame with survey information
+    :param groups: str or list of str, see get_group_codes
+    :param tree: dict (optional), see hierarchy.get_weight_tree, defaults to
+        the hierarchy of Evaluation.py
+    :param evaluation_parameters: dict (optional), defaults to
+        tools.default_evaluation_parameters
+    :param quantiles: list of float, see get_grouped_statistics
+    :param share_threshold: float, see get_grouped_statistics
+    :param separator: str, see get_group_codes
+    :return: pandas.DataFrame, see get_grouped_statistics, can be plotted
+        with plots.plot_grouped_statistics
+    """
+    if tree is None:
+        tree = hierarchy.get_weight_tree()
+    if evaluation_parameters is None:
+        evaluation_parameters = default_evaluation_parameters()
+    parameter_scores = scoring.get_parameter_scores(
+        table, evaluation_parameters, hierarchy.get_tree_parameters(tree))
+    ratings = hierarchy.evaluate_weight_tree(
+        tree=tree, parameter_scores=parameter_scores)
+    values = hierarchy.get_children_ratings(ratings)
+    values[HOLISTIC] = hierarchy.get_node_rating(ratings).to_numpy()
+    values = pd.concat([values, parameter_scores], axis=1)
+    rows, codes, names = get_group_codes(table, groups, separator)
+    return get_grouped_statistics(values, rows, codes, names, quantiles,
+                                  share_threshold)
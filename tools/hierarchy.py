@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+from tools import scoring
+from tools.tools import default_evaluation_parameters, \
+    default_section_weights
+
+
+def get_weight_tree(section_weights=None):
+    """
+    Returns the aggregation hierarchy of Evaluation.py as one weight tree:
+    the holistic rating is the mean of the section ratings, a section rating
+    the mean of the fields of its 'overall' weights and a field the weighted
+    mean of its parameters. The detailed evaluations 'tech' and 'char' of a
+    section are added as subtrees with weight zero, i.e. they are evaluated
+    but do not change the section rating.
+
+    A weight tree is a dict, keys are the names of the children of a node,
+    values are either
+
+    * int or float: weight of a parameter (leaf of the tree)
+    * dict: subtree with weight one
+    * tuple (weight, dict): subtree with weight
+
+    :param section_weights: dict (optional), defaults to
+        tools.default_section_weights
+    :return: dict
+    """
+    if section_weights is None:
+        section_weights = default_section_weights()
+    tree = {}
+    for section, weights in section_weights.items():
+        tree[section] = dict(weights['overall'])
+        for detail in ['tech', 'char']:
+            if detail in weights:
+                tree[section][detail] = (0, weights[detail])
+    return tree
+
+
+def _split_child(child):
+    if isinstance(child, tuple):
+        return child
+    elif isinstance(child, dict):
+        return 1, child
+    return child, None
+
+
+def get_tree_parameters(tree):
+    """
+    Returns all parameters (leaves) of a weight tree in order of first
+    appearance.
+
+    :param tree: dict, see get_weight_tree
+    :return: list of str
+    """
+    parameters = {}
+    for name, child in tree.items():
+        _, subtree = _split_child(child)
+        if subtree is None:
+            parameters[name] = None
+        else:
+            parameters.update(dict.fromkeys(get_tree_parameters(subtree)))
+    return list(parameters)
+
+
+def compile_weight_tree(tree):
+    """
+    Compiles weight tree into one aggregation matrix. Every node is a
+    weighted mean of its children and therefore a linear combination of the
+    parameters, the row of a node contains the products of the normalized
+    weights along the paths to the parameters.
+
+    :param tree: dict, see get_weight_tree
+    :return: pandas.DataFrame
+        Index are the paths of all nodes as tuples, the root is the empty
+        tuple (), columns are the parameters
+    """
+    parameters = get_tree_parameters(tree)
+    positions = {parameter: pos for pos, parameter in enumerate(parameters)}
+    paths = []
+    rows = []
+
+    def add_node(node, path):
+        children = [(name,) + _split_child(child)
+                    for name, child in node.items()]
+        sum_weighting = sum(weight for _, weight, _ in children)
+        if sum_weighting == 0:
+            raise ValueError('Weights of the children of node {} sum up to '
+                             'zero.'.format(path))
+        row = np.zeros(len(parameters))
+        for name, weight, subtree in children:
+            if subtree is None:
+                row[positions[name]] += weight / sum_weighting
+            else:
+                row += add_node(subtree, path + (name,)) * weight / \
+                    sum_weighting
+        paths.append(path)
+        rows.append(row)
+        return row
+
+    add_node(tree, ())
+    # parents before children
+    order = np.argsort([len(path) for path in paths], kind='stable')
+    return pd.DataFrame(np.array(rows)[order] if rows else
+                        np.zeros((0, len(parameters))),
+                        index=pd.Index([paths[pos] for pos in order],
+                                       tupleize_cols=False),
+                        columns=parameters)
+
+
+def evaluate_weight_tree(table=None, tree=None, evaluation_parameters=None,
+                         aggregation=None, parameter_scores=None):
+    """
+    Rates all nodes of a weight tree for all models with one matrix product
+    of the parameter ratings and the aggregation matrix. Results equal the
+    separate evaluations of Evaluation.py up to floating point rounding.
+
+    :param table: pandas.DataFrame with survey information or AnswerBlock,
+        not needed if parameter_scores are given
+    :param tree: dict (optional), see get_weight_tree, defaults to the
+        hierarchy of Evaluation.py
+    :param evaluation_parameters: dict (optional), defaults to
+        tools.default_evaluation_parameters
+    :param aggregation: pandas.DataFrame (optional), compiled tree, see
+        compile_weight_tree, used instead of tree
+    :param parameter_scores: pandas.DataFrame (optional), already evaluated
+        ratings of the parameters (see scoring.get_parameter_scores) used
+        instead of table, has to include all parameters of the tree
+    :return: pandas.DataFrame
+        Index are the models, columns are the paths of the nodes, see
+        get_children_ratings and get_node_rating
+    """
+    if aggregation is None:
+        aggregation = compile_weight_tree(
+            get_weight_tree() if tree is None else tree)
+    if evaluation_parameters is None:
+        evaluation_parameters = default_evaluation_parameters()
+    parameters = list(aggregation.columns)
+    if parameter_scores is not None:
+        parameter_scores = parameter_scores[parameters]
+    elif table is not None:
+        parameter_scores = scoring.get_parameter_scores(
+            table, evaluation_parameters, parameters)
+    else:
+        raise ValueError('Either table or parameter_scores has to be given.')
+    return pd.DataFrame(
+        parameter_scores.to_numpy() @ aggregation.to_numpy().T,
+        index=parameter_scores.index, columns=aggregation.index)
+
+
+def get_node_rating(ratings, path=()):
+    """
+    Returns rating of one node of the tree, e.g. ('Supply',) for
+    rating_supply of Evaluation.py or () for the holistic rating.
+
+    :param ratings: pandas.DataFrame, see evaluate_weight_tree
+    :param path: tuple, path of the node, defaults to the root
+    :return: pandas.Series
+    """
+    return ratings[path]
+
+
+def get_children_ratings(ratings, path=()):
+    """
+    Returns ratings of the children of one node of the tree, e.g. ('Supply',)
+    for weighted_models_supply_df, ('Supply', 'tech') for
+    weighted_models_supply_tech_df or () for weighted_models_holistic_df of
+    Evaluation.py.
+
+    :param ratings: pandas.DataFrame, see evaluate_weight_tree
+    :param path: tuple, path of the node, defaults to the root
+    :return: pandas.DataFrame, columns are the names of the children, only
+        children that are nodes (not parameters) are included
+    """
+    children = [column for column in ratings.columns
+                if len(column) == len(path) + 1 and column[:len(path)] == path]
+    return pd.DataFrame(ratings[children].to_numpy(), index=ratings.index,
+                        columns=[column[-1] for column in children])
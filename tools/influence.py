@@ -0,0 +1,160 @@
+"""
+Influence of single parameters on the section ratings and the ranking.
+
+Every variant (a parameter left out or its weight changed) changes the rating
+of a field by a multiple of the difference between the parameter rating and
+the field rating, i.e. the ratings of all models change by one vector per
+field (rank-one update of the base ratings). The variants of all parameters
+and sections are therefore computed from the field ratings at once instead of
+evaluating the weights again for every parameter.
+"""
+import numpy as np
+import pandas as pd
+
+from tools import scoring
+from tools.session import HOLISTIC
+from tools.tools import default_evaluation_parameters, \
+    default_section_weights
+
+
+def get_rating_changes(parameter_scores, parameters_with_weights,
+                       relative_change=-1.):
+    """
+    Returns the change of the rating (mean over the fields like rating_supply
+    in Evaluation.py) of every model if the weight of one parameter is changed
+    by relative_change in all fields of parameters_with_weights. If a field
+    only consists of the left out parameter, the field is left out of the
+    mean, if no field is left, the change is NaN.
+
+    :param parameter_scores: pandas.DataFrame, see
+        scoring.get_parameter_scores
+    :param parameters_with_weights: dict, see tools.default_section_weights
+    :param relative_change: float, relative change of the weight, -1 leaves
+        the parameter out (default), 0.1 increases its weight by 10 %
+    :return: tuple (pandas.Series, pandas.DataFrame)
+        Base rating and change of the rating, index are the models, columns
+        the parameters
+    """
+    field_ratings = scoring.get_weighted_models_from_parameter_scores(
+        parameter_scores, parameters_with_weights).to_numpy()
+    number_of_fields = field_ratings.shape[1]
+    base = field_ratings.mean(axis=1)
+    parameters = scoring.get_parameters(parameters_with_weights)
+    positions = {parameter: pos for pos, parameter in enumerate(parameters)}
+    scores = parameter_scores[parameters].to_numpy(dtype=float)
+
+    # one column per (field, parameter), the update vectors of the fields
+    entries = [(pos, positions[parameter], weight,
+                sum(parameter_with_weight.values()))
+               for pos, parameter_with_weight in
+               enumerate(parameters_with_weights.values())
+               for parameter, weight in parameter_with_weight.items()]
+    fields, columns, weights, sums = (np.array(values) for values in
+                                      zip(*entries))
+    differences = scores[:, columns] - field_ratings[:, fields]
+    weight_changes = relative_change * weights
+    removed = np.isclose(sums + weight_changes, 0.)
+    membership = (columns[:, np.newaxis] ==
+        np.arange(len(parameters))[np.newaxis]).astype(int)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        field_changes = np.where(
+            removed, 0., weight_changes / np.where(removed, 1., sums +
+                                                   weight_changes))
+        # change of the sum of the field ratings, a field without weights
+        # is left out of the mean and its rating is replaced by the base
+        updates = differences * field_changes
+        updates[:, removed] = base[:, np.newaxis] - field_ratings[
+            :, fields[removed]]
+        # the remaining fields of every parameter divide the change
+        remaining = number_of_fields - removed @ membership
+        changes = np.where(remaining > 0, (updates @ membership) /
+                           np.where(remaining > 0, remaining, 1), np.nan)
+    return pd.Series(base, index=parameter_scores.index), \
+        pd.DataFrame(changes, index=parameter_scores.index,
+                     columns=parameters)
+
+
+def _get_ranks(ratings):
+    return ratings.rank(axis=0, ascending=False, method='min').astype(int)
+
+
+def get_rank_displacements(table, section_weights=None,
+                           evaluation_parameters=None, relative_change=-1.,
+                           return_ratings=False):
+    """
+    Returns the change of the rank of every model if the weight of one
+    parameter is changed (see get_rating_changes) for every section and the
+    holistic rating (mean of the sections) at once. Positive displacements
+    are worse ranks.
+
+    :param table: pandas.DataFrame with survey information or AnswerBlock
+    :param section_weights: dict (optional), defaults to
+        tools.default_section_weights
+    :param evaluation_parameters: dict (optional), defaults to
+        tools.default_evaluation_parameters
+    :param relative_change: float, see get_rating_changes
+    :param return_ratings: bool, if True the ratings of all variants are
+        returned as well, defaults to False
+    :return: pandas.DataFrame or tuple of pandas.DataFrame
+        Index are the models, columns are a pandas.MultiIndex of the sections
+        and the parameters
+    """
+    if section_weights is None:
+        section_weights = default_section_weights()
+    if evaluation_parameters is None:
+        evaluation_parameters = default_evaluation_parameters()
+    weights = {section: section_weights[section]['overall']
+               for section in section_weights}
+    parameters = scoring.get_parameters(
+        {(section, field): parameter_with_weight
+         for section, parameters_with_weights in weights.items()
+         for field, parameter_with_weight in
+         parameters_with_weights.items()})
+    parameter_scores = scoring.get_parameter_scores(
+        table, evaluation_parameters, parameters)
+
+    bases = {}
+    variants = {}
+    for section, parameters_with_weights in weights.items():
+        bases[section], changes = get_rating_changes(
+            parameter_scores, parameters_with_weights, relative_change)
+        variants[section] = changes.add(bases[section], axis=0)
+    bases = pd.DataFrame(bases)
+    bases[HOLISTIC] = bases[list(weights)].mean(axis=1)
+    # a parameter changes the holistic rating in all sections using it
+    holistic = pd.DataFrame(0., index=bases.index, columns=parameters)
+    for section, section_variants in variants.items():
+        holistic[section_variants.columns] += \
+            section_variants.sub(bases[section], axis=0)
+    variants[HOLISTIC] = (holistic / len(weights)).add(bases[HOLISTIC],
+                                                       axis=0)
+    variants = pd.concat(variants, axis=1, names=['section', 'parameter'])
+
+    base_ranks = _get_ranks(bases)
+    displacements = _get_ranks(variants) - base_ranks.reindex(
+        columns=variants.columns, level='section').to_numpy()
+    if return_ratings:
+        return displacements, variants
+    return displacements
+
+
+def get_influence_report(displacements):
+    """
+    Summarizes the rank displacements of every parameter and section.
+
+    :param displacements: pandas.DataFrame, see get_rank_displacements
+    :return: pandas.DataFrame
+        Index are the sections and the parameters, columns the mean and
+        maximum absolute displacement and the number of models that change
+        their rank, sorted by the mean absolute displacement within every
+        section
+    """
+    absolute = displacements.abs()
+    report = pd.DataFrame({'mean displacement': absolute.mean(),
+                           'max displacement': absolute.max(),
+                           'changed models': (absolute > 0).sum()})
+    sections = list(dict.fromkeys(report.index.get_level_values('section')))
+    return pd.concat([
+        report.xs(section, level='section', drop_level=False).sort_values(
+            'mean displacement', ascending=False, kind='stable')
+        for section in sections])
@@ -0,0 +1,292 @@
+"""
+Weights learned from rankings of experts (learning to rank).
+
+The rating of a model for parameters_with_weights is linear in the
+normalized weights of every field: the mean over the fields of the weighted
+mean of the parameter ratings. The normalized weights of every field lie on a
+simplex, they are fitted by projected gradient descent, so that the ratings
+reproduce the orderings of the experts as well as possible. The parameter
+ratings are computed once, every iteration only needs a few matrix-vector
+products.
+"""
+import numpy as np
+import pandas as pd
+
+# scale of the rating differences in the losses, ratings are between 0 and 1
+DEFAULT_TEMPERATURE = 0.05
+
+
+def get_design_matrix(parameter_scores, parameters_with_weights):
+    """
+    Returns the ratings of the parameters of every field divided by the
+    number of fields, i.e. the rating of the models is the product of this
+    matrix and the normalized weights.
+
+    :param parameter_scores: pandas.DataFrame, see
+        scoring.get_parameter_scores
+    :param parameters_with_weights: dict, see tools.default_section_weights
+    :return: tuple (numpy.ndarray, list of tuple)
+        Matrix of shape (number of models, number of weights) and the
+        (field, parameter) of every column
+    """
+    keys = [(field, parameter)
+            for field, weights in parameters_with_weights.items()
+            for parameter in weights]
+    design = parameter_scores[[parameter for _, parameter in keys]].to_numpy(
+        dtype=float) / len(parameters_with_weights)
+    return design, keys
+
+
+def get_normalized_weights(parameters_with_weights):
+    """
+    Returns the weights of every field divided by their sum.
+
+    :param parameters_with_weights: dict, see tools.default_section_weights
+    :return: numpy.ndarray in the order of get_design_matrix
+    """
+    return np.concatenate([
+        np.array(list(weights.values()), dtype=float) /
+        sum(weights.values())
+        for weights in parameters_with_weights.values()])
+
+
+def project_onto_simplices(weights, groups):
+    """
+    Euclidean projection of every group of weights onto the probability
+    simplex (non-negative and summing up to one).
+
+    :param weights: numpy.ndarray
+    :param groups: list of slices or index arrays
+    :return: numpy.ndarray
+    """
+    projected = np.empty_like(weights)
+    for group in groups:
+        values = weights[group]
+        ordered = np.sort(values)[::-1]
+        cumulative = np.cumsum(ordered) - 1
+        positions = np.arange(1, len(values) + 1)
+        rho = np.nonzero(ordered - cumulative / positions > 0)[0][-1]
+        projected[group] = np.maximum(values - cumulative[rho] / (rho + 1),
+                                      0.)
+    return projected
+
+
+def _get_groups(parameters_with_weights):
+    groups = []
+    start = 0
+    for weights in parameters_with_weights.values():
+        groups.append(slice(start, start + len(weights)))
+        start += len(weights)
+    return groups
+
+
+def _get_positions(rankings, index):
+    positions = []
+    for ranking in rankings:
+        ranking_positions = index.get_indexer(ranking)
+        if (ranking_positions < 0).any():
+            raise KeyError('Models {} of ranking are unknown.'.format(
+                [model for model, pos in zip(ranking, ranking_positions)
+                 if pos < 0]))
+        positions.append(ranking_positions)
+    return positions
+
+
+def get_ranking_pairs(rankings, index):
+    """
+    Returns all ordered pairs of models of the rankings.
+
+    :param rankings: list of list-like, models ordered from best to worst
+    :param index: pandas.Index, models of the parameter scores
+    :return: tuple of numpy.ndarray
+        Row positions of the better and of the worse model of every pair
+    """
+    better = []
+    worse = []
+    for positions in _get_positions(rankings, index):
+        first, second = np.triu_indices(len(positions), k=1)
+        better.append(positions[first])
+        worse.append(positions[second])
+    if not better:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    return np.concatenate(better), np.concatenate(worse)
+
+
+def _get_pairwise_loss(design, pairs, temperature):
+    differences = design[pairs[0]] - design[pairs[1]]
+
+    def get_loss(weights):
+        margins = differences @ weights / temperature
+        loss = np.logaddexp(0., -margins).mean()
+        # derivative of log(1 + exp(-m)) is -1 / (1 + exp(m))
+        gradient = -differences.T @ np.exp(-np.logaddexp(0., margins)) / \
+            (temperature * len(margins))
+        return loss, gradient
+    return get_loss
+
+
+def _get_listwise_loss(design, positions, temperature):
+    def get_loss(weights):
+        ratings = design @ weights / temperature
+        loss = 0.
+        gradient = np.zeros_like(weights)
+        for ranking_positions in positions:
+            # Plackett-Luce likelihood of the ordering
+            scores = ratings[ranking_positions]
+            shifted = np.exp(scores - scores.max())
+            suffix_sums = np.cumsum(shifted[::-1])[::-1]
+            loss += (np.log(suffix_sums) + scores.max() - scores).sum()
+            score_gradient = shifted * np.cumsum(1 / suffix_sums) - 1
+            gradient += design[ranking_positions].T @ score_gradient
+        return loss / len(positions), gradient / (temperature *
+                                                  len(positions))
+    return get_loss
+
+
+def fit_weights(parameter_scores, rankings, parameters_with_weights,
+                loss='pairwise', temperature=DEFAULT_TEMPERATURE,
+                regularization=0., warm_start=None, max_iterations=500,
+                tol=1e-9):
+    """
+    Fits the weights of parameters_with_weights to rankings of experts.
+
+    The 'pairwise' loss is the mean logistic loss of all ordered pairs of
+    models, the 'listwise' loss the negative log-likelihood of the orderings
+    under the Plackett-Luce model. The regularization adds the squared
+    distance to the start weights. The normalized weights of every field are
+    kept on the simplex, the fitted weights can be used like the default
+    weights, e.g. with scoring.get_weighted_models.
+
+    :param parameter_scores: pandas.DataFrame, see
+        scoring.get_parameter_scores, computed once for repeated fits
+    :param rankings: list or dict of list-like, models ordered from best to
+        worst, rankings can contain only some of the models
+    :param parameters_with_weights: dict, see tools.default_section_weights,
+        defines fields and parameters and the start weights
+    :param loss: str, 'pairwise' (default) or 'listwise'
+    :param temperature: float, scale of the rating differences
+    :param regularization: float, weight of the squared distance to the start
+        weights, defaults to 0
+    :param warm_start: dict (optional), start weights with the structure of
+        parameters_with_weights, defaults to parameters_with_weights
+    :param max_iterations: int, maximum number of gradient steps
+    :param tol: float, the fit stops if the loss decreases less than tol
+    :return: dict, fitted parameters_with_weights, the weights of every field
+        sum up to one
+    """
+    if isinstance(rankings, dict):
+        rankings = list(rankings.values())
+    design, keys = get_design_matrix(parameter_scores,
+                                     parameters_with_weights)
+    groups = _get_groups(parameters_with_weights)
+    start = get_normalized_weights(
+        parameters_with_weights if warm_start is None else warm_start)
+    if loss == 'pairwise':
+        get_loss = _get_pairwise_loss(
+            design, get_ranking_pairs(rankings, parameter_scores.index),
+            temperature)
+    elif loss == 'listwise':
+        get_loss = _get_listwise_loss(
+            design, _get_positions(rankings, parameter_scores.index),
+            temperature)
+    else:
+        raise ValueError('Unknown loss {}, choose pairwise or '
+                         'listwise.'.format(loss))
+
+    def get_objective(weights):
+        value, gradient = get_loss(weights)
+        distance = weights - start
+        return value + regularization * distance @ distance, \
+            gradient + 2 * regularization * distance
+
+    weights = project_onto_simplices(start, groups)
+    value, gradient = get_objective(weights)
+    step = 1.
+    for _ in range(max_iterations):
+        # projected gradient step with backtracking line search
+        while True:
+            candidate = project_onto_simplices(weights - step * gradient,
+                                               groups)
+            change = candidate - weights
+            candidate_value, candidate_gradient = get_objective(candidate)
+            if candidate_value <= value + gradient @ change + \
+                    change @ change / (2 * step) or step < 1e-12:
+                break
+            step /= 2
+        decrease = value - candidate_value
+        weights, value, gradient = candidate, candidate_value, \
+            candidate_gradient
+        if decrease < tol:
+            break
+        step *= 1.5
+
+    fitted = {field: {} for field in parameters_with_weights}
+    for (field, parameter), weight in zip(keys, weights):
+        fitted[field][parameter] = float(weight)
+    return fitted
+
+
+def get_ratings(parameter_scores, parameters_with_weights):
+    """
+    Returns the rating of every model, i.e. the mean of the weighted models
+    over the fields (e.g. rating_supply in Evaluation.py).
+
+    :param parameter_scores: pandas.DataFrame, see
+        scoring.get_parameter_scores
+    :param parameters_with_weights: dict, see tools.default_section_weights
+    :return: pandas.Series
+    """
+    design, _ = get_design_matrix(parameter_scores, parameters_with_weights)
+    return pd.Series(design @ get_normalized_weights(parameters_with_weights),
+                     index=parameter_scores.index)
+
+
+def get_pairwise_accuracy(ratings, ranking):
+    """
+    Returns share of the ordered pairs of a ranking that are reproduced by
+    the ratings, ties count as half.
+
+    :param ratings: pandas.Series, ratings of the models
+    :param ranking: list-like, models ordered from best to worst
+    :return: float
+    """
+    better, worse = get_ranking_pairs([ranking], ratings.index)
+    if len(better) == 0:
+        return np.nan
+    values = ratings.to_numpy()
+    return float(np.mean((values[better] > values[worse]) +
+                         0.5 * (values[better] == values[worse])))
+
+
+def cross_validate(parameter_scores, rankings, parameters_with_weights,
+                   **kwargs):
+    """
+    Leave-one-expert-out cross-validation: the weights are fitted to the
+    rankings of all other experts and evaluated on the ranking of the left
+    out expert.
+
+    :param parameter_scores: pandas.DataFrame, see
+        scoring.get_parameter_scores
+    :param rankings: dict, keys are the experts, values their rankings, see
+        fit_weights
+    :param parameters_with_weights: dict, start weights, see fit_weights
+    :param kwargs: further arguments of fit_weights
+    :return: pandas.DataFrame
+        Index are the experts, columns the pairwise accuracy of the start
+        weights ('start') and of the fitted weights ('fitted')
+    """
+    if len(rankings) < 2:
+        raise ValueError('Cross-validation needs rankings of at least two '
+                         'experts.')
+    start_ratings = get_ratings(parameter_scores, parameters_with_weights)
+    accuracies = {}
+    for expert, ranking in rankings.items():
+        fitted = fit_weights(
+            parameter_scores,
+            [other for name, other in rankings.items() if name != expert],
+            parameters_with_weights, **kwargs)
+        accuracies[expert] = {
+            'start': get_pairwise_accuracy(start_ratings, ranking),
+            'fitted': get_pairwise_accuracy(
+                get_ratings(parameter_scores, fitted), ranking)}
+    return pd.DataFrame.from_dict(accuracies, orient='index')
@@ -0,0 +1,249 @@
+"""
+Process-pool sweeps over many weighting profiles with one shared copy of the
+data.
+
+The answer block, the rating of every parameter and the results are placed in
+shared memory (multiprocessing.shared_memory) or in memory-mapped files. The
+workers attach to them without copying, only the names of the blocks and the
+profiles are sent to the workers and the results are written directly into a
+preallocated output array.
+"""
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from tools import scoring
+from tools.hierarchy import compile_weight_tree, get_tree_parameters
+from tools.tools import default_evaluation_parameters
+
+BACKENDS = ['shared_memory', 'memmap']
+
+# arrays attached by a worker of the process pool
+_SHARED = {}
+
+
+class SharedArray:
+    """
+    numpy array in shared memory or in a memory-mapped file, which can be
+    attached by other processes with its spec.
+
+    :param shape: tuple of int
+    :param dtype: numpy.dtype or str
+    :param backend: str, 'shared_memory' (default) or 'memmap'
+    :param directory: str (optional), directory of the memory-mapped file,
+        defaults to the temporary directory
+    :param spec: tuple (optional), spec of an existing array, see attach
+    """
+    def __init__(self, shape, dtype, backend='shared_memory', directory=None,
+                 spec=None):
+        if backend not in BACKENDS:
+            raise ValueError('Unknown backend {}, choose one of {}.'.format(
+                backend, BACKENDS))
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        self._memory = None
+        if backend == 'shared_memory':
+            if spec is None:
+                self._memory = shared_memory.SharedMemory(create=True,
+                                                          size=size)
+            else:
+                self._memory = shared_memory.SharedMemory(name=spec[1])
+            name = self._memory.name
+            self.array = np.ndarray(shape, dtype, buffer=self._memory.buf)
+        else:
+            if spec is None:
+                file, name = tempfile.mkstemp(suffix='.dat', dir=directory)
+                os.close(file)
+                mode = 'w+'
+            else:
+                name = spec[1]
+                mode = 'r+'
+            self.array = np.memmap(name, dtype, mode, shape=shape) if \
+                np.prod(shape) > 0 else np.empty(shape, dtype)
+        self.spec = (backend, name, shape, dtype.str)
+
+    @classmethod
+    def from_array(cls, array, backend='shared_memory', directory=None):
+        """
+        Creates shared array with a copy of array.
+
+        :param array: numpy.ndarray
+        :param backend: str, see SharedArray
+        :param directory: str (optional), see SharedArray
+        :return: SharedArray
+        """
+        shared = cls(array.shape, array.dtype, backend, directory)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        Attaches to a shared array of another process without copying.
+
+        :param spec: tuple, attribute spec of the shared array
+        :return: SharedArray
+        """
+        backend, _, shape, dtype = spec
+        return cls(shape, dtype, backend, spec=spec)
+
+    def close(self):
+        """
+        Releases the array of this process, the data stays available for
+        other processes.
+        """
+        self.array = None
+        if self._memory is not None:
+            self._memory.close()
+
+    def unlink(self):
+        """
+        Releases the array and frees the data, has to be called once by the
+        creating process.
+        """
+        self.close()
+        if self.spec[0] == 'shared_memory':
+            self._memory.unlink()
+        elif os.path.exists(self.spec[1]):
+            os.remove(self.spec[1])
+
+
+def _set_shared(arrays, evaluation_parameters, parameters, columns):
+    _SHARED['arrays'] = arrays
+    _SHARED['evaluation_parameters'] = evaluation_parameters
+    _SHARED['parameters'] = parameters
+    _SHARED['columns'] = columns
+
+
+def _init_worker(specs, evaluation_parameters, parameters, columns):
+    # the handles keep the attached memory alive as long as the worker runs
+    _SHARED['handles'] = {key: SharedArray.attach(spec)
+                          for key, spec in specs.items()}
+    _set_shared({key: handle.array for key, handle in
+                 _SHARED['handles'].items()},
+                evaluation_parameters, parameters, columns)
+
+
+def _get_array(key):
+    return _SHARED['arrays'][key]
+
+
+def _rate_parameters(start, stop):
+    answers = scoring.AnswerBlock(_get_array('answers'),
+                                  range(len(_get_array('answers'))),
+                                  _SHARED['columns'])
+    parameters = _SHARED['parameters'][start:stop]
+    _get_array('parameter_scores')[:, start:stop] = \
+        scoring.get_parameter_score_matrix(
+            answers, _SHARED['evaluation_parameters'], parameters)
+
+
+def _rate_profiles(start, profiles):
+    positions = {parameter: pos for pos, parameter in
+                 enumerate(_SHARED['parameters'])}
+    coefficients = np.zeros((len(profiles), len(positions)))
+    for row, profile in enumerate(profiles):
+        # the root is the first row of the aggregation matrix
+        root = compile_weight_tree(profile).iloc[0]
+        coefficients[row, [positions[parameter] for parameter in
+                           root.index]] = root.to_numpy()
+    _get_array('ratings')[start:start + len(profiles)] = \
+        coefficients @ _get_array('parameter_scores').T
+
+
+def sweep_weights(table, profiles, evaluation_parameters=None,
+                  processes=None, backend='shared_memory', directory=None,
+                  chunk_size=None):
+    """
+    Rates all models for many weighting profiles, e.g. to analyse the
+    sensitivity of the ranking to the weights. Every profile is a weight tree
+    (see hierarchy.get_weight_tree), e.g. parameters_with_weights of one
+    section, for which the mean of the fields is returned like rating_supply
+    in Evaluation.py.
+
+    The survey table is reduced to the answer block once. If processes is
+    given, the answer block, the parameter ratings and the output are shared
+    with the workers (see SharedArray): first the parameters and then the
+    profiles are distributed over the workers, which write their results
+    directly into the shared arrays.
+
+    :param table: pandas.DataFrame with survey information or AnswerBlock
+    :param profiles: dict with names and weight trees or list of weight trees
+    :param evaluation_parameters: dict (optional), defaults to
+        tools.default_evaluation_parameters
+    :param processes: int (optional), number of worker processes, if not
+        given the profiles are rated in this process
+    :param backend: str, 'shared_memory' (default) or 'memmap', see
+        SharedArray
+    :param directory: str (optional), directory of the memory-mapped files
+    :param chunk_size: int (optional), number of profiles per task, defaults
+        to four tasks per worker
+    :return: pandas.DataFrame
+        Index are the profiles, columns are the models
+    """
+    if evaluation_parameters is None:
+        evaluation_parameters = default_evaluation_parameters()
+    if isinstance(profiles, dict):
+        names, profiles = list(profiles), list(profiles.values())
+    else:
+        profiles = list(profiles)
+        names = range(len(profiles))
+    parameters = list(dict.fromkeys(
+        parameter for profile in profiles
+        for parameter in get_tree_parameters(profile)))
+    if isinstance(table, scoring.AnswerBlock):
+        answers = table
+    else:
+        answers = scoring.AnswerBlock.from_table(
+            table, scoring.get_criteria_columns(evaluation_parameters,
+                                                parameters))
+    shapes = {'parameter_scores': (len(answers), len(parameters)),
+              'ratings': (len(profiles), len(answers))}
+
+    if processes is None:
+        arrays = {key: np.zeros(shape) for key, shape in shapes.items()}
+        arrays['answers'] = answers.values
+        _set_shared(arrays, evaluation_parameters, parameters,
+                    list(answers.columns))
+        try:
+            _rate_parameters(0, len(parameters))
+            _rate_profiles(0, profiles)
+        finally:
+            _SHARED.clear()
+        return pd.DataFrame(arrays['ratings'], index=names,
+                            columns=answers.index)
+
+    shared = {'answers': SharedArray.from_array(answers.values, backend,
+                                                directory)}
+    try:
+        for key, shape in shapes.items():
+            shared[key] = SharedArray(shape, float, backend, directory)
+        if chunk_size is None:
+            chunk_size = max(1, math.ceil(len(profiles) / (4 * processes)))
+        parameter_chunk = max(1, math.ceil(len(parameters) / processes))
+        with ProcessPoolExecutor(
+                processes, initializer=_init_worker,
+                initargs=({key: array.spec for key, array in shared.items()},
+                          evaluation_parameters, parameters,
+                          list(answers.columns))) as executor:
+            for future in [executor.submit(_rate_parameters, start,
+                                           start + parameter_chunk)
+                           for start in range(0, len(parameters),
+                                              parameter_chunk)]:
+                future.result()
+            for future in [executor.submit(_rate_profiles, start,
+                                           profiles[start:start + chunk_size])
+                           for start in range(0, len(profiles),
+                                              chunk_size)]:
+                future.result()
+        return pd.DataFrame(np.array(shared['ratings'].array), index=names,
+                            columns=answers.index)
+    finally:
+        for array in shared.values():
+            array.unlink()
@@ -0,0 +1,617 @@
+"""
+Evaluation of the survey as pipeline of named stages.
+
+Every stage is a function of the outputs of the stages it depends on and of
+fixed parameters. Outputs are cached by the content hash of these inputs and
+of the source of the tools package, a stage is therefore only executed again
+if its function, its parameters, the output of one of its dependencies or the
+code of the tools package has changed. Code outside of the tools package that
+is called by a stage is not covered, run the pipeline with force (--force)
+after changing it. Independent stages are executed concurrently. Run the
+evaluation of Evaluation.py from the repository folder with
+
+    python -m tools.pipeline
+
+"""
+import argparse
+import hashlib
+import pickle
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from tools import scoring
+from tools.cache import get_code_fingerprint, get_fingerprint
+from tools.consistency import get_ticked
+from tools.tools import default_evaluation_parameters, \
+    default_section_weights, load_evaluation_table
+
+# stages plotting with matplotlib are not executed concurrently, as pyplot is
+# not thread-safe
+PLOT_LOCK = threading.Lock()
+
+
+def get_package_fingerprint():
+    """
+    Returns content hash of the source files of the tools package, which
+    contains the code called by the stages of the evaluation.
+
+    :return: str, hexadecimal sha256 hash
+    """
+    hasher = hashlib.sha256()
+    for path in sorted(Path(__file__).parent.glob('*.py')):
+        hasher.update(path.name.encode())
+        hasher.update(path.read_bytes())
+    return hasher.hexdigest()
+
+
+def _get_function_fingerprint(func):
+    if isinstance(func, partial):
+        return [_get_function_fingerprint(func.func), func.args,
+                func.keywords]
+    code = func.__code__
+    return [func.__module__, func.__qualname__, get_code_fingerprint(code)]
+
+
+class Stage:
+    """
+    Named stage of a pipeline.
+
+    :param name: str
+    :param func: callable, called with the outputs of the dependencies as
+        positional arguments and the parameters as keyword arguments
+    :param dependencies: list of str, names of the stages the stage depends on
+    :param parameters: dict (optional), fixed keyword arguments of func
+    :param files: list of str (optional), files written by the stage, the
+        stage is executed again if one of them is missing
+    :param plot: bool, if True the stage is not executed concurrently with
+        other plotting stages, defaults to False
+    """
+    def __init__(self, name, func, dependencies=(), parameters=None,
+                 files=(), plot=False):
+        self.name = name
+        self.func = func
+        self.dependencies = list(dependencies)
+        self.parameters = {} if parameters is None else parameters
+        self.files = [str(file) for file in files]
+        self.plot = plot
+
+    def get_key(self, dependency_fingerprints, package_fingerprint=None):
+        return get_fingerprint(self.name,
+                               _get_function_fingerprint(self.func),
+                               self.parameters, dependency_fingerprints,
+                               self.files, package_fingerprint)
+
+    def execute(self, *inputs):
+        if self.plot:
+            import matplotlib.pyplot as plt
+            with PLOT_LOCK:
+                try:
+                    return self.func(*inputs, **self.parameters)
+                finally:
+                    plt.close('all')
+        return self.func(*inputs, **self.parameters)
+
+
+class Pipeline:
+    """
+    Directed acyclic graph of stages with caching of the stage outputs.
+
+    :param cache_dir: str or pathlib.Path (optional), directory in which the
+        outputs are cached between runs, if None outputs are only cached in
+        memory
+    :param max_workers: int (optional), number of threads used for the
+        concurrent execution of stages
+    """
+    def __init__(self, cache_dir=None, max_workers=None):
+        self.stages = {}
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        self.max_workers = max_workers
+        self._memory_cache = {}
+
+    def add_stage(self, name, func, dependencies=(), parameters=None,
+                  files=(), plot=False):
+        """
+        Adds stage to pipeline, see Stage for the parameters.
+        """
+        for dependency in dependencies:
+            if dependency not in self.stages:
+                raise ValueError('Dependency {} of stage {} does not exist.'.
+                                 format(dependency, name))
+        if name in self.stages:
+            raise ValueError('Stage {} already exists.'.format(name))
+        self.stages[name] = Stage(name, func, dependencies, parameters,
+                                  files, plot)
+
+    def get_required_stages(self, targets=None):
+        """
+        Returns names of the targets and all stages they depend on in
+        topological order.
+
+        :param targets: list of str (optional), defaults to all stages
+        :return: list of str
+        """
+        if targets is None:
+            return list(self.stages)
+        required = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in required:
+                required.add(name)
+                pending.extend(self.stages[name].dependencies)
+        return [name for name in self.stages if name in required]
+
+    def _load_cached(self, stage, key):
+        if any(not Path(file).exists() for file in stage.files):
+            return None
+        if key in self._memory_cache:
+            return self._memory_cache[key]
+        if self.cache_dir is not None:
+            path = self.cache_dir / '{}.pkl'.format(key)
+            if path.exists():
+                with open(path, 'rb') as file:
+                    cached = pickle.load(file)
+                self._memory_cache[key] = cached
+                return cached
+        return None
+
+    def _store_cached(self, key, cached):
+        self._memory_cache[key] = cached
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_dir / '{}.pkl'.format(key), 'wb') as file:
+                pickle.dump(cached, file)
+
+    def run(self, targets=None, verbose=False, force=False):
+        """
+        Runs pipeline, only stages whose inputs changed are executed.
+
+        :param targets: list of str (optional), stages that should be
+            computed, defaults to all stages
+        :param verbose: bool, if True executed and cached stages are printed
+        :param force: bool, if True all required stages are executed and
+            their cached outputs are replaced
+        :return: tuple of dict
+            first dict contains the outputs of all required stages, second
+            dict states for every stage whether it was 'executed' or 'cached'
+        """
+        order = self.get_required_stages(targets)
+        outputs = {}
+        fingerprints = {}
+        status = {}
+        waiting = {name: set(self.stages[name].dependencies)
+                   for name in order}
+        running = {}
+        package_fingerprint = get_package_fingerprint()
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            while waiting or running:
+                ready = [name for name, dependencies in waiting.items()
+                         if not dependencies]
+                for name in ready:
+                    del waiting[name]
+                    stage = self.stages[name]
+                    key = stage.get_key([fingerprints[dependency] for
+                                         dependency in stage.dependencies],
+                                        package_fingerprint)
+                    cached = None if force else self._load_cached(stage, key)
+                    if cached is not None:
+                        self._finish(name, cached, outputs, fingerprints,
+                                     waiting)
+                        status[name] = 'cached'
+                        if verbose:
+                            print('{}: cached'.format(name))
+                    else:
+                        future = executor.submit(
+                            self._execute, stage,
+                            [outputs[dependency] for dependency in
+                             stage.dependencies])
+                        running[future] = (name, key)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key = running.pop(future)
+                    output, duration = future.result()
+                    cached = {'output': output,
+                              'fingerprint': get_fingerprint(output)}
+                    self._store_cached(key, cached)
+                    self._finish(name, cached, outputs, fingerprints,
+                                 waiting)
+                    status[name] = 'executed'
+                    if verbose:
+                        print('{}: executed in {:.2f} s'.format(
+                            name, duration))
+        return outputs, status
+
+    @staticmethod
+    def _execute(stage, inputs):
+        start = time.perf_counter()
+        output = stage.execute(*inputs)
+        return output, time.perf_counter() - start
+
+    @staticmethod
+    def _finish(name, cached, outputs, fingerprints, waiting):
+        outputs[name] = cached['output']
+        fingerprints[name] = cached['fingerprint']
+        for dependencies in waiting.values():
+            dependencies.discard(name)
+
+
+def get_section_scores(table, parameters_with_weights,
+                       evaluation_parameters):
+    return scoring.get_weighted_models(table.index, parameters_with_weights,
+                                       evaluation_parameters, table)
+
+
+def get_section_rating(weighted_models):
+    return weighted_models.sum(axis=1).divide(
+        weighted_models.shape[1]).sort_values(ascending=False)
+
+
+def get_holistic_ratings(*ratings, sections):
+    weighted_models_holistic_df = pd.concat(
+        [rating.rename(section) for rating, section in zip(ratings, sections)],
+        sort=True, axis=1)
+    rating_holistic = weighted_models_holistic_df.sum(axis=1).divide(
+        len(sections)).sort_values(ascending=False)
+    return weighted_models_holistic_df, rating_holistic
+
+
+def get_high_representation(*ratings, sections, threshold):
+    return pd.concat([rating[rating > threshold] for rating in ratings],
+                     axis=1, sort=False, keys=sections)
+
+
+def get_column_sums(table, selections):
+    # number of models that ticked the columns, text columns (e.g. 'other
+    # import') count the models with an entry, see consistency.get_ticked
+    columns = [column for selection in selections
+               for column in table.loc[:, selection].columns]
+    return pd.Series(get_ticked(table, columns).sum(axis=0), index=columns)
+
+
+def get_demand_specifications(table):
+    # only the highest rated option of the maximum deferrable load counts
+    ticked = pd.DataFrame(get_ticked(table, MAX_DEF_LOAD_COLUMNS),
+                          index=table.index, columns=MAX_DEF_LOAD_COLUMNS)
+    both = ticked['time- and type-dependent']
+    ticked['max def load fixed value'] &= \
+        ~both & ~ticked['Time-dependent'] & ~ticked['Type-dependent']
+    ticked['Time-dependent'] &= ~both
+    ticked['Type-dependent'] &= ~both
+    return ticked.sum()
+
+
+def get_storage_specifications(table):
+    # only the highest rated storage model counts
+    ticked = pd.DataFrame(get_ticked(table, STORAGE_SPECIFICATION_COLUMNS),
+                          index=table.index,
+                          columns=STORAGE_SPECIFICATION_COLUMNS)
+    ticked['fixed/static'] &= ~ticked['dynamic']
+    return ticked.sum()
+
+
+def plot_section_figure(rating, tech, char, tech_fields, char_fields,
+                        save_fig_dir):
+    from tools.plots import plot_representation_triple
+    plot_representation_triple(
+        rating.to_frame('Overall\nrating'),
+        tech[tech_fields].loc[rating.index],
+        char[char_fields].loc[rating.index], figsize=(6.5, 4.8),
+        save_fig_dir=save_fig_dir)
+    return save_fig_dir
+
+
+def plot_holistic_figure(holistic, save_fig_dir):
+    from tools.plots import plot_representation_holistic
+    weighted_models_holistic_df, rating_holistic = holistic
+    plot_representation_holistic(
+        rating_holistic.to_frame('Overall\nrating'),
+        weighted_models_holistic_df.loc[rating_holistic.index],
+        figsize=(6.5, 4.8), save_fig_dir=save_fig_dir)
+    return save_fig_dir
+
+
+def plot_boxplot_figure(holistic, save_fig_dir):
+    from tools.plots import plot_boxplot
+    plot_boxplot(holistic[0].transpose(), save_fig=save_fig_dir)
+    return save_fig_dir
+
+
+def plot_bar_figure(series, table, save_fig_dir, **kwargs):
+    from tools.plots import plot_bar_horizontal
+    plot_bar_horizontal(series, max_val=len(table), save_fig_dir=save_fig_dir,
+                        **kwargs)
+    return save_fig_dir
+
+
+SECTION_FIGURES = {'Supply': '02_supply.pdf', 'Demand': '03_demand.pdf',
+                   'Storage': '04_storage.pdf', 'Network': '06_network.pdf',
+                   'Sector\ncoupling': '05_sector.pdf'}
+
+MAX_DEF_LOAD_COLUMNS = ['max def load fixed value', 'Time-dependent',
+                        'Type-dependent', 'time- and type-dependent',
+                        'no max def load', 'shifting time yes']
+STORAGE_SPECIFICATION_COLUMNS = ['fixed/static', 'dynamic', 'cycle aging',
+                                 'calendrical aging', 'self discharge yes']
+
+# bar figures of Evaluation.py, which plot the number of models that ticked
+# survey columns, the text columns of other scopes count for 'pos' and 'used'
+BAR_FIGURES = {
+    '01a_paper_spatial_scope.pdf': (
+        [slice('local (NUTS3)/pos', 'international/used'),
+         ['other spatial scope', 'other spatial scope']],
+        {'x_labels': ['Local', 'Regional', 'National', 'International',
+                      'Other'],
+         'title': 'Spatial scope', 'no_label': True}),
+    '01b_paper_temporal_scope.pdf': (
+        [slice('very short/pos', 'long/used'),
+         ['other temporal scope', 'other temporal scope']],
+        {'x_labels': ['Very short', 'Short', 'Intermediate', 'Long', 'Other'],
+         'title': 'Temporal scope', 'no_label': True}),
+    '01c_paper_temporal_resolution.pdf': (
+        [slice('<hourly/pos', 'annual/used'),
+         ['other temporal resolution', 'other temporal resolution']],
+        {'x_labels': ['< Hourly', 'Hourly', 'Intermediate', 'Annual',
+                      'Other\nResolution'],
+         'title': 'Temporal Resolution', 'figsize': (4., 2.5)}),
+    'a00a_paper_general_factors.pdf': (
+        [['prob yes', 'social yes']],
+        {'x_labels': ['Probalistic\nbehavior', 'Social\nfactors'],
+         'title': 'General factors', 'figsize': (3., 2.5)}),
+    'a00b_paper_decision_making.pdf': (
+        [slice('perfect foresight', 'other decision making'),
+         ['no decision making']],
+        {'x_labels': ['Perfect foresight',
+                      'Rolling horizon /\nMyopic foresight',
+                      'Decision- /\nagentbased', 'Other decision\nmaking',
+                      'No decision\nmaking'],
+         'title': 'Decision making process'}),
+    'a00c_paper_flex_spec.pdf': (
+        [['efficiency fixed value', 'efficiency function', 'ramping yes',
+          'response time yes', 'recovery time yes']],
+        {'x_labels': ['Fixed efficiency', 'Dynamic efficiency', 'Ramping',
+                      'Response time', 'Recovery time'],
+         'title': 'Flexibility specifications', 'figsize': (3.5, 2.4)}),
+    'a01a_paper_supply_tech.pdf': (
+        [slice('hard coal/pos', 'OCGT/def'),
+         slice('Bioenergy/pos', 'concentrated solar power/def'),
+         slice('photovoltaic/pos', 'tidal power/def'),
+         slice('PEM-FC/pos', 'Nuclear/def')],
+        {'x_labels': ['Hard coal', 'Lignite', 'Oil', 'Natural gas', 'CCGT',
+                      'OCGT', 'Bioenergy', 'Geothermal', 'Hydro reservoir',
+                      'CSP', 'PV', 'Wind onshore', 'Wind offshore',
+                      'Hydro ROR', 'Wave', 'Tidal', 'PEM-FC', 'SOFC',
+                      'Nuclear'],
+         'title': 'Supply technologies', 'label_name': 'pos_def',
+         'figsize': (3.5, 3.75), 'bbox_to_anchor': (-0.4, 0.)}),
+    'a01b_paper_supply_spec.pdf': (
+        [['minimum load yes', 'discrete expansion yes',
+          'curtailed operation yes']],
+        {'x_labels': ['Minimum\nload', 'Discrete\nexpansaion',
+                      'Curtailed\noperation'],
+         'title': 'Supply specifications', 'figsize': (3, 2.5)}),
+    'a02a_paper_demand_tech.pdf': (
+        [slice('households/pos', 'service sector/def')],
+        {'x_labels': ['Households', 'Industrial', 'Service'],
+         'title': 'Demand technologies', 'label_name': 'pos_def',
+         'bbox_to_anchor': (-0.4, 0.)}),
+    'a03a_paper_storage_tech.pdf': (
+        [slice('PHS/pos', 'Flywheels/def')],
+        {'x_labels': ['Pumped hydro', 'Batteries', 'Compressed air',
+                      'Capacitors', 'Flywheels'],
+         'title': 'Storage technologies', 'label_name': 'pos_def',
+         'bbox_to_anchor': (-0.4, 0.)}),
+    'a04a_paper_network_tech.pdf': (
+        [['Distribution Grid/pos', 'Distribution Grid/def',
+          'Transmission Grid/pos', 'Transmission Grid/def',
+          'interconnectors/pos', 'interconnectors/def',
+          'network extension/pos', 'network extension/def',
+          'switches/pos', 'switches/def']],
+        {'x_labels': ['Distribution\ngrid', 'Transmission\ngrid',
+                      'Interconnectors', 'Network\nextension', 'Switches'],
+         'title': 'Network technologies', 'label_name': 'pos_def',
+         'bbox_to_anchor': (-0.4, 0.)}),
+    'a04b_ancillary_services.pdf': (
+        [slice('spinning reserve', 'black start')],
+        {'x_labels': ['Spinning reserve', 'Balancing energy',
+                      'Sheddable loads', 'Feed-in management', 'Redispatch',
+                      'Power factor correction', 'Curtailment',
+                      'Blackstart'],
+         'title': 'Ancillary services'}),
+    'a04c_paper_network_spec.pdf': (
+        [['transfer capacity', 'AC PF', 'DC PF', 'simplified',
+          'flow based', 'other import']],
+        {'x_labels': ['NTC', 'AC PF', 'DC PF', 'Simplified import/\nexport',
+                      'Flow-based import/\nexport', 'Other import/\nexport'],
+         'title': 'Network specifications', 'figsize': (3.5, 2.4)}),
+    'a05a_paper_sector_tech.pdf': (
+        [['P2Gas/pos', 'P2Gas/def', 'Fuels (H2)/pos', 'Fuels (H2)/def',
+          'CHP/pos', 'CHP/def', 'HP/pos', 'HP/def', 'Heat storage/pos',
+          'Heat storage/def', 'EV/pos', 'EV/def', 'V2Grid/pos',
+          'V2Grid/def']],
+        {'x_labels': ['Power-to-gas', 'Fuels', 'CHP', 'Heat pumps',
+                      'Heat storage', 'Electric vehicles', 'Vehicle-to-grid'],
+         'title': 'SC technologies', 'label_name': 'pos_def',
+         'bbox_to_anchor': (-0.4, 0.)}),
+    'a05b_paper_heat_spec.pdf': (
+        [slice('heat sector excluded', 'other heat representation')],
+        {'x_labels': ['Excluded', 'Exogen aggregated', 'Endogen demand',
+                      'Endogen technology', 'Other'],
+         'title': 'Heat specifications', 'figsize': (3.5, 2.4)}),
+    'a05c_paper_transport_spec.pdf': (
+        [slice('transport sector excluded',
+               'other transport representation')],
+        {'x_labels': ['Excluded', 'Exogen aggregated', 'Endogen demand',
+                      'Endogen technology', 'Other'],
+         'title': 'Transport specifications', 'figsize': (3.5, 2.4)}),
+}
+
+
+# bar figures of Evaluation.py that only count the highest rated option
+SPECIFICATION_FIGURES = {
+    'a02b_paper_demand_spec.pdf': (
+        get_demand_specifications,
+        {'x_labels': ['Fixed value MDL', 'Time-dependent MDL',
+                      'Type-dependent MDL', 'Time- & type-\ndependent MDL',
+                      'No MDL', 'Shifting time'],
+         'title': 'Demand specifications', 'figsize': (3.25, 2.4)}),
+    'a03b_paper_storage_spec.pdf': (
+        get_storage_specifications,
+        {'x_labels': ['Fixed model', 'Dynamic\nmodel', 'Cycle aging',
+                      'Calendrical\naging', 'Self discharge'],
+         'title': 'Storage specifications', 'figsize': (3.25, 2.4)}),
+}
+
+
+def _get_file_fingerprint(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def build_evaluation_pipeline(table_path, plot_dir, cache_dir=None,
+                              evaluation_parameters=None,
+                              section_weights=None, threshold=0.7,
+                              export_dir=None):
+    """
+    Builds pipeline reproducing the evaluation and figures of Evaluation.py.
+
+    The pipeline consists of the following stages:
+
+    * 'load': loading of the survey table
+    * 'score_<section>', 'score_<section>_tech', 'score_<section>_char':
+      weighted models of every section, see tools.default_section_weights
+    * 'rating_<section>': rating of every section
+    * 'holistic': holistic rating combining all sections
+    * 'threshold': models with a rating above threshold in every section
+    * 'sums_<file name>': number of models per bar of the bar figures
+    * 'figure_<file name>': every figure, saved to plot_dir
+    * 'export': export of all results, only if export_dir is given, see
+      export.export_results
+
+    :param table_path: str or pathlib.Path, see tools.load_evaluation_table
+    :param plot_dir: str or pathlib.Path, directory of the figures
+    :param cache_dir: str or pathlib.Path (optional), see Pipeline
+    :param evaluation_parameters: dict (optional), defaults to
+        tools.default_evaluation_parameters
+    :param section_weights: dict (optional), defaults to
+        tools.default_section_weights
+    :param threshold: float, defaults to 0.7
+    :param export_dir: str or pathlib.Path (optional)
+    :return: Pipeline
+    """
+    if evaluation_parameters is None:
+        evaluation_parameters = default_evaluation_parameters()
+    if section_weights is None:
+        section_weights = default_section_weights()
+    plot_dir = Path(plot_dir)
+    plot_dir.mkdir(parents=True, exist_ok=True)
+    pipeline = Pipeline(cache_dir)
+    # the content of the table is part of the parameters, the stage is
+    # therefore executed again if the table changes
+    pipeline.add_stage('load', _load_table,
+                       parameters={'path': str(table_path),
+                                   'fingerprint':
+                                       _get_file_fingerprint(table_path)})
+    sections = list(section_weights)
+    for section, weights in section_weights.items():
+        name = section.replace('\n', ' ').lower()
+        for kind in ['overall', 'tech', 'char']:
+            suffix = '' if kind == 'overall' else '_' + kind
+            pipeline.add_stage(
+                'score_{}{}'.format(name, suffix), get_section_scores,
+                ['load'], {'parameters_with_weights': weights[kind],
+                           'evaluation_parameters': evaluation_parameters})
+        pipeline.add_stage('rating_{}'.format(name), get_section_rating,
+                           ['score_{}'.format(name)])
+        if section in SECTION_FIGURES:
+            path = plot_dir / SECTION_FIGURES[section]
+            pipeline.add_stage(
+                'figure_{}'.format(path.stem), plot_section_figure,
+                ['rating_{}'.format(name), 'score_{}_tech'.format(name),
+                 'score_{}_char'.format(name)],
+                {'tech_fields': list(weights['tech']),
+                 'char_fields': list(weights['char']),
+                 'save_fig_dir': str(path)}, files=[path], plot=True)
+    ratings = ['rating_{}'.format(section.replace('\n', ' ').lower())
+               for section in sections]
+    pipeline.add_stage('holistic', get_holistic_ratings, ratings,
+                       {'sections': sections})
+    pipeline.add_stage('threshold', get_high_representation, ratings,
+                       {'sections': sections, 'threshold': threshold})
+    for file_name, func in [('07_holistic.pdf', plot_holistic_figure),
+                            ('08_boxplot.pdf', plot_boxplot_figure)]:
+        path = plot_dir / file_name
+        pipeline.add_stage('figure_{}'.format(path.stem), func, ['holistic'],
+                           {'save_fig_dir': str(path)}, files=[path],
+                           plot=True)
+    bar_figures = [(file_name, get_column_sums, {'selections': selections},
+                    kwargs)
+                   for file_name, (selections, kwargs) in BAR_FIGURES.items()]
+    bar_figures += [(file_name, func, {}, kwargs) for file_name, (func, kwargs)
+                    in SPECIFICATION_FIGURES.items()]
+    for file_name, func, parameters, kwargs in sorted(
+            bar_figures, key=lambda figure: figure[0]):
+        path = plot_dir / file_name
+        pipeline.add_stage('sums_{}'.format(path.stem), func, ['load'],
+                           parameters)
+        pipeline.add_stage('figure_{}'.format(path.stem), plot_bar_figure,
+                           ['sums_{}'.format(path.stem), 'load'],
+                           dict(kwargs, save_fig_dir=str(path)),
+                           files=[path], plot=True)
+    if export_dir is not None:
+        scores = [name for name in pipeline.stages
+                  if name.startswith(('score_', 'rating_'))]
+        pipeline.add_stage('export', export_stage, scores + ['holistic'],
+                           {'names': scores + ['holistic'],
+                            'directory': str(export_dir)})
+    return pipeline
+
+
+def _load_table(path, fingerprint):
+    return load_evaluation_table(path)
+
+
+def export_stage(*results, names, directory):
+    from tools.export import export_results
+    results = dict(zip(names, results))
+    results['weighted_models_holistic'], results['rating_holistic'] = \
+        results.pop('holistic')
+    return export_results(results, directory)
+
+
+def main():
+    root = Path(__file__).parents[1]
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--table',
+                        default=str(root / 'data' / 'Evaluation_Table.csv'))
+    parser.add_argument('--plot-dir', default=str(root / 'plots'))
+    parser.add_argument('--cache-dir', default=str(root / '.pipeline_cache'))
+    parser.add_argument('--export-dir', default=None)
+    parser.add_argument('--threshold', type=float, default=0.7)
+    parser.add_argument('--force', action='store_true',
+                        help='execute all stages instead of using the cache')
+    parser.add_argument('targets', nargs='*', default=None,
+                        help='stages to be computed, defaults to all stages')
+    args = parser.parse_args()
+    import matplotlib
+    matplotlib.use('Agg')
+    pipeline = build_evaluation_pipeline(
+        args.table, args.plot_dir, args.cache_dir, threshold=args.threshold,
+        export_dir=args.export_dir)
+    start = time.perf_counter()
+    outputs, status = pipeline.run(args.targets or None, verbose=True,
+                                   force=args.force)
+    print('{} of {} stages executed in {:.2f} s.'.format(
+        list(status.values()).count('executed'), len(status),
+        time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,144 @@
+import functools
+import inspect
+import json
+from pathlib import Path
+
 import numpy as np
+import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 
+from tools.cache import get_code_fingerprint, get_fingerprint
+from tools.cooccurrence import get_cluster_order
+
+FIGURE_MANIFEST = 'figures_manifest.json'
+
+
+def read_figure_manifest(directory):
+    """
+    Reads manifest of the figures saved to a directory.
+
+    :param directory: string or pathlib.Path
+    :return: dict, keys are the file names of the figures, values contain the
+             fingerprint of the inputs, the plot function and the file size
+    """
+    path = Path(directory) / FIGURE_MANIFEST
+    if not path.exists():
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def diff_figure_manifests(old_manifest, new_manifest):
+    """
+    Compares two manifests of figures, e.g. before and after a run of
+    Evaluation.py.
+
+    :param old_manifest:    dict, see read_figure_manifest
+    :param new_manifest:    dict, see read_figure_manifest
+    :return: dict with lists of the file names of 'added', 'removed' and
+             'changed' figures
+    """
+    return {
+        'added': [name for name in new_manifest if name not in old_manifest],
+        'removed': [name for name in old_manifest
+                    if name not in new_manifest],
+        'changed': [name for name in new_manifest if name in old_manifest and
+                    new_manifest[name]['fingerprint'] !=
+                    old_manifest[name]['fingerprint']]}
+
+
+def cache_rendering(save_argument='save_fig_dir'):
+    """
+    Decorator skipping the rendering and saving of a figure if it was saved
+    before with the same inputs.
 
+    The fingerprint of the code of the plot function and of all its
+    arguments including the default values (data, labels, figsize and
+    further keyword arguments) is stored in the manifest figures_manifest.json
+    in the directory of the saved figure. The decorated function gets the
+    additional keyword argument use_render_cache, which is False by default,
+    so that figures are drawn as before. If it is True, the fingerprint is
+    unchanged and the file still exists, the figure is neither rendered nor
+    saved. Figures that are not saved are always rendered.
+
+    :param save_argument:   string, name of the argument of the plot function
+                            containing the path of the saved figure
+    """
+    def decorator(plot_function):
+        @functools.wraps(plot_function)
+        def wrapper(*args, use_render_cache=False, **kwargs):
+            bound = inspect.signature(plot_function).bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            save_fig = arguments.pop(save_argument, None)
+            if not use_render_cache or save_fig is None:
+                return plot_function(*args, **kwargs)
+            path = Path(save_fig)
+            fingerprint = get_fingerprint(
+                plot_function.__name__,
+                get_code_fingerprint(plot_function.__code__), arguments,
+                matplotlib.__version__)
+            manifest = read_figure_manifest(path.parent)
+            entry = manifest.get(path.name)
+            if entry is not None and entry['fingerprint'] == fingerprint \
+                    and path.exists():
+                return None
+            result = plot_function(*args, **kwargs)
+            manifest = read_figure_manifest(path.parent)
+            manifest[path.name] = {'fingerprint': fingerprint,
+                                   'function': plot_function.__name__,
+                                   'size': path.stat().st_size}
+            with open(path.parent / FIGURE_MANIFEST, 'w') as file:
+                json.dump(manifest, file, indent=2, sort_keys=True)
+            return result
+        return wrapper
+    return decorator
+
+
+def _imshow_representation(ax, parameters, max_rows=None):
+    """
+    Heat map of the representation of the models. If the number of models
+    exceeds max_rows, consecutive models are aggregated into max_rows rank
+    buckets by their mean and the image is rasterized, so that render time and
+    file size do not grow with the number of models. The y-axis keeps the
+    positions of the single models.
+    """
+    if max_rows is None or len(parameters) <= max_rows:
+        return ax.imshow(parameters, cmap="YlGn", aspect='auto', vmin=0,
+                         vmax=1)
+    values = np.asarray(parameters, dtype=float)
+    starts = np.linspace(0, len(values), max_rows + 1).astype(int)
+    buckets = np.add.reduceat(values, starts[:-1], axis=0) / \
+        np.diff(starts)[:, None]
+    return ax.imshow(buckets, cmap="YlGn", aspect='auto', vmin=0, vmax=1,
+                     interpolation='nearest', rasterized=True,
+                     extent=(-0.5, values.shape[1] - 0.5,
+                             len(values) - 0.5, -0.5))
+
+
+def _set_model_labels(ax, models, max_rows=None, top_k=10, highlight=None):
+    """
+    Labels y-axis with the names of the models. If the number of models
+    exceeds max_rows, only the first top_k and the highlighted models are
+    labeled, highlighted models in bold.
+    """
+    if max_rows is None or len(models) <= max_rows:
+        ax.set_yticks(np.arange(len(models)))
+        ax.set_yticklabels(models)
+        return
+    positions = list(range(min(top_k, len(models))))
+    highlighted = [] if highlight is None else [
+        pos for pos in pd.Index(models).get_indexer(highlight) if pos >= 0]
+    positions = sorted(set(positions) | set(highlighted))
+    ax.set_yticks(positions)
+    labels = ax.set_yticklabels([models[pos] for pos in positions])
+    for pos, label in zip(positions, labels):
+        if pos in highlighted:
+            label.set_fontweight('bold')
+
+
+@cache_rendering()
 def plot_bar_horizontal(series, x_labels, figsize=(3.5, 2.5), title='',
                         max_val=None, save_fig_dir=None, label_name='',
                         no_label=False, **kwargs):
@@ -16,7 +153,9 @@ def plot_bar_horizontal(series, x_labels, figsize=(3.5, 2.5), title='',
     :param title:   string (optional)
     :param max_val: float (optional), maximum value of examined parameter,
                     normally number of models in ordner to plot percentage of
-                    models that have implemented the examined parameters
+                    models that have implemented the examined parameters,
+                    defaults to series.attrs['number_of_models'] if given
+                    (see cube.AggregationCube.get_counts)
     :param save_fig_dir: string (optional)
     :param label_name:  string, defaults to '', then 'possible' and 'usually
                         used' are used as labels, for 'pos_def' the labels
@@ -24,6 +163,8 @@ def plot_bar_horizontal(series, x_labels, figsize=(3.5, 2.5), title='',
                         'yes' and 'no' serve as labels
     :param no_label:    bool, if True legend is not displayed
     """
+    if max_val is None:
+        max_val = series.attrs.get('number_of_models')
     plt.ion()
     fig, ax = plt.subplots(figsize=figsize)
     x_pos = np.arange(len(x_labels))
@@ -65,9 +206,11 @@ def plot_bar_horizontal(series, x_labels, figsize=(3.5, 2.5), title='',
         fig.savefig(save_fig_dir)
 
 
+@cache_rendering()
 def plot_representation_triple(rating, parameters_1, parameters_2,
                                subtitle_1=None, subtitle_2=None, title=None,
-                               figsize=(6.5, 4.8), save_fig_dir=None):
+                               figsize=(6.5, 4.8), save_fig_dir=None,
+                               max_rows=None, top_k=10, highlight=None):
     """
     Method for heat map plot of relative representation of two groups of
     different parameters in selected models with rating on the left.
@@ -84,15 +227,22 @@ def plot_representation_triple(rating, parameters_1, parameters_2,
     :param figsize: tuple (optional)
     :param save_fig_dir:    string (optional), complete path to which figure
                             should be saved
+    :param max_rows:    int (optional), maximum number of displayed rows, if
+                        there are more models, they are aggregated into rank
+                        buckets, models should therefore be sorted by rating
+    :param top_k:   int, number of labeled models if max_rows is exceeded,
+                    defaults to 10
+    :param highlight:   list of str (optional), models that are labeled in
+                        any case if max_rows is exceeded
     """
     plt.ion()
     fig, (ax0, ax, ax2) = plt.subplots(1, 3, gridspec_kw={
         'width_ratios': [0.5, 3, 3.75]},
                                        figsize=figsize)
-    im0 = ax0.imshow(rating, cmap="YlGn", aspect='auto', vmin=0, vmax=1)
-    im = ax.imshow(parameters_1, cmap="YlGn", aspect='auto', vmin=0, vmax=1)
+    im0 = _imshow_representation(ax0, rating, max_rows)
+    im = _imshow_representation(ax, parameters_1, max_rows)
     plt.subplots_adjust(wspace=None, hspace=None)
-    im2 = ax2.imshow(parameters_2, cmap="YlGn", aspect='auto', vmin=0, vmax=1)
+    im2 = _imshow_representation(ax2, parameters_2, max_rows)
     plt.subplots_adjust(wspace=None, hspace=None)
     # set colorbar and adjust size of second subplot
     cbar = ax2.figure.colorbar(im, ax=ax2)
@@ -103,14 +253,13 @@ def plot_representation_triple(rating, parameters_1, parameters_2,
     ax0.set_xticks(np.arange(rating.shape[1]))
     ax.set_xticks(np.arange(parameters_1.shape[1]))
     ax2.set_xticks(np.arange(parameters_2.shape[1]))
-    ax0.set_yticks(np.arange(parameters_1.shape[0]))
     ax.set_yticks([])
     ax2.set_yticks([])
     # ... and label them with the respective list entries.
     ax0.set_xticklabels(rating.columns, rotation='vertical')
     ax.set_xticklabels(parameters_1.columns, rotation='vertical')
     ax2.set_xticklabels(parameters_2.columns, rotation='vertical')
-    ax0.set_yticklabels(parameters_1.index)
+    _set_model_labels(ax0, parameters_1.index, max_rows, top_k, highlight)
     plt.subplots_adjust(bottom=0.15)
     # set title
     if subtitle_1 is not None:
@@ -125,9 +274,11 @@ def plot_representation_triple(rating, parameters_1, parameters_2,
         plt.savefig(save_fig_dir)
 
 
+@cache_rendering()
 def plot_representation_dual(parameters_1, parameters_2,
                              subtitle_1=None, subtitle_2=None, title=None,
-                             figsize=(6.5, 4.8), save_fig_dir=None):
+                             figsize=(6.5, 4.8), save_fig_dir=None,
+                             max_rows=None, top_k=10, highlight=None):
     """
     Method for heat map plot of relative representation of two groups of
     different parameters in selected models without rating on the left.
@@ -143,12 +294,19 @@ def plot_representation_dual(parameters_1, parameters_2,
     :param figsize: tuple (optional)
     :param save_fig_dir:    string (optional), complete path to which figure
                             should be saved
+    :param max_rows:    int (optional), maximum number of displayed rows, if
+                        there are more models, they are aggregated into rank
+                        buckets, models should therefore be sorted by rating
+    :param top_k:   int, number of labeled models if max_rows is exceeded,
+                    defaults to 10
+    :param highlight:   list of str (optional), models that are labeled in
+                        any case if max_rows is exceeded
     """
     plt.ion()
     fig, (ax, ax2) = plt.subplots(1, 2, figsize=figsize)
-    im = ax.imshow(parameters_1, cmap="YlGn", aspect='auto', vmin=0, vmax=1)
+    im = _imshow_representation(ax, parameters_1, max_rows)
     plt.subplots_adjust(wspace=None, hspace=None)
-    im2 = ax2.imshow(parameters_2, cmap="YlGn", aspect='auto', vmin=0, vmax=1)
+    im2 = _imshow_representation(ax2, parameters_2, max_rows)
     plt.subplots_adjust(wspace=None, hspace=None)
     # set colorbar and adjust size of second subplot
     cbar = ax2.figure.colorbar(im, ax=ax2)
@@ -161,12 +319,11 @@ def plot_representation_dual(parameters_1, parameters_2,
     # We want to show all ticks...
     ax.set_xticks(np.arange(parameters_1.shape[1]))
     ax2.set_xticks(np.arange(parameters_2.shape[1]))
-    ax.set_yticks(np.arange(parameters_1.shape[0]))
     ax2.set_yticks([])
     # ... and label them with the respective list entries.
     ax.set_xticklabels(parameters_1.columns, rotation='vertical')
     ax2.set_xticklabels(parameters_2.columns, rotation='vertical')
-    ax.set_yticklabels(parameters_1.index)
+    _set_model_labels(ax, parameters_1.index, max_rows, top_k, highlight)
     plt.subplots_adjust(bottom=0.15)
     # set title
     if subtitle_1 is not None:
@@ -181,8 +338,10 @@ def plot_representation_dual(parameters_1, parameters_2,
         plt.savefig(save_fig_dir)
 
 
+@cache_rendering()
 def plot_representation_single(parameters, title=None,
-                               save_fig_dir=None, figsize=(6.5, 4.8)):
+                               save_fig_dir=None, figsize=(6.5, 4.8),
+                               max_rows=None, top_k=10, highlight=None):
     """
     Method for heat map plot of relative representation of
     different parameters in selected models without rating on the left.
@@ -194,10 +353,17 @@ def plot_representation_single(parameters, title=None,
     :param figsize: tuple (optional)
     :param save_fig_dir:    string (optional), complete path to which figure
                             should be saved
+    :param max_rows:    int (optional), maximum number of displayed rows, if
+                        there are more models, they are aggregated into rank
+                        buckets, models should therefore be sorted by rating
+    :param top_k:   int, number of labeled models if max_rows is exceeded,
+                    defaults to 10
+    :param highlight:   list of str (optional), models that are labeled in
+                        any case if max_rows is exceeded
     """
     plt.ion()
     fig, ax = plt.subplots(1, 1, figsize=figsize)
-    im = ax.imshow(parameters, cmap="YlGn", aspect='auto', vmin=0, vmax=1)
+    im = _imshow_representation(ax, parameters, max_rows)
     # set colorbar and adjust size of second subplot
     cbar = ax.figure.colorbar(im, ax=ax)
     cbar.mappable.set_clim(0, 1.0)
@@ -205,10 +371,9 @@ def plot_representation_single(parameters, title=None,
     from mpl_toolkits.axes_grid1 import make_axes_locatable
     # We want to show all ticks...
     ax.set_xticks(np.arange(parameters.shape[1]))
-    ax.set_yticks(np.arange(parameters.shape[0]))
     # ... and label them with the respective list entries.
     ax.set_xticklabels(parameters.columns, rotation='vertical')
-    ax.set_yticklabels(parameters.index)
+    _set_model_labels(ax, parameters.index, max_rows, top_k, highlight)
     plt.subplots_adjust(bottom=0.19)
     # set title
     if title is not None:
@@ -219,8 +384,10 @@ def plot_representation_single(parameters, title=None,
         plt.savefig(save_fig_dir)
 
 
+@cache_rendering()
 def plot_representation_holistic(rating, parameters, title=None,
-                                 save_fig_dir=None, figsize=(6.5, 4.8)):
+                                 save_fig_dir=None, figsize=(6.5, 4.8),
+                                 max_rows=None, top_k=10, highlight=None):
     """
     Method for heat map plot of relative representation of
     different parameters in selected models with rating on the left.
@@ -233,12 +400,19 @@ def plot_representation_holistic(rating, parameters, title=None,
     :param figsize: tuple (optional)
     :param save_fig_dir:    string (optional), complete path to which figure
                             should be saved
+    :param max_rows:    int (optional), maximum number of displayed rows, if
+                        there are more models, they are aggregated into rank
+                        buckets, models should therefore be sorted by rating
+    :param top_k:   int, number of labeled models if max_rows is exceeded,
+                    defaults to 10
+    :param highlight:   list of str (optional), models that are labeled in
+                        any case if max_rows is exceeded
     """
     plt.ion()
     fig, (ax0, ax) = plt.subplots(1, 2,gridspec_kw={
         'width_ratios': [0.5, 6.75]}, figsize=figsize)
-    im0 = ax0.imshow(rating, cmap="YlGn", aspect='auto', vmin=0, vmax=1)
-    im = ax.imshow(parameters, cmap="YlGn", aspect='auto', vmin=0, vmax=1)
+    im0 = _imshow_representation(ax0, rating, max_rows)
+    im = _imshow_representation(ax, parameters, max_rows)
     # set colorbar and adjust size of second subplot
     cbar = ax.figure.colorbar(im, ax=ax)
     cbar.mappable.set_clim(0, 1.0)
@@ -247,12 +421,11 @@ def plot_representation_holistic(rating, parameters, title=None,
     # We want to show all ticks...
     ax0.set_xticks(np.arange(rating.shape[1]))
     ax.set_xticks(np.arange(parameters.shape[1]))
-    ax0.set_yticks(np.arange(rating.shape[0]))
     ax.set_yticks([])
     # ... and label them with the respective list entries.
     ax0.set_xticklabels(rating.columns, rotation='vertical')
     ax.set_xticklabels(parameters.columns, rotation='vertical')
-    ax0.set_yticklabels(parameters.index)
+    _set_model_labels(ax0, parameters.index, max_rows, top_k, highlight)
     ax.set_yticklabels([])
     plt.subplots_adjust(bottom=0.19)
     # set title
@@ -263,6 +436,7 @@ def plot_representation_holistic(rating, parameters, title=None,
         plt.savefig(save_fig_dir)
 
 
+@cache_rendering('save_fig')
 def plot_boxplot(df, save_fig=None):
     """
     Plot box plot of representation of different groups of parameters
@@ -274,9 +448,250 @@ def plot_boxplot(df, save_fig=None):
     fig, ax = plt.subplots(figsize=(6, 4))
     ax.set_title('')
     ax.set_ylim(0, 1)
-    bp = ax.boxplot(df, meanline=True, showmeans=True, manage_ticks=True)
+    # one box per row of df
+    bp = ax.boxplot([row.values for _, row in df.iterrows()], meanline=True,
+                    showmeans=True, manage_ticks=True)
     ax.set_xticklabels(df.index, rotation=0)
     ax.legend([bp['medians'][0], bp['means'][0]], ['Median', 'Mean'])
     if save_fig:
         plt.savefig(save_fig)
 
+
+@cache_rendering('save_fig')
+def plot_boxplot_stats(stats, save_fig=None):
+    """
+    Plot box plot of representation of different groups of parameters from
+    precomputed statistics, e.g. of quantile sketches of large populations.
+    Same layout as plot_boxplot.
+
+    :param stats:   list of dict, one per box, see sketch.get_boxplot_stats
+                    or matplotlib.cbook.boxplot_stats, the labels are taken
+                    from the entries 'label'
+    :param save_fig:    string (optional), complete path to which figure
+                        should be saved
+    """
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ax.set_title('')
+    ax.set_ylim(0, 1)
+    bp = ax.bxp(stats, meanline=True, showmeans=True, manage_ticks=True)
+    ax.legend([bp['medians'][0], bp['means'][0]], ['Median', 'Mean'])
+    if save_fig:
+        plt.savefig(save_fig)
+
+
+@cache_rendering()
+def plot_snapshot_trends(trends, title=None, highlight=None,
+                         figsize=(6.5, 4.8), save_fig_dir=None):
+    """
+    Line plot of the development of a rating over several survey snapshots.
+
+    :param trends:  pandas.DataFrame, index should be the model names and
+                    columns the snapshots, see snapshots.get_trends
+    :param title:   string (optional)
+    :param highlight:   list of str (optional), models that are labeled in
+                        the legend, the others are plotted in grey, defaults
+                        to all models
+    :param figsize: tuple (optional)
+    :param save_fig_dir:    string (optional), complete path to which figure
+                            should be saved
+    """
+    plt.ion()
+    fig, ax = plt.subplots(figsize=figsize)
+    x_pos = np.arange(trends.shape[1])
+    for model in trends.index:
+        if highlight is None or model in highlight:
+            ax.plot(x_pos, trends.loc[model].values, marker='o', label=model)
+        else:
+            ax.plot(x_pos, trends.loc[model].values, color='lightgrey',
+                    zorder=0)
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels(trends.columns)
+    ax.set_ylim(0, 1)
+    ax.set_ylabel('Level of representation')
+    if title is not None:
+        ax.set_title(title)
+    ax.legend(loc='center left', bbox_to_anchor=(1, 0.5), fontsize='small')
+    plt.tight_layout()
+    if save_fig_dir is not None:
+        plt.savefig(save_fig_dir)
+
+
+@cache_rendering()
+def plot_waterfall(waterfall, title=None, max_bars=15, figsize=(6.5, 4.8),
+                   save_fig_dir=None):
+    """
+    Waterfall plot of the contributions of parameters to a rating or to the
+    difference of two ratings.
+
+    :param waterfall:   pandas.DataFrame, see decomposition.get_waterfall
+    :param title:   string (optional)
+    :param max_bars:    int (optional), further parameters are summed up in
+                        one bar 'other', defaults to 15
+    :param figsize: tuple (optional)
+    :param save_fig_dir:    string (optional), complete path to which figure
+                            should be saved
+    """
+    if max_bars is not None and len(waterfall) > max_bars:
+        rest = waterfall.iloc[max_bars - 1:]
+        waterfall = pd.concat([waterfall.iloc[:max_bars - 1], pd.DataFrame(
+            {'contribution': [rest['contribution'].sum()],
+             'start': [rest['start'].iloc[0]], 'end': [rest['end'].iloc[-1]]},
+            index=['other'])])
+    plt.ion()
+    fig, ax = plt.subplots(figsize=figsize)
+    y_pos = np.arange(len(waterfall))
+    colors = np.where(waterfall['contribution'] >= 0, 'tab:green', 'tab:red')
+    ax.barh(y_pos, waterfall['contribution'], left=waterfall['start'],
+            color=colors, align='center')
+    # connectors from the end of every bar to the start of the next one
+    ax.vlines(waterfall['end'].to_numpy()[:-1], y_pos[:-1] + 0.4,
+              y_pos[1:] - 0.4, color='grey', linewidth=0.8)
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(waterfall.index)
+    ax.invert_yaxis()
+    ax.axvline(waterfall['start'].iloc[0] if len(waterfall) else 0,
+               color='black', linewidth=0.8)
+    ax.set_xlabel('Contribution to rating')
+    if title is not None:
+        ax.set_title(title)
+    plt.tight_layout()
+    if save_fig_dir is not None:
+        plt.savefig(save_fig_dir)
+
+
+@cache_rendering()
+def plot_cooccurrence(matrix, title=None, cluster=True, vmin=-1, vmax=1,
+                      cmap='RdBu_r', figsize=(8, 8), save_fig_dir=None):
+    """
+    Heat map of the association of pairs of answers, e.g. phi coefficients.
+
+    :param matrix:  pandas.DataFrame, square matrix with the answers as index
+                    and columns, see cooccurrence.get_cooccurrence_matrices
+    :param title:   string (optional)
+    :param cluster: bool, if True (default) the answers are ordered by
+                    clusters of associated answers, see
+                    cooccurrence.get_cluster_order
+    :param vmin:    float, lower limit of the color scale, defaults to -1
+    :param vmax:    float, upper limit of the color scale, defaults to 1
+    :param cmap:    string, defaults to 'RdBu_r'
+    :param figsize: tuple (optional)
+    :param save_fig_dir:    string (optional), complete path to which figure
+                            should be saved
+    """
+    if cluster:
+        order = get_cluster_order(matrix)
+        matrix = matrix.loc[order, order]
+    plt.ion()
+    fig, ax = plt.subplots(figsize=figsize)
+    im = ax.imshow(matrix.to_numpy(dtype=float), cmap=cmap, vmin=vmin,
+                   vmax=vmax, interpolation='nearest')
+    cbar = ax.figure.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+    cbar.ax.tick_params(labelsize='small')
+    fontsize = max(2, min(8, 600 / max(len(matrix), 1)))
+    ax.set_xticks(np.arange(len(matrix)))
+    ax.set_yticks(np.arange(len(matrix)))
+    ax.set_xticklabels(matrix.columns, rotation='vertical', fontsize=fontsize)
+    ax.set_yticklabels(matrix.index, fontsize=fontsize)
+    if title is not None:
+        ax.set_title(title)
+    plt.tight_layout()
+    if save_fig_dir is not None:
+        plt.savefig(save_fig_dir)
+
+
+@cache_rendering()
+def plot_grouped_statistics(statistics, variables=None, statistic='mean',
+                            ncols=3, figsize=None, save_fig_dir=None):
+    """
+    Small multiples of grouped ratings with one panel per variable and one
+    bar per group. If the quartiles are included, the interquartile range is
+    drawn as line over the bars.
+
+    :param statistics:  pandas.DataFrame, long table, see
+                        grouping.evaluate_groups
+    :param variables:   list (optional), variables to plot, defaults to all
+                        variables of statistics
+    :param statistic:   string, statistic of the bars, e.g. 'mean' (default),
+                        'share' or 'q50'
+    :param ncols:   int, number of panels per row, defaults to 3
+    :param figsize: tuple (optional), defaults to 3.2 x 2.4 per panel
+    :param save_fig_dir:    string (optional), complete path to which figure
+                            should be saved
+    """
+    if variables is None:
+        variables = list(dict.fromkeys(statistics['variable']))
+    table = statistics[statistics['variable'].isin(variables)].pivot_table(
+        index=['variable', 'group'], columns='statistic', values='value',
+        sort=False)
+    groups = list(dict.fromkeys(statistics['group']))
+    nrows = max(1, int(np.ceil(len(variables) / ncols)))
+    if figsize is None:
+        figsize = (3.2 * ncols, 2.4 * nrows)
+    plt.ion()
+    fig, axes = plt.subplots(nrows, ncols, figsize=figsize, sharey=True,
+                             squeeze=False)
+    y_pos = np.arange(len(groups))
+    for ax, variable in zip(axes.flat, variables):
+        values = table.loc[variable].reindex(groups)
+        ax.barh(y_pos, values[statistic], align='center', color='tab:blue')
+        if statistic != 'share' and {'q25', 'q75'}.issubset(values.columns):
+            ax.hlines(y_pos, values['q25'], values['q75'], color='black',
+                      linewidth=1.2)
+        ax.set_title(str(variable).replace('\n', ' '), fontsize='small')
+        ax.set_xlim(0, 1)
+        ax.tick_params(labelsize='x-small')
+    for ax in axes.flat[len(variables):]:
+        ax.axis('off')
+    for ax in axes[:, 0]:
+        ax.set_yticks(y_pos)
+        ax.set_yticklabels(groups)
+    axes[0, 0].invert_yaxis()
+    plt.tight_layout()
+    if save_fig_dir is not None:
+        plt.savefig(save_fig_dir)
+
+
+@cache_rendering()
+def plot_discrimination(report, x='entropy', y='mutual information',
+                        color='redundancy', top_k=15, title=None,
+                        figsize=(6.5, 4.8), save_fig_dir=None):
+    """
+    Scatter plot of the discriminative power of survey columns (dots) and
+    evaluation parameters (squares), the top_k variables of the report are
+    labeled. The size of the figure does not depend on the number of models.
+
+    :param report:  pandas.DataFrame, see discrimination.get_discrimination
+    :param x:   string, measure on the x axis, defaults to 'entropy'
+    :param y:   string, measure on the y axis, defaults to
+                'mutual information'
+    :param color:   string, measure of the color, defaults to 'redundancy'
+    :param top_k:   int, number of labeled variables (first rows of the
+                    sorted report), defaults to 15
+    :param title:   string (optional)
+    :param figsize: tuple (optional)
+    :param save_fig_dir:    string (optional), complete path to which figure
+                            should be saved
+    """
+    plt.ion()
+    fig, ax = plt.subplots(figsize=figsize)
+    kinds = report.index.get_level_values('kind')
+    for kind, marker in (('column', 'o'), ('parameter', 's')):
+        selected = report[kinds == kind]
+        scatter = ax.scatter(selected[x], selected[y],
+                             c=selected[color].fillna(0.), cmap='viridis',
+                             vmin=0, vmax=1, marker=marker, s=18,
+                             edgecolors='none', label=kind)
+    cbar = ax.figure.colorbar(scatter, ax=ax, fraction=0.046, pad=0.04)
+    cbar.set_label(color, fontsize='small')
+    for (_, variable), row in report.head(top_k).iterrows():
+        ax.annotate(str(variable).replace('\n', ' '), (row[x], row[y]),
+                    fontsize='x-small', xytext=(3, 3),
+                    textcoords='offset points')
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.legend(fontsize='small')
+    if title is not None:
+        ax.set_title(title)
+    plt.tight_layout()
+    if save_fig_dir is not None:
+        plt.savefig(save_fig_dir)
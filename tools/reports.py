@@ -0,0 +1,368 @@
+"""
+Report cards of the evaluation with one multi-page PDF per model.
+
+Every report card shows the position of the model in the heat map of every
+section, the rating of its parameters compared to the mean of all models and
+the breakdown of its holistic rating. The elements shared by all models
+(heat maps, population bars and box plots) are drawn once into background
+figures, which are copied for every model, so text stays selectable in the
+PDF. For every model only its overlay (highlighted rows, markers, ranks) and
+its breakdown are drawn on top. Models are distributed over a process pool.
+"""
+import hashlib
+import os
+import pickle
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+from tools import decomposition, scoring
+from tools.plots import _imshow_representation
+from tools.session import HOLISTIC, EvaluationSession
+
+A4_LANDSCAPE = (11.69, 8.27)
+A4_PORTRAIT = (8.27, 11.69)
+
+# backgrounds of the pages, set in every worker process by _init_worker
+_BACKGROUNDS = None
+
+
+def get_report_data(table, evaluation_parameters=None, section_weights=None):
+    """
+    Evaluates the survey table for the report cards.
+
+    :param table: pandas.DataFrame with survey information
+    :param evaluation_parameters: dict (optional), defaults to
+        tools.default_evaluation_parameters
+    :param section_weights: dict (optional), defaults to
+        tools.default_section_weights
+    :return: dict
+        'ratings': section and holistic ratings, see
+        session.EvaluationSession, 'weighted_models': dict with the weighted
+        models of every section, 'parameters': dict with the parameters of
+        every section, 'parameter_scores': ratings of all parameters,
+        'contributions': contributions of the parameters to the holistic
+        rating, index are the models, columns (section, parameter), 'ranks':
+        ranks of the models in the sections and the holistic rating,
+        'positions': rows of the models in the heat maps of the sections
+    """
+    session = EvaluationSession(table, evaluation_parameters, section_weights)
+    weighted_models = {}
+    contributions = {}
+    for section, weights in session.weights.items():
+        weighted_models[section], section_contributions = \
+            scoring.get_weighted_models_from_parameter_scores(
+                session.parameter_scores, weights, return_contributions=True)
+        # contributions to the section rating, which is the mean of all
+        # fields, and then to the holistic rating
+        contributions[section] = section_contributions.T.groupby(
+            level='parameter', sort=False).sum().T.divide(
+            weighted_models[section].shape[1] * len(session.sections))
+    ratings = session.ratings
+    # rows of the heat maps, sorted like in _draw_section_maps
+    positions = pd.DataFrame(
+        {section: pd.Series(np.arange(len(ratings)), index=ratings[
+            section].sort_values(ascending=False).index)
+         for section in weighted_models}).loc[ratings.index]
+    return {
+        'ratings': ratings,
+        'ranks': ratings.rank(ascending=False, method='min').astype(int),
+        'positions': positions,
+        'weighted_models': weighted_models,
+        'parameters': {section: scoring.get_parameters(weights)
+                       for section, weights in session.weights.items()},
+        'parameter_scores': session.parameter_scores,
+        'contributions': pd.concat(contributions, axis=1,
+                                   names=['section', 'parameter'])}
+
+
+def render_background(draw, figsize, dpi=150):
+    """
+    Draws shared elements of a page once into a figure, which is pickled to
+    be copied for every model. Text and lines stay vector graphics.
+
+    :param draw: callable, gets matplotlib.figure.Figure and draws the shared
+        elements, returns dict with the axes that get an overlay per model
+    :param figsize: tuple
+    :param dpi: int, resolution of rasterized elements (heat maps of many
+        models, see plots._imshow_representation), defaults to 150
+    :return: dict
+        'figure': pickled matplotlib.figure.Figure, 'figsize': figsize,
+        'axes': dict with the position, x- and y-limits of the axes
+    """
+    fig = Figure(figsize=figsize, dpi=dpi)
+    axes = draw(fig)
+    return {
+        'figure': pickle.dumps(fig),
+        'figsize': figsize,
+        'axes': {name: {'position': ax.get_position().bounds,
+                        'xlim': ax.get_xlim(), 'ylim': ax.get_ylim()}
+                 for name, ax in axes.items()}}
+
+
+def _draw_section_maps(fig, data, max_rows):
+    sections = list(data['weighted_models'])
+    axes = fig.subplots(1, len(sections))
+    layout = {}
+    for ax, section in zip(np.atleast_1d(axes), sections):
+        rating = data['ratings'][section].sort_values(ascending=False)
+        weighted_models = data['weighted_models'][section].loc[rating.index]
+        weighted_models.insert(0, 'Overall\nrating', rating)
+        _imshow_representation(ax, weighted_models, max_rows)
+        ax.set_xticks(np.arange(weighted_models.shape[1]))
+        ax.set_xticklabels(weighted_models.columns, rotation='vertical',
+                           fontsize='small')
+        ax.set_yticks([])
+        ax.set_title(section)
+        layout[section] = ax
+    fig.subplots_adjust(left=0.12, right=0.98, bottom=0.25, wspace=0.5)
+    return layout
+
+
+def _draw_population_bars(fig, data):
+    parameters = data['parameters']
+    axes = fig.subplots(
+        len(parameters), 1,
+        gridspec_kw={'height_ratios': [len(section_parameters)
+                                       for section_parameters in
+                                       parameters.values()]})
+    mean_scores = data['parameter_scores'].mean()
+    layout = {}
+    for ax, (section, section_parameters) in zip(np.atleast_1d(axes),
+                                                 parameters.items()):
+        y_pos = np.arange(len(section_parameters))
+        ax.barh(y_pos, mean_scores[section_parameters].values * 100,
+                color='lightgrey', label='Mean of all models')
+        ax.set_yticks(y_pos)
+        ax.set_yticklabels(section_parameters, fontsize=6)
+        ax.set_ylim(len(section_parameters) - 0.5, -0.5)
+        ax.set_xlim(0, 105)
+        ax.tick_params(axis='x', labelsize=6)
+        ax.set_title(section, fontsize='small')
+        layout[section] = ax
+    ax.set_xlabel('Level of representation [%]', fontsize='small')
+    fig.subplots_adjust(left=0.3, right=0.95, top=0.93, bottom=0.05,
+                        hspace=0.6)
+    return layout
+
+
+def _draw_rating_boxes(fig, data):
+    ax = fig.add_axes([0.1, 0.58, 0.85, 0.35])
+    ratings = data['ratings']
+    ax.boxplot([ratings[column].values for column in ratings.columns],
+               showmeans=True, meanline=True)
+    ax.set_xticks(np.arange(1, ratings.shape[1] + 1))
+    ax.set_xticklabels(ratings.columns, fontsize='small')
+    ax.set_ylim(0, 1)
+    ax.set_ylabel('Rating')
+    ax.set_title('Ratings of all models')
+    # empty area of the breakdown, drawn for every model
+    breakdown = fig.add_axes([0.35, 0.07, 0.6, 0.4])
+    breakdown.set_axis_off()
+    return {'ratings': ax, 'breakdown': breakdown}
+
+
+def render_backgrounds(data, dpi=150, max_rows=200):
+    """
+    Renders the shared elements of all pages of the report cards.
+
+    :param data: dict, see get_report_data
+    :param dpi: int, defaults to 150
+    :param max_rows: int, maximum number of rows of the heat maps, see
+        plots.plot_representation_holistic, defaults to 200
+    :return: dict, keys are the pages, values see render_background
+    """
+    return {
+        'sections': render_background(
+            lambda fig: _draw_section_maps(fig, data, max_rows),
+            A4_LANDSCAPE, dpi),
+        'parameters': render_background(
+            lambda fig: _draw_population_bars(fig, data), A4_PORTRAIT, dpi),
+        'ratings': render_background(
+            lambda fig: _draw_rating_boxes(fig, data), A4_PORTRAIT, dpi)}
+
+
+def get_model_overlay(data, model, top_k=15):
+    """
+    Collects the data of one model drawn on top of the backgrounds.
+
+    :param data: dict, see get_report_data
+    :param model: str, name of the model
+    :param top_k: int, number of parameters in the breakdown, defaults to 15
+    :return: dict
+    """
+    ratings = data['ratings']
+    contributions = pd.Series(
+        np.asarray(data['contributions'].loc[model], dtype=float),
+        index=[' / '.join(str(level).replace('\n', ' ') for level in column)
+               for column in data['contributions'].columns])
+    return {
+        'model': model,
+        'ratings': ratings.loc[model].to_dict(),
+        'ranks': data['ranks'].loc[model].to_dict(),
+        'number_of_models': len(ratings),
+        'positions': data['positions'].loc[model].to_dict(),
+        'parameter_scores': {
+            section: data['parameter_scores'].loc[
+                model, parameters].to_numpy(dtype=float)
+            for section, parameters in data['parameters'].items()},
+        'breakdown': decomposition.get_waterfall(contributions).iloc[
+            :top_k]}
+
+
+def _new_page(background):
+    # copy of the background figure, the overlay is drawn on top
+    return pickle.loads(background['figure'])
+
+
+def _add_overlay_axes(fig, layout, axis_off=True):
+    ax = fig.add_axes(layout['position'])
+    ax.set_xlim(layout['xlim'])
+    ax.set_ylim(layout['ylim'])
+    ax.patch.set_alpha(0)
+    if axis_off:
+        ax.set_axis_off()
+    return ax
+
+
+def draw_report_card(overlay, backgrounds, path):
+    """
+    Writes the report card of one model into a multi-page PDF.
+
+    :param overlay: dict, see get_model_overlay
+    :param backgrounds: dict, see render_backgrounds
+    :param path: str or pathlib.Path of the PDF
+    """
+    model = overlay['model']
+    with PdfPages(path) as pdf:
+        # heat maps of the sections with highlighted row of the model
+        background = backgrounds['sections']
+        fig = _new_page(background)
+        fig.suptitle('{}: position in the sections'.format(model))
+        for section, layout in background['axes'].items():
+            ax = _add_overlay_axes(fig, layout)
+            width = layout['xlim'][1] - layout['xlim'][0]
+            position = overlay['positions'][section]
+            ax.add_patch(Rectangle((layout['xlim'][0], position - 0.5),
+                                   width, 1, fill=False, edgecolor='red',
+                                   linewidth=1.5, clip_on=False))
+            ax.annotate('{} ({}/{})'.format(model, overlay['ranks'][section],
+                                            overlay['number_of_models']),
+                        (layout['xlim'][0], position), xytext=(-4, 0),
+                        textcoords='offset points', ha='right', va='center',
+                        fontsize=6, color='red', annotation_clip=False)
+        pdf.savefig(fig)
+
+        # ratings of the parameters compared to all models
+        background = backgrounds['parameters']
+        fig = _new_page(background)
+        for section, layout in background['axes'].items():
+            ax = _add_overlay_axes(fig, layout)
+            scores = overlay['parameter_scores'][section]
+            ax.plot(scores * 100, np.arange(len(scores)), 'D', color='red',
+                    markersize=3, label=model)
+        ax.legend(loc='lower right', fontsize=6)
+        fig.suptitle('{}: rating of the parameters (red) and mean of all '
+                     'models (grey)'.format(model), fontsize='small')
+        pdf.savefig(fig)
+
+        # ratings and breakdown of the holistic rating
+        background = backgrounds['ratings']
+        fig = _new_page(background)
+        ax = _add_overlay_axes(fig, background['axes']['ratings'])
+        values = list(overlay['ratings'].values())
+        x_pos = np.arange(1, len(values) + 1)
+        ax.plot(x_pos, values, 'D', color='red')
+        for x, section in zip(x_pos, overlay['ratings']):
+            ax.annotate('rank {}'.format(overlay['ranks'][section]),
+                        (x, overlay['ratings'][section]), xytext=(6, 0),
+                        textcoords='offset points', va='center', fontsize=6,
+                        color='red')
+        breakdown = overlay['breakdown']
+        ax = _add_overlay_axes(fig, background['axes']['breakdown'],
+                               axis_off=False)
+        y_pos = np.arange(len(breakdown))
+        ax.barh(y_pos, breakdown['contribution'], left=breakdown['start'],
+                color=np.where(breakdown['contribution'] >= 0, 'tab:green',
+                               'tab:red'))
+        ax.set_yticks(y_pos)
+        ax.set_yticklabels(breakdown.index, fontsize=6)
+        ax.set_xlim(0, max([overlay['ratings'][HOLISTIC], 0.01]) * 1.05)
+        ax.set_ylim(len(breakdown) - 0.5, -0.5)
+        ax.tick_params(axis='x', labelsize=6)
+        ax.set_title('Largest contributions to the holistic rating of {} '
+                     '({:.2f})'.format(model, overlay['ratings'][HOLISTIC]),
+                     fontsize='small')
+        pdf.savefig(fig)
+
+
+def _init_worker(backgrounds):
+    global _BACKGROUNDS
+    _BACKGROUNDS = backgrounds
+
+
+def _draw_report_card_in_worker(arguments):
+    overlay, path = arguments
+    draw_report_card(overlay, _BACKGROUNDS, path)
+    return path
+
+
+def get_report_path(directory, model):
+    """
+    Returns path of the report card of a model. Characters that are not
+    allowed in file names are replaced, the name then gets a hash of the
+    model name, so that e.g. 'A/B' and 'A:B' do not overwrite each other.
+    """
+    name = re.sub(r'[^\w\-. ]', '_', str(model))
+    if name != str(model):
+        name = '{}-{}'.format(name, hashlib.sha256(
+            str(model).encode()).hexdigest()[:8])
+    return Path(directory) / '{}.pdf'.format(name)
+
+
+def write_report_cards(table, directory, models=None,
+                       evaluation_parameters=None, section_weights=None,
+                       processes=None, dpi=150):
+    """
+    Writes one report card (multi-page PDF) per model.
+
+    :param table: pandas.DataFrame with survey information
+    :param directory: str or pathlib.Path, the PDFs are named after the
+        models, see get_report_path
+    :param models: list of str (optional), defaults to all models of table,
+        all models of table are used for the comparison in any case
+    :param evaluation_parameters: dict (optional), see get_report_data
+    :param section_weights: dict (optional), see get_report_data
+    :param processes: int (optional), number of worker processes, defaults
+        to the number of CPUs, with 1 all cards are drawn in this process
+    :param dpi: int, resolution of rasterized elements of the backgrounds,
+        defaults to 150
+    :return: list of pathlib.Path of the written PDFs
+    """
+    data = get_report_data(table, evaluation_parameters, section_weights)
+    backgrounds = render_backgrounds(data, dpi)
+    if models is None:
+        models = list(table.index)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tasks = [(get_model_overlay(data, model), get_report_path(directory,
+                                                              model))
+             for model in models]
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    if processes <= 1:
+        for overlay, path in tasks:
+            draw_report_card(overlay, backgrounds, path)
+        return [path for _, path in tasks]
+    with ProcessPoolExecutor(processes, initializer=_init_worker,
+                             initargs=(backgrounds,)) as executor:
+        return list(executor.map(
+            _draw_report_card_in_worker, tasks,
+            chunksize=max(1, len(tasks) // (4 * processes))))
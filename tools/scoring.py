@@ -0,0 +1,461 @@
+import numpy as np
+import pandas as pd
+
+
+class AnswerBlock:
+    """
+    Binary view of the survey table that is used by the vectorized evaluation.
+
+    All rules in tools.tools only check whether an answer equals one, the
+    evaluation can therefore be carried out on a uint8 matrix with one row per
+    model and one column per survey answer. Columns can be accessed by name,
+    e.g. answers['CHP/def'], which returns a boolean array over all models.
+
+    :param values: numpy.ndarray of shape (number of models, number of
+        columns) with entries 0 or 1
+    :param index: list-like with names of the models
+    :param columns: list-like with names of the survey answers
+    """
+    def __init__(self, values, index, columns):
+        self.values = np.asarray(values, dtype=np.uint8)
+        self.index = index if isinstance(index, pd.Index) else \
+            pd.Index(index)
+        self.columns = pd.Index(columns)
+        self._positions = {column: pos for pos, column in
+                           enumerate(self.columns)}
+
+    @classmethod
+    def from_table(cls, table, columns=None):
+        """
+        Creates answer block from survey table.
+
+        :param table: pandas.DataFrame with survey information, index are the
+            models and columns the answers of the survey
+        :param columns: list of str (optional), only these columns are
+            included in the block, defaults to all columns of table
+        :return: AnswerBlock
+        """
+        if columns is not None:
+            table = table.loc[:, list(columns)]
+        # copied, as the block is changed in place (e.g. by the session) and
+        # pandas may return read-only views
+        return cls(np.array(table == 1, dtype=np.uint8), table.index,
+                   table.columns)
+
+    def __getitem__(self, column):
+        return self.values[:, self._positions[column]].view(bool)
+
+    def __contains__(self, column):
+        return column in self._positions
+
+    def __len__(self):
+        return len(self.index)
+
+    def get_position(self, column):
+        return self._positions[column]
+
+    def take(self, rows):
+        """
+        Returns answer block only containing the inserted row positions.
+
+        :param rows: list of int or slice
+        :return: AnswerBlock
+        """
+        return AnswerBlock(self.values[rows], self.index[rows], self.columns)
+
+
+def get_tick_box_columns(table):
+    """
+    Returns the columns of the survey table that only contain zeros and ones,
+    i.e. the answers to tick-box questions.
+
+    :param table: pandas.DataFrame with survey information
+    :return: list of str
+    """
+    numeric = table.select_dtypes('number')
+    return [column for column in numeric.columns
+            if numeric[column].isin([0, 1]).all()]
+
+
+def get_rated_sector_representation(answers, sector):
+    """
+    Vectorized version of tools.get_rated_sector_representation.
+
+    :param answers: AnswerBlock or mapping of column names to boolean arrays
+    :param sector: str
+        Evaluated sector, currently only 'heat' and 'transport' are available
+    :return: numpy.ndarray
+    """
+    tech = answers['end disaggregated {} tech'.format(sector)]
+    dem = answers['end disaggregated {} dem'.format(sector)]
+    exo = answers['exo aggregated {} dem'.format(sector)]
+    return np.select([tech & dem, tech | dem, exo], [1, 2 / 3, 1 / 3],
+                     default=0.)
+
+
+def get_rated_sector_supply(answers):
+    """
+    Vectorized version of tools.get_rated_sector_supply.
+
+    :param answers: AnswerBlock or mapping of column names to boolean arrays
+    :return: numpy.ndarray
+    """
+    chp = answers['CHP/pos'] | answers['CHP/def']
+    sum_representation = np.zeros(len(chp))
+    sum_representation += np.where(answers['minimum load yes'], 0.5, 0.)
+    sum_representation += np.where(answers['discrete expansion yes'], 0.5, 0.)
+    return np.where(chp, sum_representation, 0.)
+
+
+def get_rated_sector_storage(answers):
+    """
+    Vectorized version of tools.get_rated_sector_storage.
+
+    :param answers: AnswerBlock or mapping of column names to boolean arrays
+    :return: numpy.ndarray
+    """
+    storage = answers['Fuels (H2)/def'] | answers['Fuels (H2)/pos'] | \
+        answers['Heat storage/pos'] | answers['Heat storage/def'] | \
+        answers['V2Grid/pos'] | answers['V2Grid/def']
+    sum_representation = np.zeros(len(storage))
+    sum_representation += np.where(answers['self discharge yes'], 1 / 3, 0.)
+    sum_representation += np.where(answers['cycle aging'], 1 / 6, 0.)
+    sum_representation += np.where(answers['calendrical aging'], 1 / 6, 0.)
+    sum_representation += np.select(
+        [answers['dynamic'], answers['fixed/static']], [1 / 3, 1 / 6],
+        default=0.)
+    return np.where(storage, sum_representation, 0.)
+
+
+def get_rated_sector_demand(answers):
+    """
+    Vectorized version of tools.get_rated_sector_demand.
+
+    :param answers: AnswerBlock or mapping of column names to boolean arrays
+    :return: numpy.ndarray
+    """
+    demand = answers['P2Gas/def'] | answers['P2Gas/pos'] | \
+        answers['P2H2/pos'] | answers['P2H2/def'] | answers['HP/pos'] | \
+        answers['HP/def'] | answers['EV/pos'] | answers['EV/def']
+    sum_representation = np.zeros(len(demand))
+    sum_representation += np.where(answers['shifting time yes'], 1 / 3, 0.)
+    sum_representation += np.where(answers['price elasticity yes'], 1 / 3, 0.)
+    sum_representation += get_rated_operation_repr_max_def_load(answers) / 3
+    return np.where(demand, sum_representation, 0.)
+
+
+def get_rated_decision(answers):
+    """
+    Vectorized version of tools.get_rated_decision.
+
+    :param answers: AnswerBlock or mapping of column names to boolean arrays
+    :return: numpy.ndarray
+    """
+    perfect = answers['perfect foresight']
+    rolling = answers['rolling horizon / myopic foresight']
+    agent = answers['decision-/agentbased']
+    return np.select(
+        [perfect & rolling & agent, agent & rolling, perfect & rolling,
+         perfect & agent, agent | rolling, perfect],
+        [1, 0.8, 0.6, 0.6, 0.4, 0.2], default=0.)
+
+
+def get_rated_operation_repr_grid(answers):
+    """
+    Vectorized version of tools.get_rated_operation_repr_grid.
+
+    :param answers: AnswerBlock or mapping of column names to boolean arrays
+    :return: numpy.ndarray
+    """
+    ac = answers['AC PF']
+    dc = answers['DC PF']
+    interconnectors = answers['interconnectors']
+    transfer = answers['transfer capacity']
+    return np.select(
+        [ac & dc & interconnectors & transfer, ac & dc & interconnectors,
+         ac & dc & transfer, ac & dc, ac & transfer, dc & transfer, ac | dc,
+         transfer],
+        [1, 0.86, 0.71, 0.57, 0.43, 0.43, 0.28, 0.14], default=0.)
+
+
+def get_rated_operation_repr_max_def_load(answers):
+    """
+    Vectorized version of tools.get_rated_operation_repr_max_def_load. Note
+    that models that only ticked 'Type-dependent' are rated with zero.
+
+    :param answers: AnswerBlock or mapping of column names to boolean arrays
+    :return: numpy.ndarray
+    """
+    return np.select(
+        [answers['time- and type-dependent'], answers['Type-dependent'],
+         answers['Time-dependent'], answers['max def load fixed value']],
+        [1, 0, 2 / 3, 1 / 3], default=0.)
+
+
+# functions used for the evaluation of parameters given as str in the
+# evaluation parameters, see tools.get_weighted_models_from_evaluation_dicts
+RATING_RULES = {
+    'heat': lambda answers: get_rated_sector_representation(answers, 'heat'),
+    'transport':
+        lambda answers: get_rated_sector_representation(answers, 'transport'),
+    'sector coupling supply': get_rated_sector_supply,
+    'sector coupling demand': get_rated_sector_demand,
+    'sector coupling storage': get_rated_sector_storage,
+    'decision making': get_rated_decision,
+    'grid representation': get_rated_operation_repr_grid,
+}
+
+# survey columns read by the functions in RATING_RULES
+RULE_COLUMNS = {
+    'heat': ['end disaggregated heat tech', 'end disaggregated heat dem',
+             'exo aggregated heat dem'],
+    'transport': ['end disaggregated transport tech',
+                  'end disaggregated transport dem',
+                  'exo aggregated transport dem'],
+    'sector coupling supply': ['CHP/pos', 'CHP/def', 'minimum load yes',
+                               'discrete expansion yes'],
+    'sector coupling demand': ['P2Gas/def', 'P2Gas/pos', 'P2H2/pos',
+                               'P2H2/def', 'HP/pos', 'HP/def', 'EV/pos',
+                               'EV/def', 'shifting time yes',
+                               'price elasticity yes',
+                               'time- and type-dependent', 'Type-dependent',
+                               'Time-dependent', 'max def load fixed value'],
+    'sector coupling storage': ['Fuels (H2)/def', 'Fuels (H2)/pos',
+                                'Heat storage/pos', 'Heat storage/def',
+                                'V2Grid/pos', 'V2Grid/def',
+                                'self discharge yes', 'cycle aging',
+                                'calendrical aging', 'dynamic',
+                                'fixed/static'],
+    'decision making': ['perfect foresight',
+                        'rolling horizon / myopic foresight',
+                        'decision-/agentbased'],
+    'grid representation': ['AC PF', 'DC PF', 'interconnectors',
+                            'transfer capacity'],
+}
+
+
+def get_criterion_columns(evaluation):
+    """
+    Returns the survey columns that are read for the evaluation of one
+    parameter.
+
+    :param evaluation: dict, list or str, entry of evaluation parameters, see
+        tools.default_evaluation_parameters
+    :return: list of str
+    """
+    if isinstance(evaluation, (dict, list)):
+        return list(evaluation)
+    elif isinstance(evaluation, str):
+        return list(RULE_COLUMNS.get(evaluation, []))
+    return []
+
+
+def get_criteria_columns(evaluation_parameters, parameters=None):
+    """
+    Returns the survey columns that are read for the evaluation of the
+    inserted parameters in order of first appearance.
+
+    :param evaluation_parameters: dict, see
+        tools.default_evaluation_parameters
+    :param parameters: list of str (optional), defaults to all keys of
+        evaluation_parameters
+    :return: list of str
+    """
+    if parameters is None:
+        parameters = evaluation_parameters.keys()
+    columns = {}
+    for parameter in parameters:
+        for column in get_criterion_columns(evaluation_parameters[parameter]):
+            columns[column] = None
+    return list(columns)
+
+
+def get_rated_parameter(answers, evaluation):
+    """
+    Evaluates one parameter for all models of the answer block, follows the
+    same rules as tools.get_weighted_models_from_evaluation_dicts.
+
+    :param answers: AnswerBlock
+    :param evaluation: dict, list or str, entry of evaluation parameters
+    :return: numpy.ndarray with rating between zero and one for every model
+    """
+    if isinstance(evaluation, dict):
+        # the first existing key determines the rating
+        return np.select([answers[key] for key in evaluation],
+                         list(evaluation.values()), default=0.)
+    elif isinstance(evaluation, list):
+        sum_parameter = np.zeros(len(answers))
+        for key in evaluation:
+            sum_parameter += answers[key]
+        return sum_parameter / len(evaluation)
+    elif isinstance(evaluation, str) and evaluation in RATING_RULES:
+        return np.asarray(RATING_RULES[evaluation](answers), dtype=float)
+    return np.zeros(len(answers))
+
+
+def get_parameter_score_matrix(answers, evaluation_parameters, parameters):
+    """
+    Evaluates the inserted parameters for all models of the answer block.
+
+    :param answers: AnswerBlock
+    :param evaluation_parameters: dict, see
+        tools.default_evaluation_parameters
+    :param parameters: list of str, keys of evaluation_parameters
+    :return: numpy.ndarray of shape (number of models, number of parameters)
+    """
+    parameter_scores = np.zeros((len(answers), len(parameters)))
+    for pos, parameter in enumerate(parameters):
+        parameter_scores[:, pos] = get_rated_parameter(
+            answers, evaluation_parameters[parameter])
+    return parameter_scores
+
+
+def get_parameters(parameters_with_weights):
+    """
+    Returns all parameters used in a dictionary of weighted parameters in
+    order of first appearance.
+
+    :param parameters_with_weights: dict, see
+        tools.get_weighted_models_from_evaluation_dicts
+    :return: list of str
+    """
+    parameters = {}
+    for parameter_with_weight in parameters_with_weights.values():
+        for parameter in parameter_with_weight:
+            parameters[parameter] = None
+    return list(parameters)
+
+
+def get_parameter_scores(table, evaluation_parameters, parameters=None,
+                         models=None):
+    """
+    Method to get the unweighted rating of every parameter for every model.
+
+    :param table: pandas.DataFrame with survey information or AnswerBlock
+    :param evaluation_parameters: dict, see
+        tools.default_evaluation_parameters
+    :param parameters: list of str (optional), evaluated parameters, defaults
+        to all keys of evaluation_parameters
+    :param models: list of str (optional), defaults to all models in table
+    :return: pandas.DataFrame
+        Index are the models, columns are the evaluated parameters
+    """
+    if parameters is None:
+        parameters = list(evaluation_parameters)
+    if isinstance(table, AnswerBlock):
+        answers = table
+        if models is not None:
+            positions = answers.index.get_indexer(models)
+            if (positions < 0).any():
+                raise KeyError('Models {} are not in the answer block.'.format(
+                    [model for model, pos in zip(models, positions)
+                     if pos < 0]))
+            answers = answers.take(positions)
+    else:
+        if models is not None:
+            table = table.loc[models]
+        answers = AnswerBlock.from_table(
+            table, get_criteria_columns(evaluation_parameters, parameters))
+    return pd.DataFrame(
+        get_parameter_score_matrix(answers, evaluation_parameters,
+                                   parameters),
+        index=answers.index, columns=parameters)
+
+
+def get_weighted_models_from_parameter_scores(parameter_scores,
+                                              parameters_with_weights,
+                                              return_contributions=False,
+                                              sparse=False):
+    """
+    Method to get rated fulfillment of predefined criteria with weighting from
+    already evaluated parameters.
+
+    The weighted rating of a field is the sum of the contributions of its
+    parameters, i.e. rating of the parameter times its weight divided by the
+    sum of weights of the field. The contributions are computed anyway and
+    can be returned as by-product.
+
+    :param parameter_scores: pandas.DataFrame, see get_parameter_scores, has
+        to include all parameters of parameters_with_weights
+    :param parameters_with_weights: dict, see
+        tools.get_weighted_models_from_evaluation_dicts
+    :param return_contributions: bool, if True the contributions are returned
+        as well, defaults to False
+    :param sparse: bool, if True the contributions are stored with
+        pandas.SparseDtype, which saves memory for large runs as most
+        contributions are zero, defaults to False
+    :return: pandas.DataFrame or tuple of pandas.DataFrame
+        Weighted models: index are the models of parameter_scores, columns
+        are the keys of inserted dict parameters_with_weights.
+        Contributions (if return_contributions is True): index are the
+        models, columns are a pandas.MultiIndex of the fields and their
+        parameters
+    """
+    weighted_models = {}
+    contributions = []
+    for field, parameter_with_weight in parameters_with_weights.items():
+        # summed up in the same order as in the loop below
+        sum_weighting = sum(parameter_with_weight.values())
+        sum_model = np.zeros(len(parameter_scores))
+        for parameter, weight in parameter_with_weight.items():
+            weighted_parameter = parameter_scores[parameter].to_numpy() * \
+                weight
+            sum_model += weighted_parameter
+            if return_contributions:
+                contribution = weighted_parameter / sum_weighting
+                if sparse:
+                    # stored sparse right away, the dense contributions of
+                    # all parameters are never held at once
+                    contribution = pd.arrays.SparseArray(contribution,
+                                                         fill_value=0.)
+                contributions.append((field, parameter, contribution))
+        weighted_models[field] = sum_model / sum_weighting
+    weighted_models = pd.DataFrame(weighted_models,
+                                   index=parameter_scores.index)
+    if not return_contributions:
+        return weighted_models
+    fields, parameters, values = zip(*contributions) if contributions else \
+        ((), (), ())
+    columns = pd.MultiIndex.from_arrays([list(fields), list(parameters)],
+                                        names=['field', 'parameter'])
+    if sparse:
+        contributions = pd.DataFrame(dict(enumerate(values)),
+                                     index=parameter_scores.index)
+        contributions.columns = columns
+    else:
+        contributions = pd.DataFrame(
+            np.column_stack(values) if values else
+            np.zeros((len(parameter_scores), 0)),
+            index=parameter_scores.index, columns=columns)
+    return weighted_models, contributions
+
+
+def get_weighted_models(models, parameters_with_weights,
+                        evaluation_parameters, table,
+                        return_contributions=False, sparse=False):
+    """
+    Vectorized version of tools.get_weighted_models_from_evaluation_dicts with
+    the same parameters and results. Instead of looping over all models, every
+    parameter is evaluated for all models at once.
+
+    :param models: List of str with names of models to be evaluated
+    :param parameters_with_weights: dict, see
+        tools.get_weighted_models_from_evaluation_dicts
+    :param evaluation_parameters: dict, see
+        tools.default_evaluation_parameters
+    :param table: pandas.DataFrame with survey information or AnswerBlock
+    :param return_contributions: bool, see
+        get_weighted_models_from_parameter_scores
+    :param sparse: bool, see get_weighted_models_from_parameter_scores
+    :return: pandas.DataFrame
+        Index are entries of inserted list models
+        Columns are the keys of inserted dict parameters_with_weights
+        If return_contributions is True, the contributions of the parameters
+        are returned as well
+    """
+    parameter_scores = get_parameter_scores(
+        table, evaluation_parameters, get_parameters(parameters_with_weights),
+        models)
+    return get_weighted_models_from_parameter_scores(
+        parameter_scores, parameters_with_weights, return_contributions,
+        sparse)
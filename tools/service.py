@@ -0,0 +1,339 @@
+"""
+Local HTTP service for the evaluation of models with the survey table.
+
+The survey table, its binary answer block and the ratings of already
+requested parameters are kept in memory, requests are therefore answered
+without reloading the table. Start the service from the repository folder
+with
+
+    python -m tools.service --port 8080
+
+and request the rating of models, e.g. with
+
+    curl -X POST localhost:8080/score -d '{"parameters_with_weights":
+        {"Technology": {"photovoltaic": 2, "concentrated solar": 1}}}'
+
+The body of a request to /score can contain the following entries:
+
+* parameters_with_weights: dict, see
+  tools.get_weighted_models_from_evaluation_dicts
+* evaluation_parameters: dict (optional), entries overwrite the default
+  evaluation parameters of tools.default_evaluation_parameters
+* models: list of str (optional), defaults to all models of the table
+
+The response contains the weighted models per field, the overall rating, which
+is the mean of all fields, and the ranking of the models. Weights have to be
+finite numbers, ratings that are not defined (e.g. of an empty field) are
+null.
+"""
+import argparse
+import asyncio
+import json
+import math
+from collections import OrderedDict
+from http import HTTPStatus
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tools import scoring
+from tools.tools import default_evaluation_parameters, load_evaluation_table
+
+MAX_BODY_SIZE = 1024 * 1024
+MAX_CACHED_PARAMETERS = 1024
+
+
+def _check_weights(parameters_with_weights):
+    for field, parameter_with_weight in parameters_with_weights.items():
+        for parameter, weight in parameter_with_weight.items():
+            try:
+                finite = math.isfinite(weight)
+            except (TypeError, OverflowError):
+                finite = False
+            if not finite:
+                raise ValueError('Weight of {} in {} is not a finite '
+                                 'number.'.format(parameter, field))
+
+
+def _get_json_value(value):
+    # NaN and infinite ratings are not valid JSON
+    return value if math.isfinite(value) else None
+
+
+class ScoringState:
+    """
+    In-memory state of the service holding the survey table, its answer
+    block and a cache of the ratings of all requested parameters.
+
+    :param table: pandas.DataFrame with survey information, see
+        tools.load_evaluation_table
+    :param evaluation_parameters: dict (optional), defaults to
+        tools.default_evaluation_parameters
+    :param max_cached_parameters: int, number of cached parameter ratings,
+        the least recently used ratings are dropped first
+    """
+    def __init__(self, table, evaluation_parameters=None,
+                 max_cached_parameters=MAX_CACHED_PARAMETERS):
+        if evaluation_parameters is None:
+            evaluation_parameters = default_evaluation_parameters()
+        self.table = table
+        self.answers = scoring.AnswerBlock.from_table(table)
+        self.evaluation_parameters = evaluation_parameters
+        self.max_cached_parameters = max_cached_parameters
+        self._parameter_scores = OrderedDict()
+
+    def get_rated_parameter(self, evaluation):
+        """
+        Returns cached rating of one parameter for all models.
+
+        :param evaluation: dict, list or str, entry of evaluation parameters
+        :return: numpy.ndarray
+        """
+        key = json.dumps(evaluation)
+        if key in self._parameter_scores:
+            self._parameter_scores.move_to_end(key)
+            return self._parameter_scores[key]
+        rating = scoring.get_rated_parameter(self.answers, evaluation)
+        self._parameter_scores[key] = rating
+        if len(self._parameter_scores) > self.max_cached_parameters:
+            self._parameter_scores.popitem(last=False)
+        return rating
+
+    def score(self, request):
+        """
+        Evaluates one request, see module documentation for the format.
+
+        :param request: dict
+        :return: dict
+        """
+        parameters_with_weights = request['parameters_with_weights']
+        _check_weights(parameters_with_weights)
+        evaluation_parameters = dict(self.evaluation_parameters)
+        evaluation_parameters.update(request.get('evaluation_parameters', {}))
+        parameters = scoring.get_parameters(parameters_with_weights)
+        parameter_scores = pd.DataFrame(
+            np.column_stack(
+                [self.get_rated_parameter(evaluation_parameters[parameter])
+                 for parameter in parameters]) if parameters else
+            np.zeros((len(self.answers), 0)),
+            index=self.answers.index, columns=parameters)
+        if 'models' in request:
+            parameter_scores = parameter_scores.loc[request['models']]
+        weighted_models = scoring.get_weighted_models_from_parameter_scores(
+            parameter_scores, parameters_with_weights)
+        rating = weighted_models.mean(axis=1).sort_values(ascending=False)
+        return {
+            'weighted_models': {
+                model: {field: _get_json_value(value)
+                        for field, value in fields.items()}
+                for model, fields in weighted_models.to_dict(
+                    orient='index').items()},
+            'rating': {model: _get_json_value(value)
+                       for model, value in rating.items()},
+            'ranking': rating.index.tolist()}
+
+
+class ScoringService:
+    """
+    Asyncio based HTTP service answering requests with a ScoringState.
+
+    Requests to /score that arrive within batch_window seconds are evaluated
+    together, parameters requested by several of them are only rated once.
+    At most max_concurrency requests are processed at the same time, further
+    requests wait until one of them is finished.
+
+    :param state: ScoringState
+    :param max_concurrency: int, defaults to 16
+    :param batch_window: float, time in seconds that is waited for further
+        requests of a batch, defaults to 0.002
+    :param max_batch_size: int, defaults to 64
+    """
+    def __init__(self, state, max_concurrency=16, batch_window=0.002,
+                 max_batch_size=64):
+        self.state = state
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._semaphore = None
+        self._max_concurrency = max_concurrency
+        self._queue = None
+        self._batcher = None
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """
+        Starts the service, returns asyncio.Server.
+        """
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.ensure_future(self._process_batches())
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def stop(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+
+    async def score(self, request):
+        """
+        Queues request for the next batch and returns its result.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return await future
+
+    async def _process_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(),
+                                                        timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                results = await loop.run_in_executor(
+                    None, self._score_batch, [item[0] for item in batch])
+            except Exception as e:
+                # only the requests of this batch fail, the batcher goes on
+                results = [RuntimeError('Batch could not be scored: '
+                                        '{!r}'.format(e)) for _ in batch]
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+    def _score_batch(self, requests):
+        results = []
+        for request in requests:
+            try:
+                results.append(self.state.score(request))
+            except Exception as e:
+                results.append(ValueError(
+                    'Invalid request: {!r}'.format(e)))
+        return results
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode().split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST,
+                                        {'error': 'Malformed request line.'})
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode().partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST,
+                                        {'error': 'Invalid Content-Length.'})
+                    break
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer,
+                                        HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {'error': 'Request body too large.'})
+                    break
+                body = await reader.readexactly(length) if length else b''
+                async with self._semaphore:
+                    status, response = await self._route(method, path, body)
+                await self._respond(writer, status, response)
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        path = path.split('?', 1)[0]
+        if method == 'GET' and path == '/health':
+            return HTTPStatus.OK, {'status': 'ok',
+                                   'models': len(self.state.answers)}
+        elif method == 'GET' and path == '/models':
+            return HTTPStatus.OK, {'models':
+                                   self.state.answers.index.tolist()}
+        elif method == 'GET' and path == '/parameters':
+            return HTTPStatus.OK, {'evaluation_parameters':
+                                   self.state.evaluation_parameters}
+        elif method == 'POST' and path == '/score':
+            try:
+                request = json.loads(body)
+                if not isinstance(request, dict) or \
+                        'parameters_with_weights' not in request:
+                    raise ValueError('Entry parameters_with_weights is '
+                                     'missing.')
+                return HTTPStatus.OK, await self.score(request)
+            except ValueError as e:
+                return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+            except Exception as e:
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+        return HTTPStatus.NOT_FOUND, {'error': 'Unknown path {}.'.format(
+            path)}
+
+    @staticmethod
+    async def _respond(writer, status, response):
+        body = json.dumps(response).encode()
+        writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n'
+                     'Content-Length: {}\r\n\r\n'.format(
+                         status.value, status.phrase, len(body)).encode()
+                     + body)
+        await writer.drain()
+
+
+async def serve(table_path, host='127.0.0.1', port=8080, **kwargs):
+    """
+    Loads survey table and runs service until it is cancelled.
+
+    :param table_path: str or pathlib.Path, see tools.load_evaluation_table
+    :param host: str, defaults to '127.0.0.1'
+    :param port: int, defaults to 8080
+    :param kwargs: further parameters of ScoringService
+    """
+    service = ScoringService(ScoringState(load_evaluation_table(table_path)),
+                             **kwargs)
+    server = await service.start(host, port)
+    print('Serving evaluation of {} models on http://{}:{}'.format(
+        len(service.state.answers), host, port))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--table', default=str(
+        Path(__file__).parents[1] / 'data' / 'Evaluation_Table.csv'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-concurrency', type=int, default=16)
+    parser.add_argument('--batch-window', type=float, default=0.002)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.table, args.host, args.port,
+                          max_concurrency=args.max_concurrency,
+                          batch_window=args.batch_window))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from tools import scoring
+from tools.tools import default_evaluation_parameters, \
+    default_section_weights
+
+HOLISTIC = 'Holistic'
+
+
+class EvaluationSession:
+    """
+    Editable evaluation of the survey table for what-if analyses, e.g. "what
+    if EMMA defined batteries?".
+
+    The session holds the table, the rating of every parameter, the section
+    ratings (mean of the fields of the 'overall' weights of a section, e.g.
+    rating_supply in Evaluation.py), the holistic rating (mean of the section
+    ratings) and one sorted list of ratings per section. Changing an answer
+    only rates the parameters reading the changed column again and only
+    updates the sections using these parameters. The position of a rating in
+    the sorted lists is found by bisection in O(log n). Removing and
+    inserting the rating shifts the following entries of the list, so an
+    update costs O(n) memory moves, but it does not sort all models again.
+
+    :param table: pandas.DataFrame with survey information, it is copied
+    :param evaluation_parameters: dict (optional), defaults to
+        tools.default_evaluation_parameters
+    :param section_weights: dict (optional), defaults to
+        tools.default_section_weights
+    """
+    def __init__(self, table, evaluation_parameters=None,
+                 section_weights=None):
+        if evaluation_parameters is None:
+            evaluation_parameters = default_evaluation_parameters()
+        if section_weights is None:
+            section_weights = default_section_weights()
+        self.table = table.copy()
+        self.evaluation_parameters = evaluation_parameters
+        self.weights = {section: weights['overall']
+                        for section, weights in section_weights.items()}
+        self.sections = list(self.weights)
+        self.parameters = scoring.get_parameters(
+            {(section, field): parameter_with_weight
+             for section, weights in self.weights.items()
+             for field, parameter_with_weight in weights.items()})
+        self.answers = scoring.AnswerBlock.from_table(
+            self.table, scoring.get_criteria_columns(evaluation_parameters,
+                                                     self.parameters))
+        self.parameter_scores = scoring.get_parameter_scores(
+            self.answers, evaluation_parameters, self.parameters)
+
+        # dependency index of the columns and the parameters reading them
+        # and of the parameters and the sections using them
+        self.dependents = {}
+        for parameter in self.parameters:
+            for column in scoring.get_criterion_columns(
+                    evaluation_parameters[parameter]):
+                self.dependents.setdefault(column, []).append(parameter)
+        self.sections_of_parameter = {
+            parameter: [section for section in self.sections
+                        if any(parameter in parameter_with_weight
+                               for parameter_with_weight in
+                               self.weights[section].values())]
+            for parameter in self.parameters}
+
+        self.ratings = pd.DataFrame(
+            {section: self._get_section_rating(self.parameter_scores, section)
+             for section in self.sections}, index=self.answers.index)
+        self.ratings[HOLISTIC] = self.ratings[self.sections].sum(
+            axis=1).divide(len(self.sections))
+        self._sorted = {
+            section: sorted(zip(-self.ratings[section].to_numpy(),
+                                self.ratings.index))
+            for section in self.ratings.columns}
+
+    def _get_section_rating(self, parameter_scores, section):
+        weighted_models = scoring.get_weighted_models_from_parameter_scores(
+            parameter_scores, self.weights[section])
+        return weighted_models.sum(axis=1).divide(weighted_models.shape[1])
+
+    def _update_rating(self, model, section, rating):
+        ratings = self._sorted[section]
+        old = (-self.ratings.at[model, section], model)
+        del ratings[bisect.bisect_left(ratings, old)]
+        bisect.insort(ratings, (-rating, model))
+        self.ratings.at[model, section] = rating
+
+    def set_answers(self, model, changes):
+        """
+        Changes answers of one model and updates the affected ratings.
+
+        :param model: str, name of the model
+        :param changes: dict, keys are the columns of the table, values the
+            new answers, e.g. {'Batteries/def': 1}
+        :return: pandas.Series with the new section ratings and the holistic
+            rating of the model
+        """
+        row = self.answers.index.get_loc(model)
+        unknown = [column for column in changes
+                   if column not in self.table.columns]
+        if unknown:
+            raise KeyError('Columns {} are not in the table.'.format(unknown))
+        parameters = {}
+        for column, value in changes.items():
+            self.table.at[model, column] = value
+            if column in self.answers:
+                self.answers.values[row, self.answers.get_position(column)] = \
+                    value == 1
+                for parameter in self.dependents.get(column, []):
+                    parameters[parameter] = None
+        if not parameters:
+            return self.ratings.loc[model]
+        answers = self.answers.take([row])
+        for parameter in parameters:
+            self.parameter_scores.at[model, parameter] = \
+                scoring.get_rated_parameter(
+                    answers, self.evaluation_parameters[parameter])[0]
+        sections = {section: None for parameter in parameters
+                    for section in self.sections_of_parameter[parameter]}
+        parameter_scores = self.parameter_scores.loc[[model]]
+        for section in sections:
+            self._update_rating(model, section, self._get_section_rating(
+                parameter_scores, section).iloc[0])
+        self._update_rating(
+            model, HOLISTIC,
+            self.ratings.loc[[model], self.sections].sum(axis=1).divide(
+                len(self.sections)).iloc[0])
+        return self.ratings.loc[model]
+
+    def set_answer(self, model, column, value):
+        """
+        Changes one answer of a model, see set_answers.
+
+        :param model: str, name of the model
+        :param column: str, column of the table, e.g. 'CHP/def'
+        :param value: new answer, e.g. 1 or 0
+        :return: pandas.Series, see set_answers
+        """
+        return self.set_answers(model, {column: value})
+
+    def get_rank(self, model, section=HOLISTIC):
+        """
+        Returns the rank of a model, models with equal rating share the best
+        rank.
+
+        :param model: str, name of the model
+        :param section: str, name of the section, defaults to the holistic
+            rating
+        :return: int, one is the best rank
+        """
+        return bisect.bisect_left(
+            self._sorted[section], (-self.ratings.at[model, section],)) + 1
+
+    def get_ranking(self, section=HOLISTIC):
+        """
+        Returns the models ordered by their rating, models with equal rating
+        are ordered by name.
+
+        :param section: str, name of the section, defaults to the holistic
+            rating
+        :return: pandas.Series with the ratings of the models
+        """
+        ratings = self._sorted[section]
+        return pd.Series(-np.array([rating for rating, _ in ratings]),
+                         index=[model for _, model in ratings], name=section)
@@ -0,0 +1,274 @@
+import numpy as np
+import pandas as pd
+
+from tools.scoring import get_tick_box_columns
+
+# number of set bits of every byte, used if numpy.bitwise_count is not
+# available (numpy < 2.0)
+_POPCOUNT_TABLE = np.array([bin(byte).count('1') for byte in range(256)],
+                           dtype=np.uint8)
+
+
+def _popcount(packed):
+    """
+    Returns number of set bits per row of bit-packed array.
+    """
+    if hasattr(np, 'bitwise_count'):
+        counts = np.bitwise_count(packed)
+    else:
+        counts = _POPCOUNT_TABLE[packed]
+    return counts.sum(axis=-1, dtype=np.int64)
+
+
+def get_packed_answers(table, columns):
+    """
+    Returns tick-box answers of the survey table packed into bits.
+
+    :param table: pandas.DataFrame with survey information
+    :param columns: list of str, tick-box columns, see
+        scoring.get_tick_box_columns
+    :return: numpy.ndarray of dtype uint8 and shape (number of models,
+        ceil(number of columns / 8))
+    """
+    answers = (table.reindex(columns=columns, fill_value=0) == 1).to_numpy()
+    return np.packbits(answers, axis=1)
+
+
+def get_similarities(packed, packed_query):
+    """
+    Computes Jaccard similarity and Hamming distance between bit-packed
+    answers of several models and one queried model.
+
+    :param packed: numpy.ndarray, see get_packed_answers
+    :param packed_query: numpy.ndarray, one row of packed answers
+    :return: tuple of numpy.ndarray
+        Jaccard similarity (one if both models ticked nothing) and Hamming
+        distance, i.e. number of differing answers
+    """
+    intersection = _popcount(packed & packed_query)
+    union = _popcount(packed | packed_query)
+    hamming = _popcount(packed ^ packed_query)
+    jaccard = np.divide(intersection, union, out=np.ones(len(packed)),
+                        where=union > 0)
+    return jaccard, hamming
+
+
+class SimilarityIndex:
+    """
+    Index for the search of models with similar answers in the tick-box
+    questions of the survey.
+
+    Answers are stored bit-packed, similarities of the candidates are
+    computed with bit operations. For large tables a MinHash/LSH index is
+    used to find candidates: the MinHash signature of every model is split
+    into bands, models sharing at least one band are candidates. Models can
+    be appended with add, the answers and signatures are stored in buffers
+    whose capacity is doubled when they are full, so adding models one by
+    one takes amortized constant time per model.
+
+    :param table: pandas.DataFrame with survey information
+    :param columns: list of str (optional), compared columns, defaults to
+        all tick-box columns of table (see scoring.get_tick_box_columns)
+    :param num_perm: int, number of hash functions of the MinHash signature,
+        defaults to 64
+    :param bands: int, number of LSH bands, num_perm has to be divisible by
+        bands, defaults to 16
+    :param seed: int, seed of the hash functions, defaults to 0
+    """
+    def __init__(self, table, columns=None, num_perm=64, bands=16, seed=0):
+        if num_perm % bands:
+            raise ValueError('num_perm has to be divisible by bands.')
+        self.columns = pd.Index(get_tick_box_columns(table)
+                                if columns is None else columns)
+        self.bands = bands
+        rng = np.random.default_rng(seed)
+        # every hash function is a random permutation of the column
+        # positions, the MinHash is the smallest permuted position of the
+        # ticked columns
+        self._hashes = np.array([rng.permutation(len(self.columns))
+                                 for _ in range(num_perm)],
+                                dtype=np.int64).reshape(num_perm, -1)
+        self._names = []
+        self._positions = {}
+        self._models = None
+        self._size = 0
+        self._packed = np.zeros((0, (len(self.columns) + 7) // 8),
+                                dtype=np.uint8)
+        self._signatures = np.zeros((0, num_perm), dtype=np.int64)
+        self._buckets = [{} for _ in range(bands)]
+        self.add(table)
+
+    @property
+    def models(self):
+        """
+        pandas.Index with the names of the models of the index
+        """
+        if self._models is None:
+            self._models = pd.Index(self._names)
+        return self._models
+
+    @property
+    def packed(self):
+        """
+        numpy.ndarray with the bit-packed answers of the models, see
+        get_packed_answers
+        """
+        return self._packed[:self._size]
+
+    @property
+    def signatures(self):
+        """
+        numpy.ndarray with the MinHash signatures of the models, see
+        get_signatures
+        """
+        return self._signatures[:self._size]
+
+    def _reserve(self, size):
+        # doubles the capacity of the buffers until size models fit
+        capacity = len(self._packed)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name in ['_packed', '_signatures']:
+            old = getattr(self, name)
+            new = np.zeros((capacity, old.shape[1]), dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def get_signatures(self, packed, chunk_size=256):
+        """
+        Computes MinHash signatures of bit-packed answers.
+
+        :param packed: numpy.ndarray, see get_packed_answers
+        :param chunk_size: int, number of models processed at once
+        :return: numpy.ndarray of shape (number of models, num_perm), models
+            without ticked columns have the number of columns as MinHash
+        """
+        signatures = np.empty((len(packed), len(self._hashes)),
+                              dtype=np.int64)
+        for start in range(0, len(packed), chunk_size):
+            answers = np.unpackbits(packed[start:start + chunk_size], axis=1,
+                                    count=len(self.columns)).astype(bool)
+            signatures[start:start + chunk_size] = np.where(
+                answers[:, None, :], self._hashes[None, :, :],
+                len(self.columns)).min(axis=2)
+        return signatures
+
+    def get_estimated_jaccard(self, model):
+        """
+        Returns Jaccard similarity of all models of the index with the
+        inserted model estimated from the MinHash signatures, i.e. the share
+        of equal MinHashes.
+
+        :param model: str, name of a model of the index
+        :return: pandas.Series
+        """
+        signature = self.signatures[self._positions[model]]
+        return pd.Series((self.signatures == signature).mean(axis=1),
+                         index=self.models)
+
+    def _get_band_keys(self, signatures):
+        return [[band.tobytes() for band in row]
+                for row in np.split(signatures, self.bands, axis=1)]
+
+    def add(self, table):
+        """
+        Appends models of table to the index. Columns of the index that are
+        missing in table count as not ticked, further columns are ignored.
+
+        :param table: pandas.DataFrame with survey information
+        """
+        existing = [model for model in table.index
+                    if model in self._positions]
+        if existing:
+            raise ValueError('Models {} already exist in index.'.format(
+                existing))
+        if table.index.has_duplicates:
+            raise ValueError('Models {} are not unique.'.format(
+                list(table.index[table.index.duplicated()].unique())))
+        packed = get_packed_answers(table, self.columns)
+        signatures = self.get_signatures(packed)
+        start = self._size
+        for band, keys in enumerate(self._get_band_keys(signatures)):
+            buckets = self._buckets[band]
+            for pos, key in enumerate(keys):
+                buckets.setdefault(key, []).append(start + pos)
+        self._reserve(start + len(table))
+        self._packed[start:start + len(table)] = packed
+        self._signatures[start:start + len(table)] = signatures
+        self._size += len(table)
+        for pos, model in enumerate(table.index):
+            self._positions[model] = start + pos
+        self._names.extend(table.index)
+        self._models = None
+
+    def get_candidates(self, signature):
+        """
+        Returns positions of models sharing at least one LSH band with the
+        inserted signature.
+        """
+        candidates = set()
+        for band, keys in enumerate(self._get_band_keys(signature[None, :])):
+            candidates.update(self._buckets[band].get(keys[0], []))
+        return np.array(sorted(candidates), dtype=np.int64)
+
+    def query(self, model, k=5, exact=None):
+        """
+        Returns the k models most similar to the inserted model.
+
+        :param model: str, name of a model of the index, or pandas.Series
+            with the answers of a model that is not part of the index
+        :param k: int, number of returned models, defaults to 5
+        :param exact: bool (optional), if True all models are compared, if
+            False only the candidates of the LSH index, by default exact
+            comparison is used for indices with less than 10000 models
+        :return: pandas.DataFrame
+            Index are the most similar models, columns are 'jaccard',
+            'hamming', 'only_query' (list of columns only ticked by the
+            queried model) and 'only_model' (list of columns only ticked by
+            the similar model)
+        """
+        if isinstance(model, pd.Series):
+            name = model.name
+            packed_query = get_packed_answers(model.to_frame().T,
+                                              self.columns)[0]
+        else:
+            name = model
+            packed_query = self.packed[self._positions[model]]
+        if exact is None:
+            exact = len(self.models) < 10000
+        if exact:
+            candidates = np.arange(len(self.models))
+        else:
+            candidates = self.get_candidates(self.get_signatures(
+                packed_query[None, :])[0])
+        candidates = candidates[self.models[candidates] != name]
+        jaccard, hamming = get_similarities(self.packed[candidates],
+                                            packed_query)
+        order = np.lexsort((hamming, -jaccard))[:k]
+        candidates = candidates[order]
+        answers = np.unpackbits(self.packed[candidates], axis=1,
+                                count=len(self.columns)).astype(bool)
+        query = np.unpackbits(packed_query, count=len(self.columns)).astype(
+            bool)
+        return pd.DataFrame({
+            'jaccard': jaccard[order], 'hamming': hamming[order],
+            'only_query': [list(self.columns[query & ~row])
+                           for row in answers],
+            'only_model': [list(self.columns[row & ~query])
+                           for row in answers]},
+            index=self.models[candidates])
+
+
+def get_similar_models(table, model, k=5, columns=None):
+    """
+    Returns the k models with the most similar tick-box answers to the
+    inserted model by exact comparison with all models of table.
+
+    :param table: pandas.DataFrame with survey information
+    :param model: str, name of the model
+    :param k: int, defaults to 5
+    :param columns: list of str (optional), see SimilarityIndex
+    :return: pandas.DataFrame, see SimilarityIndex.query
+    """
+    return SimilarityIndex(table, columns).query(model, k, exact=True)
@@ -0,0 +1,244 @@
+import copy
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from matplotlib import cbook
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (KLL) for the summary statistics of box plots
+    of large populations.
+
+    Values are collected in compactors of increasing weight. If a compactor
+    exceeds its capacity, it is sorted and every second value is promoted to
+    the next compactor with double weight. The memory therefore only grows
+    logarithmically with the number of values. Sketches of chunks of the data
+    can be computed independently (e.g. in parallel) and merged afterwards.
+
+    As long as the sketch holds at most exact_limit values, no value is
+    compacted and all statistics are exact, i.e. identical to
+    matplotlib.cbook.boxplot_stats used by matplotlib's boxplot.
+
+    :param k: int, capacity of the largest compactor, the rank error is of
+        the order of 1 / k, defaults to 200
+    :param exact_limit: int, number of values up to which the sketch is
+        exact, defaults to 100000
+    :param seed: int or numpy.random.SeedSequence (optional), seed of the
+        random offsets of the compactions
+    """
+    def __init__(self, k=200, exact_limit=100000, seed=None):
+        self.k = k
+        self.exact_limit = exact_limit
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.sum = 0.
+        self.min = np.inf
+        self.max = -np.inf
+        self.exact = True
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.count
+
+    def _get_capacity(self, level):
+        return max(2, int(np.ceil(
+            self.k * (2 / 3) ** (len(self.levels) - level - 1))))
+
+    def _compress(self):
+        if self.exact:
+            if self.count <= self.exact_limit:
+                return
+            self.exact = False
+        compressed = False
+        while not compressed:
+            compressed = True
+            for level in range(len(self.levels)):
+                values = self.levels[level]
+                if len(values) <= self._get_capacity(level):
+                    continue
+                compressed = False
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                values = np.sort(values)
+                number_even = len(values) - len(values) % 2
+                offset = self._rng.integers(2)
+                self.levels[level + 1] = np.concatenate(
+                    [self.levels[level + 1], values[offset:number_even:2]])
+                self.levels[level] = values[number_even:]
+
+    def update(self, values):
+        """
+        Adds values to the sketch, NaN values are ignored.
+
+        :param values: array-like
+        :return: KLLSketch, the sketch itself
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.sum += values.sum()
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Merges other sketch into this sketch.
+
+        :param other: KLLSketch
+        :return: KLLSketch, the sketch itself
+        """
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.exact = self.exact and other.exact
+        self._compress()
+        return self
+
+    def get_weighted_values(self):
+        """
+        Returns sorted values of the sketch and their weights.
+
+        :return: tuple of numpy.ndarray
+        """
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2. ** level)
+                                  for level, values in
+                                  enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def quantile(self, q):
+        """
+        Returns the (approximated) quantiles of the values.
+
+        :param q: float or array-like with values between 0 and 1
+        :return: float or numpy.ndarray
+        """
+        if self.exact:
+            return np.percentile(self.levels[0], np.asarray(q) * 100)
+        values, weights = self.get_weighted_values()
+        ranks = np.cumsum(weights)
+        positions = np.searchsorted(ranks, np.asarray(q) * ranks[-1],
+                                    side='left')
+        return values[np.minimum(positions, len(values) - 1)]
+
+    def get_boxplot_stats(self, whis=1.5, label=None):
+        """
+        Returns the statistics of a box plot, see matplotlib.cbook.
+        boxplot_stats. If the sketch is not exact, the whiskers extend to
+        whis times the interquartile range, limited by the minimum and maximum
+        value, which is close to the most extreme value within this range for
+        large populations. The fliers are then the retained values outside
+        the whiskers.
+
+        :param whis: float, defaults to 1.5
+        :param label: str (optional)
+        :return: dict, can be plotted with matplotlib.axes.Axes.bxp
+        """
+        if self.exact:
+            return cbook.boxplot_stats(self.levels[0], whis=whis,
+                                       labels=[label])[0]
+        q1, median, q3 = self.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        values, _ = self.get_weighted_values()
+        stats = {
+            'mean': self.sum / self.count, 'med': median, 'q1': q1,
+            'q3': q3, 'iqr': iqr,
+            'cilo': median - 1.57 * iqr / np.sqrt(self.count),
+            'cihi': median + 1.57 * iqr / np.sqrt(self.count),
+            'whislo': max(self.min, min(q1 - whis * iqr, q1)),
+            'whishi': min(self.max, max(q3 + whis * iqr, q3))}
+        stats['fliers'] = np.unique(values[(values < stats['whislo']) |
+                                           (values > stats['whishi'])])
+        if label is not None:
+            stats['label'] = label
+        return stats
+
+
+def _get_chunk_sketches(chunk, k, exact_limit, seed):
+    return {column: KLLSketch(k, exact_limit, seed).update(chunk[column])
+            for column in chunk.columns}
+
+
+def merge_sketches(*sketches):
+    """
+    Merges dictionaries of sketches, e.g. of several chunks. The inserted
+    sketches are not changed.
+
+    :param sketches: dicts, keys are the names of the boxes, values KLLSketch
+    :return: dict
+    """
+    merged = {}
+    for chunk_sketches in sketches:
+        for name, sketch in chunk_sketches.items():
+            if name in merged:
+                merged[name].merge(sketch)
+            else:
+                merged[name] = copy.deepcopy(sketch)
+    return merged
+
+
+def get_sketches(data, k=200, exact_limit=100000, seed=None,
+                 processes=None):
+    """
+    Computes one sketch per column of data in one pass, e.g. one per section
+    of weighted_models_holistic_df in Evaluation.py.
+
+    :param data: pandas.DataFrame or iterable of pandas.DataFrame (chunks
+        with the same columns), e.g. pandas.read_csv(..., chunksize=...)
+    :param k: int, see KLLSketch
+    :param exact_limit: int, see KLLSketch
+    :param seed: int (optional), see KLLSketch, every chunk gets its own
+        seed derived from it
+    :param processes: int (optional), if given chunks are sketched in a
+        process pool and merged in their order, at most 2 * processes chunks
+        are read ahead, so memory stays bounded for chunked readers
+    :return: dict, keys are the columns, values KLLSketch
+    """
+    if isinstance(data, pd.DataFrame):
+        data = [data]
+    seeds = np.random.SeedSequence(seed)
+    sketches = {}
+    if processes is None:
+        for chunk in data:
+            sketches = merge_sketches(sketches, _get_chunk_sketches(
+                chunk, k, exact_limit, seeds.spawn(1)[0]))
+        return sketches
+    with ProcessPoolExecutor(processes) as executor:
+        pending = deque()
+        for chunk in data:
+            if len(pending) >= 2 * processes:
+                sketches = merge_sketches(sketches,
+                                          pending.popleft().result())
+            pending.append(executor.submit(
+                _get_chunk_sketches, chunk, k, exact_limit,
+                seeds.spawn(1)[0]))
+        while pending:
+            sketches = merge_sketches(sketches, pending.popleft().result())
+    return sketches
+
+
+def get_boxplot_stats(sketches, whis=1.5):
+    """
+    Returns the statistics of one box per sketch, see
+    KLLSketch.get_boxplot_stats.
+
+    :param sketches: dict, see get_sketches
+    :param whis: float, defaults to 1.5
+    :return: list of dict, see plots.plot_boxplot_stats
+    """
+    return [sketch.get_boxplot_stats(whis, name)
+            for name, sketch in sketches.items()]
@@ -0,0 +1,229 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tools import scoring
+from tools.tools import load_evaluation_table
+
+
+class SurveySnapshots:
+    """
+    Collection of several campaigns (snapshots) of the survey, e.g. one per
+    year, that are evaluated together.
+
+    All snapshots share one column schema, which is the union of the columns
+    of the added tables in order of first appearance, and one dictionary per
+    text column (e.g. 'Modeling language' or 'Version'). Text columns are
+    encoded into the shared dictionaries once when a snapshot is added, they
+    are never ticked and are skipped in the answer block. Columns that were
+    only added in later surveys extend the shared schema, the stored
+    snapshots are not copied or reindexed. Answers missing in older snapshots
+    count as not ticked in the evaluation. The index and the answer block of
+    all snapshots are built once and rebuilt after a snapshot is added.
+    """
+    def __init__(self):
+        self.labels = []
+        self.tables = {}
+        self.columns = pd.Index([])
+        self.categories = {}
+        self._codes = {}
+        self._index = None
+        self._answer_block = None
+
+    def add(self, label, table):
+        """
+        Adds survey table as snapshot.
+
+        :param label: str, name of the snapshot, e.g. the year of the survey
+        :param table: pandas.DataFrame with survey information, see
+            tools.load_evaluation_table
+        """
+        if label in self.tables:
+            raise ValueError('Snapshot {} already exists.'.format(label))
+        self.labels.append(label)
+        self.tables[label] = table
+        self.columns = self.columns.append(
+            table.columns.difference(self.columns, sort=False))
+        self._codes[label] = {}
+        for column in table.columns:
+            if table[column].dtype.kind in 'iufb':
+                continue
+            texts = table[column].astype(str)
+            values = pd.Index(texts.unique())
+            if column in self.categories:
+                values = values.difference(self.categories[column],
+                                           sort=False)
+                self.categories[column] = \
+                    self.categories[column].append(values)
+            else:
+                self.categories[column] = values
+            # codes stay valid, as the dictionaries are only extended
+            self._codes[label][column] = \
+                self.categories[column].get_indexer(texts)
+        self._index = None
+        self._answer_block = None
+
+    @property
+    def index(self):
+        """
+        pandas.MultiIndex with levels snapshot and model over all snapshots
+        """
+        if self._index is None:
+            self._index = pd.MultiIndex.from_tuples(
+                [(label, model) for label in self.labels
+                 for model in self.tables[label].index],
+                names=['snapshot', 'model'])
+        return self._index
+
+    def get_codes(self, column):
+        """
+        Returns codes of text column in shared dictionary of all snapshots.
+
+        :param column: str, name of text column, e.g. 'Modeling language'
+        :return: pandas.Series
+            Index are snapshot and model, values are positions in
+            self.categories[column], -1 if column is missing in snapshot
+        """
+        codes = [self._codes[label][column]
+                 if column in self._codes[label]
+                 else np.full(len(self.tables[label]), -1)
+                 for label in self.labels]
+        return pd.Series(np.concatenate(codes), index=self.index, name=column)
+
+    def get_categorical(self, column):
+        """
+        Returns text column of all snapshots using shared categories.
+
+        :param column: str, name of text column
+        :return: pandas.Series with categorical dtype
+        """
+        codes = self.get_codes(column)
+        return pd.Series(pd.Categorical.from_codes(
+            codes.to_numpy(), categories=self.categories[column]),
+            index=codes.index, name=column)
+
+    def get_answer_block(self, columns=None):
+        """
+        Returns one answer block over all snapshots, missing columns of a
+        snapshot and text columns are filled with zero. The block of the
+        shared schema is cached, the block of other columns is taken from it.
+
+        :param columns: list of str (optional), defaults to shared schema
+        :return: scoring.AnswerBlock with index of self.index
+        """
+        if self._answer_block is None:
+            values = np.zeros((len(self.index), len(self.columns)),
+                              dtype=np.uint8)
+            start = 0
+            for label in self.labels:
+                table = self.tables[label]
+                numeric = [column for column in table.columns
+                           if column not in self._codes[label]]
+                values[start:start + len(table),
+                       self.columns.get_indexer(numeric)] = \
+                    (table.loc[:, numeric] == 1).to_numpy(dtype=np.uint8)
+                start += len(table)
+            self._answer_block = scoring.AnswerBlock(values, self.index,
+                                                     self.columns)
+        if columns is None:
+            return self._answer_block
+        columns = pd.Index(columns)
+        positions = self.columns.get_indexer(columns)
+        existing = positions >= 0
+        values = np.zeros((len(self.index), len(columns)), dtype=np.uint8)
+        values[:, existing] = self._answer_block.values[:, positions[existing]]
+        return scoring.AnswerBlock(values, self.index, columns)
+
+    def get_parameter_scores(self, evaluation_parameters, parameters=None):
+        """
+        Evaluates parameters for all models of all snapshots in one pass.
+
+        :param evaluation_parameters: dict, see
+            tools.default_evaluation_parameters
+        :param parameters: list of str (optional), defaults to all keys of
+            evaluation_parameters
+        :return: pandas.DataFrame
+            Index are snapshot and model, columns are the parameters
+        """
+        if parameters is None:
+            parameters = list(evaluation_parameters)
+        answers = self.get_answer_block(scoring.get_criteria_columns(
+            evaluation_parameters, parameters))
+        return scoring.get_parameter_scores(answers, evaluation_parameters,
+                                            parameters)
+
+    def get_weighted_models(self, parameters_with_weights,
+                            evaluation_parameters):
+        """
+        Evaluates weighted parameters for all models of all snapshots in one
+        pass, see tools.get_weighted_models_from_evaluation_dicts.
+
+        :param parameters_with_weights: dict, see
+            tools.get_weighted_models_from_evaluation_dicts
+        :param evaluation_parameters: dict, see
+            tools.default_evaluation_parameters
+        :return: pandas.DataFrame
+            Index are snapshot and model, columns are the keys of
+            parameters_with_weights
+        """
+        parameter_scores = self.get_parameter_scores(
+            evaluation_parameters,
+            scoring.get_parameters(parameters_with_weights))
+        return scoring.get_weighted_models_from_parameter_scores(
+            parameter_scores, parameters_with_weights)
+
+
+def load_snapshots(paths, labels=None):
+    """
+    Loads several survey tables as snapshots.
+
+    :param paths: list of str or pathlib.Path, paths to csv files in the
+        format of data/Evaluation_Table.csv
+    :param labels: list of str (optional), names of the snapshots, defaults
+        to the file names without suffix
+    :return: SurveySnapshots
+    """
+    if labels is None:
+        labels = [Path(path).stem for path in paths]
+    snapshots = SurveySnapshots()
+    for label, path in zip(labels, paths):
+        snapshots.add(label, load_evaluation_table(path))
+    return snapshots
+
+
+def get_trends(weighted_models, field=None):
+    """
+    Returns development of one evaluated field over all snapshots.
+
+    :param weighted_models: pandas.DataFrame, see
+        SurveySnapshots.get_weighted_models, can also be a pandas.Series
+        with the same index, e.g. an overall rating
+    :param field: str (optional), evaluated column of weighted_models, not
+        used if weighted_models is a Series
+    :return: pandas.DataFrame
+        Index are the models, columns are the snapshots in order of their
+        appearance, models missing in a snapshot are NaN
+    """
+    if isinstance(weighted_models, pd.DataFrame):
+        weighted_models = weighted_models[field]
+    snapshots = weighted_models.index.get_level_values('snapshot').unique()
+    return weighted_models.unstack('snapshot')[snapshots]
+
+
+def get_snapshot_deltas(weighted_models, base, target):
+    """
+    Returns change of all evaluated fields between two snapshots.
+
+    :param weighted_models: pandas.DataFrame, see
+        SurveySnapshots.get_weighted_models
+    :param base: str, label of the earlier snapshot
+    :param target: str, label of the later snapshot
+    :return: pandas.DataFrame
+        Index are the models of both snapshots, columns are the evaluated
+        fields, values are target minus base, NaN if model is missing in
+        one of the snapshots
+    """
+    base_df = weighted_models.xs(base, level='snapshot')
+    target_df = weighted_models.xs(target, level='snapshot')
+    return target_df.subtract(base_df)
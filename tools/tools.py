@@ -1,6 +1,18 @@
 import pandas as pd
 
 
+def load_evaluation_table(path):
+    """
+    Loads survey table in the format of data/Evaluation_Table.csv. Missing
+    answers are filled with zero.
+
+    :param path: str or pathlib.Path, path to the csv file
+    :return: pandas.DataFrame
+        Index are the models, columns are the answers of the survey
+    """
+    return pd.read_csv(path, sep=";").set_index('Model / framework').fillna(0)
+
+
 def default_evaluation_parameters():
     """
     Returns default dictionary for evaluation parameters. These are further
@@ -128,6 +140,140 @@ def default_evaluation_parameters():
     return evaluation_parameters
 
 
+def default_section_weights():
+    """
+    Returns the weighting of the parameters used for the evaluation of the
+    sections supply, demand, storage, network and sector coupling in
+    Evaluation.py. For every section three dictionaries in the form of
+    parameters_with_weights (see get_weighted_models_from_evaluation_dicts)
+    are given:
+
+    * 'overall': used for the rating of the section, consists of the fields
+    technology representation and detailed characteristics
+    * 'tech': detailed evaluation of the represented technologies
+    * 'char': detailed evaluation of the characteristics
+
+    :return: dict
+    """
+    section_weights = {
+        'Supply': {
+            'overall': {
+                'Technology\nrepresentation':
+                    {'coal': 1, 'lignite': 1, 'oil': 1, 'natural gas': 1,
+                     'CCGT': 1, 'OCGT': 1, 'bioenergy': 1,
+                     'Hydro reservoir': 1, 'geothermal energy': 1,
+                     'concentrated solar': 1, 'photovoltaic': 1,
+                     'wind onshore': 1, 'wind offshore': 1, 'river hydro': 1,
+                     'wave power': 1, 'tidal power': 1, 'PEM-FC': 1,
+                     'SOFC': 1, 'nuclear': 1},
+                'Detailed\ncharacteristics':
+                    {'efficiency': 1, 'ramping': 1, 'response time': 1,
+                     'recovery time': 1, 'discrete capacity expansion': 1,
+                     'curtailed operation': 1, 'minimum load': 1}},
+            'tech': {
+                'Conventional':
+                    {'coal': 1, 'lignite': 1, 'oil': 1, 'natural gas': 1,
+                     'CCGT': 1, 'OCGT': 1, 'nuclear': 1},
+                'Dispatchable\nRES':
+                    {'bioenergy': 1, 'Hydro reservoir': 1,
+                     'geothermal energy': 1, 'concentrated solar': 1},
+                'Variable\nRES':
+                    {'photovoltaic': 1, 'wind onshore': 1,
+                     'wind offshore': 1, 'river hydro': 1, 'wave power': 1,
+                     'tidal power': 1},
+                'Fuel cells': {'PEM-FC': 1, 'SOFC': 1}},
+            'char': {
+                'Technology\nspecifications':
+                    {'curtailed operation': 1, 'minimum load': 1},
+                'Operations':
+                    {'efficiency': 1, 'ramping': 1, 'response time': 1,
+                     'recovery time': 1},
+                'Discrete\nexpansion': {'discrete capacity expansion': 1}}},
+        'Demand': {
+            'overall': {
+                'Technology\nrepresentation':
+                    {'households': 1, 'industrial load': 1,
+                     'service sector': 1},
+                'Detailed\ncharacteristics':
+                    {'efficiency': 1, 'ramping': 1, 'response time': 1,
+                     'recovery time': 1, 'maximum deferrable load': 1,
+                     'shifting time': 1, 'price elasticity': 1}},
+            'tech': {
+                'Household': {'households': 1},
+                'Industry': {'industrial load': 1},
+                'Service': {'service sector': 1}},
+            'char': {
+                'Technology\nspecifications':
+                    {'maximum deferrable load': 1, 'shifting time': 1},
+                'Operations':
+                    {'efficiency': 1, 'ramping': 1, 'response time': 1,
+                     'recovery time': 1},
+                'Price\nelasticity': {'price elasticity': 1}}},
+        'Storage': {
+            'overall': {
+                'Technology\nrepresentation':
+                    {'Batteries': 1, 'PHS': 1, 'CAES': 1, 'Caps': 1,
+                     'Flywheels': 1},
+                'Detailed\ncharacteristics':
+                    {'efficiency': 1, 'ramping': 1, 'response time': 1,
+                     'recovery time': 1, 'storage implementation': 1,
+                     'aging': 1, 'self discharge': 1}},
+            'tech': {
+                'Long term': {'PHS': 1, 'CAES': 1},
+                'Medium term': {'Batteries': 1},
+                'Short term': {'Caps': 1, 'Flywheels': 1}},
+            'char': {
+                'Technology\nspecifications':
+                    {'aging': 1, 'self discharge': 1},
+                'Storage\nimplementation': {'storage implementation': 1},
+                'Operations':
+                    {'efficiency': 1, 'ramping': 1, 'response time': 1,
+                     'recovery time': 1}}},
+        'Network': {
+            'overall': {
+                'Technology\nrepresentation':
+                    {'Distribution Grid': 1, 'Transmission Grid': 1,
+                     'network extension': 1, 'switches': 1},
+                'Detailed\ncharacteristics':
+                    {'Grid representation': 1, 'import': 1,
+                     'grid ancillary services': 1}},
+            'tech': {
+                'Grid types': {'Distribution Grid': 1, 'Transmission Grid': 1},
+                'Topology': {'network extension': 1, 'switches': 1}},
+            'char': {
+                'Grid\nrepresen-\ntation': {'Grid representation': 1},
+                'Import\nexport': {'import': 1},
+                'Ancillary\nservices': {'grid ancillary services': 1}}},
+        'Sector\ncoupling': {
+            'overall': {
+                'Technology\nrepresentation':
+                    {'P2H2': 1, 'HP': 1, 'EV': 1, 'Fuels': 1,
+                     'Heat storage': 1, 'V2G': 1, 'CHP': 1},
+                'Detailed\ncharacteristics':
+                    {'efficiency': 1, 'ramping': 1, 'response time': 1,
+                     'recovery time': 1, 'Heat': 1, 'Transport': 1,
+                     'sector coupling supply': 1,
+                     'sector coupling demand': 1,
+                     'sector coupling storage': 1}},
+            'tech': {
+                'Supply\ntechnology': {'CHP': 1},
+                # P2H2 represents P2G here
+                'Demand\ntechnology': {'P2H2': 1, 'HP': 1, 'EV': 1},
+                'Storage\ntechnology':
+                    {'Fuels': 1, 'Heat storage': 1, 'V2G': 1}},
+            'char': {
+                'Sector\nrepresentation': {'Heat': 1, 'Transport': 1},
+                'Technology\nspecifications':
+                    {'sector coupling supply': 1,
+                     'sector coupling demand': 1,
+                     'sector coupling storage': 1},
+                'Operations':
+                    {'efficiency': 1, 'ramping': 1, 'response time': 1,
+                     'recovery time': 1}}},
+    }
+    return section_weights
+
+
 def get_weighted_models_from_evaluation_dicts(models, parameters_with_weights,
                                               evaluation_parameters, table):
     """